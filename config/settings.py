@@ -11,8 +11,7 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 
 # 数据库配置
-DATA_DIR = PROJECT_ROOT / "data"
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR = PROJECT_ROOT / "data"  # 目录由 DatabaseManager 在首次打开数据库时创建
 DATABASE_PATH = DATA_DIR / "auto_repair.db"
 
 # 应用配置
@@ -23,18 +22,70 @@ WINDOW_HEIGHT = 800
 
 # 数据库配置
 DB_TIMEOUT = 30  # 数据库连接超时时间（秒）
+DB_POOL_SIZE = 8  # 连接池最大连接数（每个线程同一时间最多占用一个连接）
+DB_POOL_HEALTH_CHECK_INTERVAL = 60  # 空闲连接超过该秒数后取用前做健康检查
+MIGRATION_BATCH_SIZE = 5000  # 结构迁移回填数据时每次提交的行数（按 rowid 分段）
+DB_OPTIMIZE_INTERVAL = 6 * 3600  # 程序长时间运行时每隔该秒数执行一次 PRAGMA optimize
+
+# 每个新建连接执行一次的PRAGMA配置（按顺序执行）
+DB_PRAGMAS = {
+    'journal_mode': 'WAL',       # 读写互不阻塞，报表查询不会卡住收银写单
+    'synchronous': 'NORMAL',     # WAL模式下每次提交只需一次fsync
+    'cache_size': -20000,        # 页缓存大小，负数表示KB（约20MB）
+    'mmap_size': 268435456,      # 内存映射读取（256MB）
+    'temp_store': 'MEMORY',      # 临时表和排序使用内存
+    'busy_timeout': DB_TIMEOUT * 1000,  # 锁等待时间（毫秒）
+    'analysis_limit': 400,       # ANALYZE / optimize 每个索引最多抽样的行数，统计信息近似即可
+}
+
+# 批量导入配置
+BULK_BATCH_SIZE = 500  # 每次 executemany 提交给SQLite的行数
+SQLITE_MAX_VARIABLES = 900  # 单条语句的参数个数上限（IN 查询按此分批）
+
+# 界面后台任务配置
+GUI_WORKER_THREADS = 4  # 执行数据库操作的工作线程数（应小于连接池大小）
+GUI_RESULT_POLL_INTERVAL = 50  # 主线程检查后台任务结果的间隔（毫秒）
 
 # 库存预警配置
 DEFAULT_MIN_STOCK = 10  # 默认最小库存预警值
+LOW_STOCK_PREVIEW_LIMIT = 5  # 系统概览中列出的库存不足配件数量
+
+# 列表分页配置
+ORDER_PAGE_SIZE = 200  # 订单列表每次加载的行数
+ORDER_MAX_LOADED_ROWS = 1000  # 订单列表控件中最多保留的行数
+
+# 搜索配置
+FULLTEXT_SEARCH_ENABLED = True  # 配件/客户搜索优先使用FTS5全文索引（不可用时自动改用LIKE）
+FULLTEXT_MIN_KEYWORD_LENGTH = 3  # trigram分词要求关键字至少3个字符，更短的关键字用LIKE
+PART_SEARCH_DEBOUNCE_MS = 250  # 配件搜索框停止输入多久后开始搜索（毫秒）
+PART_SEARCH_CACHE_SIZE = 32  # 缓存最近多少次配件搜索的结果
+
+# 导出配置
+EXPORT_FETCH_SIZE = 1000  # 导出时每次从游标读取的行数（fetchmany）
+EXPORT_PROGRESS_INTERVAL = 5000  # 导出时每写入多少行报告一次进度
+EXCEL_WIDTH_SAMPLE_ROWS = 200  # Excel导出时按前多少行估算列宽
+REPORT_EXPORT_WORKERS = 4  # 月末报表打包时同时生成的报表数（每个占用一个数据库连接）
 
 # 日期格式
 DATE_FORMAT = "%Y-%m-%d"
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 # 报表配置
-REPORT_DIR = PROJECT_ROOT / "reports"
-REPORT_DIR.mkdir(exist_ok=True)
+REPORT_DIR = PROJECT_ROOT / "reports"  # 目录在首次导出时创建
 
 # 备份配置
-BACKUP_DIR = PROJECT_ROOT / "backups"
-BACKUP_DIR.mkdir(exist_ok=True)
\ No newline at end of file
+BACKUP_DIR = PROJECT_ROOT / "backups"  # 目录在首次备份时创建
+BACKUP_PAGES_PER_STEP = 256  # 在线备份每步复制的页数（步与步之间其他连接可以读写）
+BACKUP_RETRY_SLEEP = 0.05  # 在线备份遇到数据库锁时的重试间隔（秒）
+BACKUP_COMPRESSION = 'zstd'  # 备份压缩格式：zstd（需安装zstandard，未安装时自动改用gzip）或 gzip
+BACKUP_FULL_INTERVAL_DAYS = 7  # 最近一次全量备份在多少天内时，新备份只保存变化的页（差异备份）
+BACKUP_DIFF_MAX_RATIO = 0.5  # 变化的页超过总页数的这一比例时改做全量备份
+BACKUP_KEEP_DAILY = 7  # 保留最近几天的备份（每天保留最新一份）
+BACKUP_KEEP_WEEKLY = 4  # 保留最近几周的备份（每周保留最新一份）
+BACKUP_AUTO_ENABLED = True  # 程序运行期间是否自动备份
+BACKUP_AUTO_INTERVAL = 24 * 3600  # 距最近一次备份多久后自动备份（秒）
+BACKUP_IDLE_SECONDS = 120  # 用户无键盘/鼠标操作多久后才开始自动备份（秒）
+BACKUP_STEP_DELAY = 0.02  # 自动备份期间用户有操作时，每步复制之间的暂停（秒）
+BACKUP_AUTO_RETRY_INTERVAL = 600  # 自动备份失败后多久重试（秒）
+BACKUP_SCHEDULER_CHECK_INTERVAL = 30  # 自动备份调度线程检查的间隔（秒）
+BACKUP_STATUS_REFRESH_MS = 1000  # 状态栏刷新自动备份状态的间隔（毫秒）
\ No newline at end of file
@@ -127,12 +127,13 @@ def create_demo_parts():
     ]
     
     print("正在创建演示配件数据...")
-    for part_data in demo_parts:
-        try:
-            inventory_service.add_part(part_data)
+    try:
+        result = inventory_service.bulk_add_parts(demo_parts)
+        for part_data in demo_parts:
             print(f"✓ 已添加配件: {part_data['part_name']}")
-        except Exception as e:
-            print(f"✗ 添加配件失败 {part_data['part_name']}: {e}")
+        print(f"  └─ 共 {result}")
+    except Exception as e:
+        print(f"✗ 添加配件失败: {e}")
 
 def create_demo_customers():
     """创建演示客户数据"""
@@ -197,12 +198,13 @@ def create_demo_customers():
     ]
     
     print("\n正在创建演示客户数据...")
-    for customer_data in demo_customers:
-        try:
-            order_service.add_customer(customer_data)
+    try:
+        result = order_service.bulk_add_customers(demo_customers)
+        for customer_data in demo_customers:
             print(f"✓ 已添加客户: {customer_data['customer_name']} ({customer_data['license_plate']})")
-        except Exception as e:
-            print(f"✗ 添加客户失败 {customer_data['customer_name']}: {e}")
+        print(f"  └─ 共 {result}")
+    except Exception as e:
+        print(f"✗ 添加客户失败: {e}")
 
 def create_demo_orders():
     """创建演示订单数据"""
@@ -8,6 +8,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from services.order_service import OrderService
 from models.customers import Customer
+from gui.task_executor import TaskExecutor
 
 class CustomersWindow:
     """客户管理窗口"""
@@ -16,6 +17,7 @@ class CustomersWindow:
         self.parent = parent
         self.order_service = OrderService()
         self.window = tk.Toplevel(parent) if parent else tk.Tk()
+        self.executor = TaskExecutor(self.window)
         self.setup_window()
         self.setup_widgets()
         self.load_customers()
@@ -156,55 +158,34 @@ class CustomersWindow:
     
     def load_customers(self):
         """加载客户列表"""
-        try:
-            # 清空现有数据
-            for item in self.customers_tree.get_children():
-                self.customers_tree.delete(item)
-            
-            # 获取客户数据
-            customers = self.order_service.get_all_customers()
-            
-            # 插入数据到树形控件
-            for customer in customers:
-                values = (
-                    customer.customer_id,
-                    customer.customer_name,
-                    customer.phone,
-                    customer.license_plate or '',
-                    customer.car_model or '',
-                    customer.created_at.strftime('%Y-%m-%d') if customer.created_at else ''
-                )
-                self.customers_tree.insert('', tk.END, values=values)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"加载客户列表失败: {e}")
+        self.executor.submit(self.order_service.get_all_customers,
+                             on_success=self.fill_customers_tree,
+                             error_message="加载客户列表失败", key='customers')
+    
+    def fill_customers_tree(self, customers):
+        """将客户插入树形控件"""
+        # 清空现有数据
+        for item in self.customers_tree.get_children():
+            self.customers_tree.delete(item)
+        
+        # 插入数据到树形控件
+        for customer in customers:
+            values = (
+                customer.customer_id,
+                customer.customer_name,
+                customer.phone,
+                customer.license_plate or '',
+                customer.car_model or '',
+                customer.created_at.strftime('%Y-%m-%d') if customer.created_at else ''
+            )
+            self.customers_tree.insert('', tk.END, values=values)
     
     def search_customers(self):
         """搜索客户"""
-        try:
-            keyword = self.search_var.get().strip()
-            
-            # 清空现有数据
-            for item in self.customers_tree.get_children():
-                self.customers_tree.delete(item)
-            
-            # 搜索客户
-            customers = self.order_service.search_customers(keyword)
-            
-            # 插入搜索结果
-            for customer in customers:
-                values = (
-                    customer.customer_id,
-                    customer.customer_name,
-                    customer.phone,
-                    customer.license_plate or '',
-                    customer.car_model or '',
-                    customer.created_at.strftime('%Y-%m-%d') if customer.created_at else ''
-                )
-                self.customers_tree.insert('', tk.END, values=values)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"搜索客户失败: {e}")
+        keyword = self.search_var.get().strip()
+        self.executor.submit(self.order_service.search_customers, keyword,
+                             on_success=self.fill_customers_tree,
+                             error_message="搜索客户失败", key='customers')
     
     def reset_search(self):
         """重置搜索"""
@@ -220,12 +201,14 @@ class CustomersWindow:
             
             # 获取完整的客户信息
             customer_id = values[0]
-            try:
-                customer = self.order_service.customer_dao.get_customer_by_id(customer_id)
+            
+            def show(customer):
                 if customer:
                     self.load_customer_to_form(customer)
-            except Exception as e:
-                messagebox.showerror("错误", f"加载客户详情失败: {e}")
+            
+            self.executor.submit(self.order_service.customer_dao.get_customer_by_id, customer_id,
+                                 on_success=show, error_message="加载客户详情失败",
+                                 key='customer_detail')
     
     def load_customer_to_form(self, customer):
         """将客户信息加载到表单"""
@@ -288,14 +271,15 @@ class CustomersWindow:
         if not self.validate_form():
             return
         
-        try:
-            customer_data = self.get_form_data()
-            self.order_service.add_customer(customer_data)
+        customer_data = self.get_form_data()
+        
+        def done(_):
             messagebox.showinfo("成功", "客户添加成功")
             self.load_customers()
             self.clear_form()
-        except Exception as e:
-            messagebox.showerror("错误", f"添加客户失败: {e}")
+        
+        self.executor.submit_write(self.order_service.add_customer, customer_data,
+                                   on_success=done, error_message="添加客户失败")
     
     def update_customer(self):
         """修改客户"""
@@ -306,14 +290,15 @@ class CustomersWindow:
         if not self.validate_form():
             return
         
-        try:
-            customer_data = self.get_form_data()
-            customer_data['customer_id'] = self.current_customer_id
-            self.order_service.update_customer(customer_data)
+        customer_data = self.get_form_data()
+        customer_data['customer_id'] = self.current_customer_id
+        
+        def done(_):
             messagebox.showinfo("成功", "客户修改成功")
             self.load_customers()
-        except Exception as e:
-            messagebox.showerror("错误", f"修改客户失败: {e}")
+        
+        self.executor.submit_write(self.order_service.update_customer, customer_data,
+                                   on_success=done, error_message="修改客户失败")
     
     def delete_customer(self):
         """删除客户"""
@@ -322,13 +307,13 @@ class CustomersWindow:
             return
         
         if messagebox.askyesno("确认", "确定要删除选中的客户吗？\n注意：删除客户将同时删除其所有维修记录！"):
-            try:
-                self.order_service.delete_customer(self.current_customer_id)
+            def done(_):
                 messagebox.showinfo("成功", "客户删除成功")
                 self.load_customers()
                 self.clear_form()
-            except Exception as e:
-                messagebox.showerror("错误", f"删除客户失败: {e}")
+            
+            self.executor.submit_write(self.order_service.delete_customer, self.current_customer_id,
+                                       on_success=done, error_message="删除客户失败")
     
     def view_repair_history(self):
         """查看维修历史"""
@@ -336,54 +321,54 @@ class CustomersWindow:
             messagebox.showerror("错误", "请先选择客户")
             return
         
-        try:
-            # 获取客户维修历史
-            history = self.order_service.get_customer_repair_history(self.current_customer_id)
-            
-            # 创建历史窗口
-            history_window = tk.Toplevel(self.window)
-            history_window.title(f"维修历史 - {self.name_var.get()}")
-            history_window.geometry("800x400")
-            history_window.transient(self.window)
-            history_window.grab_set()
-            
-            # 创建树形控件显示历史记录
-            frame = ttk.Frame(history_window, padding="10")
-            frame.pack(fill=tk.BOTH, expand=True)
-            
-            columns = ('订单号', '维修日期', '故障描述', '维修内容', '总费用', '状态')
-            history_tree = ttk.Treeview(frame, columns=columns, show='headings')
-            
-            # 设置列标题和宽度
-            column_widths = {'订单号': 80, '维修日期': 100, '故障描述': 150, '维修内容': 150, '总费用': 80, '状态': 80}
-            for col in columns:
-                history_tree.heading(col, text=col)
-                history_tree.column(col, width=column_widths.get(col, 100))
-            
-            # 添加滚动条
-            scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=history_tree.yview)
-            history_tree.configure(yscrollcommand=scrollbar.set)
-            
-            history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            
-            # 插入历史数据
-            for order in history:
-                values = (
-                    order.order_number,
-                    order.repair_date.strftime('%Y-%m-%d') if order.repair_date else '',
-                    order.fault_description or '',
-                    order.repair_content or '',
-                    f"{order.total_amount:.2f}",
-                    order.status
-                )
-                history_tree.insert('', tk.END, values=values)
-            
-            if not history:
-                ttk.Label(frame, text="该客户暂无维修记录").pack(pady=20)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"获取维修历史失败: {e}")
+        customer_name = self.name_var.get()
+        self.executor.submit(self.order_service.get_customer_repair_history, self.current_customer_id,
+                             on_success=lambda history: self.show_repair_history(customer_name, history),
+                             error_message="获取维修历史失败", key='history')
+    
+    def show_repair_history(self, customer_name, history):
+        """显示维修历史窗口"""
+        # 创建历史窗口
+        history_window = tk.Toplevel(self.window)
+        history_window.title(f"维修历史 - {customer_name}")
+        history_window.geometry("800x400")
+        history_window.transient(self.window)
+        history_window.grab_set()
+        
+        # 创建树形控件显示历史记录
+        frame = ttk.Frame(history_window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        columns = ('订单号', '维修日期', '故障描述', '维修内容', '总费用', '状态')
+        history_tree = ttk.Treeview(frame, columns=columns, show='headings')
+        
+        # 设置列标题和宽度
+        column_widths = {'订单号': 80, '维修日期': 100, '故障描述': 150, '维修内容': 150, '总费用': 80, '状态': 80}
+        for col in columns:
+            history_tree.heading(col, text=col)
+            history_tree.column(col, width=column_widths.get(col, 100))
+        
+        # 添加滚动条
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=history_tree.yview)
+        history_tree.configure(yscrollcommand=scrollbar.set)
+        
+        history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # 插入历史数据
+        for order in history:
+            values = (
+                order.order_number,
+                order.repair_date_text,
+                order.fault_description or '',
+                order.repair_content or '',
+                f"{order.total_amount:.2f}",
+                order.status
+            )
+            history_tree.insert('', tk.END, values=values)
+        
+        if not history:
+            ttk.Label(frame, text="该客户暂无维修记录").pack(pady=20)
 
 # 测试代码
 if __name__ == "__main__":
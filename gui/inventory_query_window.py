@@ -7,12 +7,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from services.inventory_service import InventoryService
+from gui.task_executor import TaskExecutor
 
 class InventoryQueryWindow:
     """库存查询窗口类"""
     
     def __init__(self, parent):
         self.parent = parent
+        self.current_parts = []  # 当前列表中的配件
         self.inventory_service = InventoryService()
         self.setup_window()
         self.setup_widgets()
@@ -28,6 +30,8 @@ class InventoryQueryWindow:
         # 居中显示
         self.window.transient(self.parent)
         self.window.grab_set()
+        
+        self.executor = TaskExecutor(self.window)
     
     def setup_widgets(self):
         """设置界面控件"""
@@ -144,24 +148,29 @@ class InventoryQueryWindow:
     
     def load_categories(self):
         """加载配件类别"""
-        try:
-            categories = self.inventory_service.get_part_categories()
-            category_list = ["全部"] + categories
-            self.category_combo['values'] = category_list
+        def fill(categories):
+            self.category_combo['values'] = ["全部"] + categories
             self.category_var.set("全部")
-        except Exception as e:
-            messagebox.showerror("错误", f"加载类别失败: {e}")
+        
+        self.executor.submit(self.inventory_service.get_part_categories,
+                             on_success=fill, error_message="加载类别失败", key='categories')
     
     def load_inventory(self, parts=None):
         """加载库存数据"""
+        if parts is None:
+            # 获取库存数据
+            self.executor.submit(self.inventory_service.get_all_parts,
+                                 on_success=self.load_inventory,
+                                 error_message="加载库存数据失败", key='inventory')
+            return
+        
         try:
             # 清空现有记录
             for item in self.inventory_tree.get_children():
                 self.inventory_tree.delete(item)
             
-            # 获取库存数据
-            if parts is None:
-                parts = self.inventory_service.get_all_parts()
+            # 保留当前结果供导出使用
+            self.current_parts = parts
             
             total_parts = 0
             total_value = 0
@@ -175,14 +184,11 @@ class InventoryQueryWindow:
                 total_parts += 1
                 
                 # 判断库存状态
-                if part.stock_quantity == 0:
-                    status = "零库存"
+                status = self.stock_status(part)
+                if status == "零库存":
                     zero_stock_count += 1
-                elif part.stock_quantity <= part.min_stock:
-                    status = "库存不足"
+                elif status == "库存不足":
                     low_stock_count += 1
-                else:
-                    status = "正常"
                 
                 # 设置行颜色
                 tags = ()
@@ -220,13 +226,22 @@ class InventoryQueryWindow:
         except Exception as e:
             messagebox.showerror("错误", f"加载库存数据失败: {e}")
     
+    @staticmethod
+    def stock_status(part):
+        """配件的库存状态"""
+        if part.stock_quantity == 0:
+            return "零库存"
+        elif part.stock_quantity <= part.min_stock:
+            return "库存不足"
+        return "正常"
+    
     def search_inventory(self):
         """搜索库存"""
-        try:
-            keyword = self.keyword_var.get().strip()
-            category = self.category_var.get() if self.category_var.get() != "全部" else ""
-            stock_status = self.stock_status_var.get()
-            
+        keyword = self.keyword_var.get().strip()
+        category = self.category_var.get() if self.category_var.get() != "全部" else ""
+        stock_status = self.stock_status_var.get()
+        
+        def search():
             # 搜索配件
             parts = self.inventory_service.search_parts(keyword, category)
             
@@ -241,12 +256,11 @@ class InventoryQueryWindow:
                     elif stock_status == "正常" and part.stock_quantity > part.min_stock:
                         filtered_parts.append(part)
                 parts = filtered_parts
-            
-            # 加载搜索结果
-            self.load_inventory(parts)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"搜索失败: {e}")
+            return parts
+        
+        # 加载搜索结果
+        self.executor.submit(search, on_success=self.load_inventory,
+                             error_message="搜索失败", key='inventory')
     
     def reset_search(self):
         """重置搜索条件"""
@@ -278,31 +292,28 @@ class InventoryQueryWindow:
             messagebox.showinfo("配件详情", detail_text)
     
     def export_to_excel(self):
-        """导出到Excel"""
-        try:
-            from tkinter import filedialog
-            from utils.export_utils import ExportUtils
-            
-            # 选择保存路径
-            file_path = filedialog.asksaveasfilename(
-                title="导出库存报表",
-                defaultextension=".xlsx",
-                filetypes=[("Excel文件", "*.xlsx"), ("所有文件", "*.*")]
-            )
-            
-            if file_path:
-                # 获取当前显示的数据
-                data = []
-                for item in self.inventory_tree.get_children():
-                    values = self.inventory_tree.item(item)['values']
-                    data.append(values)
-                
-                # 导出数据
-                headers = ['配件编号', '配件名称', '类别', '库存数量', '最低库存', 
-                          '进货价', '销售价', '库存价值', '状态']
-                
-                ExportUtils.export_to_excel(data, headers, file_path, "库存报表")
-                messagebox.showinfo("成功", f"库存报表已导出到: {file_path}")
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"导出失败: {e}")
\ No newline at end of file
+        """导出当前列表中的配件到Excel"""
+        from tkinter import filedialog
+        from utils.export_utils import ExportUtils
+        
+        # 选择保存路径
+        file_path = filedialog.asksaveasfilename(
+            title="导出库存报表",
+            defaultextension=".xlsx",
+            filetypes=[("Excel文件", "*.xlsx"), ("所有文件", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        headers = ['配件编号', '配件名称', '类别', '库存数量', '最低库存', 
+                  '进货价', '销售价', '库存价值', '状态']
+        # 金额以数值写入，便于在Excel中计算
+        rows = ((part.part_code, part.part_name, part.category, part.stock_quantity,
+                 part.min_stock, part.purchase_price, part.selling_price,
+                 part.stock_quantity * part.purchase_price, self.stock_status(part))
+                for part in self.current_parts)
+        
+        self.executor.submit(ExportUtils.stream_to_excel, rows, file_path, headers, "库存报表",
+                             on_success=lambda path: messagebox.showinfo(
+                                 "成功", f"库存报表已导出到: {path}"),
+                             error_message="导出失败", key='export')
@@ -4,13 +4,18 @@
 主窗口界面
 """
 
+import logging
 import tkinter as tk
 from tkinter import ttk, messagebox, Menu
 from datetime import date, datetime
 from services.inventory_service import InventoryService
 from services.order_service import OrderService
 from services.report_service import ReportService
-from config.settings import APP_NAME, APP_VERSION, WINDOW_WIDTH, WINDOW_HEIGHT
+from services.backup_service import BackupScheduler
+from gui.task_executor import TaskExecutor
+from models.database import COUNTED_TABLES
+from config.settings import (APP_NAME, APP_VERSION, WINDOW_WIDTH, WINDOW_HEIGHT, BACKUP_DIR,
+                             BACKUP_AUTO_ENABLED, BACKUP_STATUS_REFRESH_MS, DB_OPTIMIZE_INTERVAL)
 
 class MainWindow:
     """主窗口类"""
@@ -40,6 +45,8 @@ class MainWindow:
         self.inventory_service = InventoryService()
         self.order_service = OrderService()
         self.report_service = ReportService()
+        self.executor = TaskExecutor(self.root)
+        self.backup_scheduler = BackupScheduler() if BACKUP_AUTO_ENABLED else None
     
     def setup_menu(self):
         """设置菜单栏"""
@@ -51,6 +58,7 @@ class MainWindow:
         menubar.add_cascade(label="文件", menu=file_menu)
         file_menu.add_command(label="数据备份", command=self.backup_data)
         file_menu.add_command(label="数据恢复", command=self.restore_data)
+        file_menu.add_command(label="数据库信息", command=self.show_database_info)
         file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.root.quit)
         
@@ -74,6 +82,8 @@ class MainWindow:
         report_menu.add_command(label="销售报表", command=self.show_sales_report)
         report_menu.add_command(label="库存报表", command=self.show_inventory_report)
         report_menu.add_command(label="客户分析", command=self.show_customer_analysis)
+        report_menu.add_separator()
+        report_menu.add_command(label="导出月末报表", command=self.export_month_end_reports)
         
         # 帮助菜单
         help_menu = Menu(menubar, tearoff=0)
@@ -130,29 +140,54 @@ class MainWindow:
         self.info_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
-        # 状态栏
+        # 状态栏（右侧显示自动备份状态）
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_frame.columnconfigure(0, weight=1)
+        
         self.status_var = tk.StringVar()
         self.status_var.set("就绪")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN)
-        status_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN)
+        status_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.executor.busy_callbacks.append(self.on_busy_change)
+        
+        self.backup_status_var = tk.StringVar()
+        backup_status_bar = ttk.Label(status_frame, textvariable=self.backup_status_var,
+                                      relief=tk.SUNKEN, width=28)
+        backup_status_bar.grid(row=0, column=1, sticky=(tk.W, tk.E))
         
         # 加载系统信息
         self.load_system_info()
+        
+        # 启动自动备份
+        self.start_backup_scheduler()
+        
+        # 定期更新查询统计信息
+        self.root.after(DB_OPTIMIZE_INTERVAL * 1000, self.optimize_database)
     
     def load_system_info(self):
         """加载系统信息"""
-        try:
-            # 获取库存统计
-            inventory_stats = self.inventory_service.get_inventory_statistics()
-            
-            # 获取今日订单统计
-            today_stats = self.order_service.get_order_statistics(
-                start_date=date.today(),
-                end_date=date.today()
-            )
-            
-            # 构建信息文本
-            info_text = f"""系统概览 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        self.executor.submit(self.collect_system_info, on_success=self.show_system_info,
+                             error_message="加载系统信息失败", key='system_info')
+    
+    def collect_system_info(self):
+        """查询系统概览数据（在后台线程执行）"""
+        # 获取库存统计
+        inventory_stats = self.inventory_service.get_inventory_statistics()
+        
+        # 获取今日订单统计
+        today_stats = self.order_service.get_order_statistics(
+            start_date=date.today(),
+            end_date=date.today()
+        )
+        return inventory_stats, today_stats
+    
+    def show_system_info(self, stats):
+        """显示系统信息"""
+        inventory_stats, today_stats = stats
+        
+        # 构建信息文本
+        info_text = f"""系统概览 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 === 库存信息 ===
 配件总数: {inventory_stats['total_parts']} 种
@@ -160,30 +195,58 @@ class MainWindow:
 库存不足: {inventory_stats['low_stock_count']} 种
 
 === 今日业务 ===
-维修订单: {today_stats['total_orders']} 单
-已完成: {today_stats['completed_orders']} 单
-今日收入: ¥{today_stats['total_revenue']:.2f}
+维修订单: {today_stats.total_orders} 单
+已完成: {today_stats.completed_orders} 单
+今日收入: ¥{today_stats.total_revenue:.2f}
 
 === 库存预警 ===
 """
-            
-            # 添加库存不足的配件信息
-            if inventory_stats['low_stock_parts']:
-                for part in inventory_stats['low_stock_parts'][:5]:  # 只显示前5个
-                    info_text += f"• {part.part_name} (库存: {part.stock_quantity})\n"
-                if len(inventory_stats['low_stock_parts']) > 5:
-                    info_text += f"... 还有 {len(inventory_stats['low_stock_parts']) - 5} 种配件库存不足\n"
-            else:
-                info_text += "暂无库存不足的配件\n"
-            
-            # 更新信息显示
-            self.info_text.config(state=tk.NORMAL)
-            self.info_text.delete(1.0, tk.END)
-            self.info_text.insert(1.0, info_text)
-            self.info_text.config(state=tk.DISABLED)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"加载系统信息失败: {e}")
+        
+        # 添加库存不足的配件信息
+        if inventory_stats['low_stock_parts']:
+            for part in inventory_stats['low_stock_parts']:  # 只包含库存最少的几种
+                info_text += f"• {part.part_name} (库存: {part.stock_quantity})\n"
+            remaining = inventory_stats['low_stock_count'] - len(inventory_stats['low_stock_parts'])
+            if remaining > 0:
+                info_text += f"... 还有 {remaining} 种配件库存不足\n"
+        else:
+            info_text += "暂无库存不足的配件\n"
+        
+        # 更新信息显示
+        self.info_text.config(state=tk.NORMAL)
+        self.info_text.delete(1.0, tk.END)
+        self.info_text.insert(1.0, info_text)
+        self.info_text.config(state=tk.DISABLED)
+    
+    def on_busy_change(self, is_busy):
+        """后台任务忙碌状态变化"""
+        self.status_var.set("正在处理..." if is_busy else "就绪")
+    
+    def start_backup_scheduler(self):
+        """启动自动备份，键盘和鼠标操作用于判断用户是否空闲"""
+        if self.backup_scheduler is None:
+            return
+        self.root.bind_all('<KeyPress>', self.on_user_activity, add='+')
+        self.root.bind_all('<ButtonPress>', self.on_user_activity, add='+')
+        self.backup_scheduler.start()
+        self.refresh_backup_status()
+    
+    def on_user_activity(self, event):
+        """记录用户操作"""
+        self.backup_scheduler.notify_activity()
+    
+    def refresh_backup_status(self):
+        """定时在状态栏显示自动备份状态（调度线程只写状态文字，由主线程读取）"""
+        self.backup_status_var.set(self.backup_scheduler.status)
+        self.root.after(BACKUP_STATUS_REFRESH_MS, self.refresh_backup_status)
+    
+    def optimize_database(self):
+        """在后台执行 PRAGMA optimize，失败只记录日志"""
+        from utils.database_utils import DatabaseUtils
+        
+        self.executor.submit(DatabaseUtils.optimize_database,
+                             on_error=lambda e: logging.warning(str(e)), key='optimize')
+        self.root.after(DB_OPTIMIZE_INTERVAL * 1000, self.optimize_database)
     
     def update_status(self, message):
         """更新状态栏"""
@@ -241,14 +304,9 @@ class MainWindow:
     
     def show_sales_report(self):
         """显示销售报表"""
-        try:
-            # 获取本月销售数据
-            from datetime import datetime, date
-            current_date = date.today()
-            monthly_report = self.report_service.get_monthly_revenue_report(
-                current_date.year, current_date.month
-            )
-            
+        current_date = date.today()
+        
+        def show(monthly_report):
             # 计算平均订单金额
             avg_order_amount = (monthly_report['total_revenue'] / monthly_report['total_orders']) if monthly_report['total_orders'] > 0 else 0
             
@@ -260,14 +318,15 @@ class MainWindow:
 配件费: ¥{monthly_report['total_parts']:.2f}
 平均订单金额: ¥{avg_order_amount:.2f}"""
             messagebox.showinfo("销售报表", report_text)
-        except Exception as e:
-            messagebox.showerror("错误", f"生成销售报表失败: {e}")
+        
+        # 获取本月销售数据
+        self.executor.submit(self.report_service.get_monthly_revenue_report,
+                             current_date.year, current_date.month,
+                             on_success=show, error_message="生成销售报表失败")
     
     def show_inventory_report(self):
         """显示库存报表"""
-        try:
-            inventory_data = self.report_service.get_inventory_report()
-            
+        def show(inventory_data):
             # 统计库存信息
             total_parts = len(inventory_data)
             total_value = sum(item['inventory_value'] or 0 for item in inventory_data)
@@ -281,14 +340,13 @@ class MainWindow:
 低库存配件: {low_stock_count} 种
 零库存配件: {zero_stock_count} 种"""
             messagebox.showinfo("库存报表", report_text)
-        except Exception as e:
-            messagebox.showerror("错误", f"生成库存报表失败: {e}")
+        
+        self.executor.submit(self.report_service.get_inventory_report,
+                             on_success=show, error_message="生成库存报表失败")
     
     def show_customer_analysis(self):
         """显示客户分析"""
-        try:
-            customer_data = self.report_service.get_customer_analysis_report()
-            
+        def show(customer_data):
             # 统计客户信息
             total_customers = len(customer_data)
             active_customers = sum(1 for customer in customer_data if customer['order_count'] > 0)
@@ -296,7 +354,7 @@ class MainWindow:
             avg_spending = total_spent / active_customers if active_customers > 0 else 0
             
             # 计算新增客户（最近30天有订单的客户）
-            from datetime import date, timedelta
+            from datetime import timedelta
             recent_date = date.today() - timedelta(days=30)
             new_customers = sum(1 for customer in customer_data 
                               if customer['last_visit_date'] and 
@@ -309,35 +367,96 @@ class MainWindow:
 新增客户: {new_customers} 人
 平均消费: ¥{avg_spending:.2f}"""
             messagebox.showinfo("客户分析", report_text)
-        except Exception as e:
-            messagebox.showerror("错误", f"生成客户分析失败: {e}")
+        
+        self.executor.submit(self.report_service.get_customer_analysis_report,
+                             on_success=show, error_message="生成客户分析失败")
+    
+    def export_month_end_reports(self):
+        """导出本月月末报表包"""
+        def done(result):
+            zip_path, timings = result
+            lines = [f"{timing.name}: {timing.rows} 行，"
+                     f"{timing.query_seconds + timing.write_seconds:.2f} 秒" for timing in timings]
+            self.update_status("就绪")
+            messagebox.showinfo("成功", f"月末报表已导出到:\n{zip_path}\n\n" + "\n".join(lines))
+        
+        def failed(error):
+            self.update_status("就绪")
+            messagebox.showerror("错误", f"导出月末报表失败: {error}")
+        
+        self.update_status("正在导出月末报表...")
+        self.executor.submit(self.report_service.export_month_end_bundle,
+                             on_success=done, on_error=failed, key='month_end')
     
     def backup_data(self):
         """备份数据"""
-        try:
-            from utils.database_utils import DatabaseUtils
-            backup_file = DatabaseUtils.backup_database()
-            messagebox.showinfo("成功", f"数据备份成功！\n备份文件：{backup_file}")
-        except Exception as e:
-            messagebox.showerror("错误", f"数据备份失败: {e}")
+        from utils.database_utils import DatabaseUtils
+        
+        self.update_status("正在备份数据...")
+        self.executor.submit(
+            DatabaseUtils.backup_database,
+            progress_callback=self.post_progress("正在备份数据"),
+            on_success=lambda backup_file: messagebox.showinfo("成功", f"数据备份成功！\n备份文件：{backup_file}"),
+            error_message="数据备份失败")
+    
+    def post_progress(self, action):
+        """返回在工作线程中调用的进度回调 callback(已完成, 总数)，在状态栏显示百分比"""
+        def report(done, total):
+            if total:
+                self.executor.post(self.status_var.set, f"{action}... {done * 100 // total}%")
+        return report
     
     def restore_data(self):
         """恢复数据"""
-        try:
-            from tkinter import filedialog
-            from utils.database_utils import DatabaseUtils
-            
-            backup_file = filedialog.askopenfilename(
-                title="选择备份文件",
-                filetypes=[("数据库文件", "*.db"), ("所有文件", "*.*")]
-            )
-            
-            if backup_file:
-                if messagebox.askyesno("确认", "恢复数据将覆盖当前数据，确定继续吗？"):
-                    DatabaseUtils.restore_database(backup_file)
-                    messagebox.showinfo("成功", "数据恢复成功！请重启应用程序。")
-        except Exception as e:
-            messagebox.showerror("错误", f"数据恢复失败: {e}")
+        from tkinter import filedialog
+        from utils.database_utils import DatabaseUtils
+        
+        backup_file = filedialog.askopenfilename(
+            title="选择备份文件",
+            initialdir=str(BACKUP_DIR),
+            filetypes=[("备份文件", "*.db.gz *.db.zst *.diff.gz *.diff.zst *.db"), ("所有文件", "*.*")]
+        )
+        
+        if backup_file:
+            if messagebox.askyesno("确认", "恢复数据将覆盖当前数据，确定继续吗？"):
+                def done(current_backup):
+                    self.load_system_info()
+                    messagebox.showinfo("成功", "数据恢复成功！已打开的窗口请刷新后查看。\n"
+                                        f"恢复前的数据已备份到：{current_backup}")
+                
+                self.update_status("正在恢复数据...")
+                self.executor.submit(
+                    DatabaseUtils.restore_database, backup_file,
+                    progress_callback=self.post_progress("正在恢复数据"),
+                    on_success=done, error_message="数据恢复失败")
+    
+    def show_database_info(self, with_sizes=False):
+        """显示数据库信息
+        
+        默认只读取统计表中的行数，不扫描整表；各表占用空间需要读取全部数据页，
+        只在用户确认计算后统计。
+        """
+        from utils.database_utils import DatabaseUtils
+        
+        def show(info):
+            sizes = info['table_sizes'] or {}
+            lines = []
+            for table in COUNTED_TABLES:
+                count = info['table_counts'].get(table)
+                line = f"{table}: {count if count is not None else '未知'} 行"
+                if table in sizes:
+                    line += f"，{sizes[table] / 1024 / 1024:.1f} MB"
+                lines.append(line)
+            info_text = (f"数据库大小: {info['size'] / 1024 / 1024:.1f} MB "
+                         f"（{info['page_count']} 页 × {info['page_size']} 字节）\n\n" + "\n".join(lines))
+            if with_sizes:
+                messagebox.showinfo("数据库信息", info_text)
+            elif messagebox.askyesno("数据库信息", info_text + "\n\n是否计算各表占用空间？"
+                                     "（需要读取整个数据库文件，数据量大时较慢）"):
+                self.show_database_info(with_sizes=True)
+        
+        self.executor.submit(DatabaseUtils.get_database_info, with_sizes=with_sizes,
+                             on_success=show, error_message="获取数据库信息失败", key='database_info')
     
     def show_about(self):
         """显示关于对话框"""
@@ -364,4 +483,8 @@ class MainWindow:
             self.root.quit()
         except Exception as e:
             messagebox.showerror("错误", f"程序运行出错: {e}")
-            self.root.quit()
\ No newline at end of file
+            self.root.quit()
+        finally:
+            # 等待自动备份线程结束（进行中的备份会中止），之后才能关闭连接池
+            if self.backup_scheduler is not None:
+                self.backup_scheduler.stop()
\ No newline at end of file
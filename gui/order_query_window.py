@@ -8,6 +8,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import date, datetime, timedelta
 from services.order_service import OrderService
+from config.settings import ORDER_PAGE_SIZE, ORDER_MAX_LOADED_ROWS
+from gui.task_executor import TaskExecutor
 
 class OrderQueryWindow:
     """订单查询窗口类"""
@@ -15,6 +17,12 @@ class OrderQueryWindow:
     def __init__(self, parent):
         self.parent = parent
         self.order_service = OrderService()
+        # 分页状态：当前过滤条件、控件中已加载的行、两端是否还有数据
+        self.filters = {}
+        self.loaded_rows = []
+        self.has_more_before = False
+        self.has_more_after = False
+        self.page_loading = False
         self.setup_window()
         self.setup_widgets()
         self.load_data()
@@ -29,6 +37,8 @@ class OrderQueryWindow:
         # 居中显示
         self.window.transient(self.parent)
         self.window.grab_set()
+        
+        self.executor = TaskExecutor(self.window)
     
     def setup_widgets(self):
         """设置界面控件"""
@@ -135,12 +145,17 @@ class OrderQueryWindow:
         self.orders_tree.column('status', width=80)
         self.orders_tree.column('technician', width=80)
         
-        # 添加滚动条
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.orders_tree.yview)
-        self.orders_tree.configure(yscrollcommand=scrollbar.set)
+        # 添加滚动条（滚动到两端时按需加载下一页/上一页）
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.orders_tree.yview)
+        self.orders_tree.configure(yscrollcommand=self.on_tree_scroll)
         
         self.orders_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        # 设置行颜色
+        self.orders_tree.tag_configure('completed', background='#e8f5e8')
+        self.orders_tree.tag_configure('cancelled', background='#ffeeee')
+        self.orders_tree.tag_configure('in_progress', background='#fff8dc')
         
         # 统计信息区域
         stats_frame = ttk.LabelFrame(list_frame, text="统计信息", padding="10")
@@ -161,11 +176,19 @@ class OrderQueryWindow:
         export_btn = ttk.Button(bottom_frame, text="导出Excel", command=self.export_to_excel)
         export_btn.grid(row=0, column=1, padx=(0, 10))
         
+        export_csv_btn = ttk.Button(bottom_frame, text="导出CSV/JSON", command=self.export_to_file)
+        export_csv_btn.grid(row=0, column=2, padx=(0, 10))
+        
         refresh_btn = ttk.Button(bottom_frame, text="刷新", command=self.load_data)
-        refresh_btn.grid(row=0, column=2, padx=(0, 10))
+        refresh_btn.grid(row=0, column=3, padx=(0, 10))
         
         close_btn = ttk.Button(bottom_frame, text="关闭", command=self.window.destroy)
-        close_btn.grid(row=0, column=3)
+        close_btn.grid(row=0, column=4)
+        
+        # 导出进度
+        self.export_var = tk.StringVar()
+        export_label = ttk.Label(bottom_frame, textvariable=self.export_var)
+        export_label.grid(row=1, column=0, columnspan=5, pady=(5, 0))
         
         # 绑定双击事件
         self.orders_tree.bind('<Double-1>', self.on_item_double_click)
@@ -215,99 +238,173 @@ class OrderQueryWindow:
                     messagebox.showwarning("警告", "结束日期格式不正确，请使用 YYYY-MM-DD 格式")
                     return
             
-            # 搜索订单
-            orders = self.order_service.search_repair_orders(
-                customer_name=customer_name,
-                start_date=start_date,
-                end_date=end_date,
-                status=status
-            )
+            # 车牌号、技师也在数据库中过滤
+            self.filters = {
+                'customer_name': customer_name,
+                'start_date': start_date,
+                'end_date': end_date,
+                'status': status,
+                'vehicle_number': vehicle_number,
+                'technician': technician
+            }
             
-            # 根据车牌号和技师进一步筛选
-            if vehicle_number or technician:
-                filtered_orders = []
-                for order in orders:
-                    if vehicle_number and vehicle_number.lower() not in order.vehicle_number.lower():
-                        continue
-                    if technician and technician.lower() not in order.technician.lower():
-                        continue
-                    filtered_orders.append(order)
-                orders = filtered_orders
-            
-            # 加载搜索结果
-            self.load_orders(orders)
+            # 加载第一页和统计信息
+            self.load_orders()
             
         except Exception as e:
             messagebox.showerror("错误", f"搜索失败: {e}")
     
-    def load_orders(self, orders):
-        """加载订单数据"""
+    def load_orders(self):
+        """按当前条件重新加载订单列表的第一页"""
+        # 放弃尚未返回的翻页请求
+        self.executor.cancel('page')
+        self.page_loading = False
+        filters = dict(self.filters)
+        self.executor.submit(self.order_service.get_order_list, limit=ORDER_PAGE_SIZE, **filters,
+                             on_success=self.show_first_page,
+                             error_message="加载订单数据失败", key='orders')
+        self.update_statistics()
+    
+    def show_first_page(self, rows):
+        """显示第一页订单"""
+        # 清空现有记录
+        for item in self.orders_tree.get_children():
+            self.orders_tree.delete(item)
+        
+        self.has_more_before = False
+        self.has_more_after = len(rows) == ORDER_PAGE_SIZE
+        for row in rows:
+            self.insert_order_row(row)
+        self.loaded_rows = rows
+        self.orders_tree.yview_moveto(0)
+    
+    def insert_order_row(self, order, index='end'):
+        """插入一行订单"""
+        # 设置行颜色
+        if order.status == "已完成":
+            tags = ('completed',)
+        elif order.status == "已取消":
+            tags = ('cancelled',)
+        else:
+            tags = ('in_progress',)
+        
+        self.orders_tree.insert('', index, iid=str(order.order_id), values=(
+            order.order_number,
+            order.customer_name or "未知客户",
+            order.vehicle_number or '',
+            order.repair_date_text,
+            self.shorten(order.fault_description or '', 30),
+            f"¥{order.total_amount:.2f}",
+            order.status,
+            order.technician or ''
+        ), tags=tags)
+    
+    def on_tree_scroll(self, first, last):
+        """列表滚动回调：接近底部加载下一页，接近顶部加载上一页"""
+        self.scrollbar.set(first, last)
+        if self.page_loading:
+            return
+        if float(last) >= 0.95 and self.has_more_after:
+            self.page_loading = True
+            self.window.after_idle(self.load_next_page)
+        elif float(first) <= 0.05 and self.has_more_before:
+            self.page_loading = True
+            self.window.after_idle(self.load_previous_page)
+    
+    def on_page_error(self, error):
+        """翻页失败"""
+        self.page_loading = False
+        messagebox.showerror("错误", f"加载订单数据失败: {error}", parent=self.window)
+    
+    def load_next_page(self):
+        """在后台查询下一页"""
+        if not self.loaded_rows:
+            self.page_loading = False
+            return
+        self.executor.submit(self.order_service.get_order_list, limit=ORDER_PAGE_SIZE,
+                             after=self.loaded_rows[-1].sort_key, **dict(self.filters),
+                             on_success=self.append_page, on_error=self.on_page_error, key='page')
+    
+    def append_page(self, rows):
+        """追加下一页，超出保留行数时移除顶部的行"""
         try:
-            # 清空现有记录
-            for item in self.orders_tree.get_children():
-                self.orders_tree.delete(item)
-            
-            # 获取客户信息映射
-            customers = self.order_service.get_all_customers()
-            customer_map = {customer.customer_id: customer.customer_name for customer in customers}
-            
-            total_orders = 0
-            completed_orders = 0
-            total_amount = 0
-            total_labor_cost = 0
-            total_parts_cost = 0
-            
-            for order in orders:
-                # 获取客户姓名
-                customer_name = customer_map.get(order.customer_id, "未知客户")
-                
-                # 设置行颜色
-                tags = ()
-                if order.status == "已完成":
-                    tags = ('completed',)
-                    completed_orders += 1
-                    total_amount += order.total_amount
-                    total_labor_cost += order.labor_cost
-                    total_parts_cost += order.parts_cost
-                elif order.status == "已取消":
-                    tags = ('cancelled',)
-                else:
-                    tags = ('in_progress',)
-                
-                total_orders += 1
-                
-                # 插入数据
-                self.orders_tree.insert('', 'end', values=(
-                    order.order_number,
-                    customer_name,
-                    order.vehicle_number,
-                    order.repair_date.strftime('%Y-%m-%d'),
-                    order.fault_description[:30] + "..." if len(order.fault_description) > 30 else order.fault_description,
-                    f"¥{order.total_amount:.2f}",
-                    order.status,
-                    order.technician
-                ), tags=tags)
-            
-            # 设置行颜色
-            self.orders_tree.tag_configure('completed', background='#e8f5e8')
-            self.orders_tree.tag_configure('cancelled', background='#ffeeee')
-            self.orders_tree.tag_configure('in_progress', background='#fff8dc')
-            
-            # 更新统计信息
-            in_progress_orders = total_orders - completed_orders - len([o for o in orders if o.status == "已取消"])
-            cancelled_orders = len([o for o in orders if o.status == "已取消"])
+            self.has_more_after = len(rows) == ORDER_PAGE_SIZE
+            if not rows:
+                return
             
-            stats_text = (f"订单总数: {total_orders} | "
-                         f"进行中: {in_progress_orders} | "
-                         f"已完成: {completed_orders} | "
-                         f"已取消: {cancelled_orders} | "
-                         f"总收入: ¥{total_amount:.2f} | "
-                         f"工时费: ¥{total_labor_cost:.2f} | "
-                         f"配件费: ¥{total_parts_cost:.2f}")
-            self.stats_var.set(stats_text)
+            top_index = self.orders_tree.yview()[0] * len(self.loaded_rows)
+            for row in rows:
+                self.insert_order_row(row)
+            self.loaded_rows.extend(rows)
+            
+            overflow = len(self.loaded_rows) - ORDER_MAX_LOADED_ROWS
+            if overflow > 0:
+                self.orders_tree.delete(*[str(row.order_id) for row in self.loaded_rows[:overflow]])
+                del self.loaded_rows[:overflow]
+                self.has_more_before = True
+                # 保持当前可见的行不动
+                self.orders_tree.yview_moveto(max(top_index - overflow, 0) / len(self.loaded_rows))
+        finally:
+            self.page_loading = False
+    
+    def load_previous_page(self):
+        """在后台查询上一页"""
+        if not self.loaded_rows:
+            self.page_loading = False
+            return
+        self.executor.submit(self.order_service.get_order_list, limit=ORDER_PAGE_SIZE,
+                             before=self.loaded_rows[0].sort_key, **dict(self.filters),
+                             on_success=self.prepend_page, on_error=self.on_page_error, key='page')
+    
+    def prepend_page(self, rows):
+        """在顶部插入上一页，超出保留行数时移除底部的行"""
+        try:
+            self.has_more_before = len(rows) == ORDER_PAGE_SIZE
+            if not rows:
+                return
             
-        except Exception as e:
-            messagebox.showerror("错误", f"加载订单数据失败: {e}")
+            top_index = self.orders_tree.yview()[0] * len(self.loaded_rows) + len(rows)
+            for index, row in enumerate(rows):
+                self.insert_order_row(row, index)
+            self.loaded_rows[:0] = rows
+            
+            overflow = len(self.loaded_rows) - ORDER_MAX_LOADED_ROWS
+            if overflow > 0:
+                self.orders_tree.delete(*[str(row.order_id) for row in self.loaded_rows[-overflow:]])
+                del self.loaded_rows[-overflow:]
+                self.has_more_after = True
+            # 保持当前可见的行不动
+            self.orders_tree.yview_moveto(top_index / len(self.loaded_rows))
+        finally:
+            self.page_loading = False
+    
+    def update_statistics(self):
+        """按当前条件在数据库中汇总统计信息"""
+        self.executor.submit(self.order_service.get_order_summary, **dict(self.filters),
+                             on_success=self.show_statistics,
+                             error_message="统计订单失败", key='statistics')
+    
+    def show_statistics(self, summary):
+        """显示统计信息"""
+        total_orders = sum(row['order_count'] for row in summary.values())
+        completed = summary.get("已完成", {})
+        completed_orders = completed.get('order_count', 0)
+        cancelled_orders = summary.get("已取消", {}).get('order_count', 0)
+        in_progress_orders = total_orders - completed_orders - cancelled_orders
+        
+        stats_text = (f"订单总数: {total_orders} | "
+                     f"进行中: {in_progress_orders} | "
+                     f"已完成: {completed_orders} | "
+                     f"已取消: {cancelled_orders} | "
+                     f"总收入: ¥{completed.get('total_amount', 0):.2f} | "
+                     f"工时费: ¥{completed.get('labor_cost', 0):.2f} | "
+                     f"配件费: ¥{completed.get('parts_cost', 0):.2f}")
+        self.stats_var.set(stats_text)
+    
+    @staticmethod
+    def shorten(text, length):
+        """截断过长的文本"""
+        return text[:length] + "..." if len(text) > length else text
     
     def reset_search(self):
         """重置搜索条件"""
@@ -329,12 +426,17 @@ class OrderQueryWindow:
             messagebox.showwarning("警告", "请选择要查看的订单")
             return
         
+        item = self.orders_tree.item(selection[0])
+        order_number = item['values'][0]
+        
+        # 获取订单详情
+        self.executor.submit(self.order_service.get_order_details, order_number,
+                             on_success=lambda details: self.open_detail_window(order_number, details),
+                             error_message="显示订单详情失败", key='order_detail')
+    
+    def open_detail_window(self, order_number, order_details):
+        """打开订单详情窗口"""
         try:
-            item = self.orders_tree.item(selection[0])
-            order_number = item['values'][0]
-            
-            # 获取订单详情
-            order_details = self.order_service.get_order_details(order_number)
             if not order_details:
                 messagebox.showerror("错误", "订单不存在")
                 return
@@ -440,30 +542,52 @@ class OrderQueryWindow:
             messagebox.showerror("错误", f"显示订单详情失败: {e}")
     
     def export_to_excel(self):
-        """导出到Excel"""
-        try:
-            from tkinter import filedialog
-            from utils.export_utils import ExportUtils
-            
-            # 选择保存路径
-            file_path = filedialog.asksaveasfilename(
-                title="导出订单报表",
-                defaultextension=".xlsx",
-                filetypes=[("Excel文件", "*.xlsx"), ("所有文件", "*.*")]
-            )
-            
-            if file_path:
-                # 获取当前显示的数据
-                data = []
-                for item in self.orders_tree.get_children():
-                    values = self.orders_tree.item(item)['values']
-                    data.append(values)
-                
-                # 导出数据
-                headers = ['订单号', '客户姓名', '车牌号', '维修日期', '故障描述', '总金额', '状态', '技师']
-                
-                ExportUtils.export_to_excel(data, headers, file_path, "订单报表")
-                messagebox.showinfo("成功", f"订单报表已导出到: {file_path}")
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"导出失败: {e}")
\ No newline at end of file
+        """按当前查询条件导出全部订单到Excel"""
+        from tkinter import filedialog
+        
+        file_path = filedialog.asksaveasfilename(
+            title="导出订单报表",
+            defaultextension=".xlsx",
+            filetypes=[("Excel文件", "*.xlsx"), ("所有文件", "*.*")]
+        )
+        if file_path:
+            self.export_orders(file_path, 'xlsx')
+    
+    def export_to_file(self):
+        """按当前查询条件导出全部订单到CSV/JSON"""
+        from tkinter import filedialog
+        
+        file_path = filedialog.asksaveasfilename(
+            title="导出订单",
+            defaultextension=".csv",
+            filetypes=[("CSV文件", "*.csv"), ("JSON文件", "*.json")]
+        )
+        if file_path:
+            format = 'json' if file_path.lower().endswith('.json') else 'csv'
+            self.export_orders(file_path, format)
+    
+    def export_orders(self, file_path, format):
+        """在后台从数据库逐批读取订单写入文件（不受列表分页限制），界面显示进度"""
+        def report_progress(written, total):
+            # 在工作线程中调用，交给主线程更新界面
+            self.executor.post(self.show_export_progress, written, total)
+        
+        def done(path):
+            self.export_var.set("")
+            messagebox.showinfo("成功", f"订单已导出到: {path}")
+        
+        def failed(error):
+            self.export_var.set("")
+            messagebox.showerror("错误", f"导出失败: {error}")
+        
+        self.export_var.set("正在导出...")
+        self.executor.submit(self.order_service.export_orders, format, file_path,
+                             report_progress, **dict(self.filters),
+                             on_success=done, on_error=failed, key='export')
+    
+    def show_export_progress(self, written, total):
+        """显示导出进度"""
+        if total:
+            self.export_var.set(f"正在导出: {written}/{total} ({written * 100 // total}%)")
+        else:
+            self.export_var.set(f"正在导出: {written}")
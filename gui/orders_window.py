@@ -10,6 +10,7 @@ from datetime import datetime, date
 from services.order_service import OrderService
 from services.inventory_service import InventoryService
 from models.orders import RepairOrder
+from gui.task_executor import TaskExecutor
 
 class OrdersWindow:
     """维修订单管理窗口"""
@@ -19,6 +20,9 @@ class OrdersWindow:
         self.order_service = OrderService()
         self.inventory_service = InventoryService()
         self.window = tk.Toplevel(parent) if parent else tk.Tk()
+        self.executor = TaskExecutor(self.window)
+        self.customers_data = []
+        self.parts_data = []
         self.setup_window()
         self.setup_widgets()
         self.load_orders()
@@ -261,23 +265,23 @@ class OrdersWindow:
     
     def load_customers_for_combo(self):
         """加载客户到下拉框"""
-        try:
-            customers = self.order_service.get_all_customers()
+        def fill(customers):
             customer_list = [f"{c.customer_name} ({c.phone})" for c in customers]
             self.customer_combo['values'] = customer_list
             self.customers_data = customers  # 保存客户数据
-        except Exception as e:
-            messagebox.showerror("错误", f"加载客户列表失败: {e}")
+        
+        self.executor.submit(self.order_service.get_all_customers, on_success=fill,
+                             error_message="加载客户列表失败", key='customers')
     
     def load_parts_for_combo(self):
         """加载配件到下拉框"""
-        try:
-            parts = self.inventory_service.get_all_parts()
+        def fill(parts):
             part_list = [f"{p.part_name} (库存:{p.stock_quantity})" for p in parts if p.stock_quantity > 0]
             self.part_combo['values'] = part_list
             self.parts_data = parts  # 保存配件数据
-        except Exception as e:
-            messagebox.showerror("错误", f"加载配件列表失败: {e}")
+        
+        self.executor.submit(self.inventory_service.get_all_parts, on_success=fill,
+                             error_message="加载配件列表失败", key='parts')
     
     def on_customer_select(self, event):
         """客户选择事件"""
@@ -477,41 +481,47 @@ class OrdersWindow:
             messagebox.showerror("错误", "请输入有效的工时费")
             return
         
-        try:
-            # 准备配件使用数据
-            parts_usage_list = []
-            for part in self.selected_parts:
-                usage_data = {
-                    'part_id': part.get('part_id'),
-                    'part_name': part['part_name'],
-                    'part_source': part['part_source'],
-                    'quantity_used': part['quantity'],
-                    'unit_price': part['unit_price'],
-                    'remarks': ''
-                }
-                parts_usage_list.append(usage_data)
-            
-            # 准备订单数据
-            order_data = {
-                'customer_id': self.selected_customer.customer_id,
-                'repair_date': datetime.strptime(self.repair_date_var.get(), '%Y-%m-%d').date(),
-                'fault_description': fault_description,
-                'repair_content': self.repair_text.get('1.0', tk.END).strip(),
-                'labor_cost': labor_cost
+        # 准备配件使用数据
+        parts_usage_list = []
+        for part in self.selected_parts:
+            usage_data = {
+                'part_id': part.get('part_id'),
+                'part_name': part['part_name'],
+                'part_source': part['part_source'],
+                'quantity_used': part['quantity'],
+                'unit_price': part['unit_price'],
+                'remarks': ''
             }
-            
-            # 创建订单
-            order_id = self.order_service.create_repair_order(order_data, parts_usage_list)
+            parts_usage_list.append(usage_data)
+        
+        try:
+            repair_date = datetime.strptime(self.repair_date_var.get(), '%Y-%m-%d').date()
+        except ValueError as e:
+            messagebox.showerror("错误", f"创建订单失败: {e}")
+            return
+        
+        # 准备订单数据
+        order_data = {
+            'customer_id': self.selected_customer.customer_id,
+            'repair_date': repair_date,
+            'fault_description': fault_description,
+            'repair_content': self.repair_text.get('1.0', tk.END).strip(),
+            'labor_cost': labor_cost
+        }
+        
+        def done(order_id):
             messagebox.showinfo("成功", f"订单创建成功！订单号：{order_id}")
             
             # 清空表单
             self.clear_new_order_form()
             
-            # 刷新订单列表
+            # 刷新订单列表和配件库存
             self.load_orders()
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"创建订单失败: {e}")
+            self.load_parts_for_combo()
+        
+        # 创建订单
+        self.executor.submit_write(self.order_service.create_repair_order, order_data, parts_usage_list,
+                                   on_success=done, error_message="创建订单失败")
     
     def clear_new_order_form(self):
         """清空新建订单表单"""
@@ -537,100 +547,55 @@ class OrdersWindow:
     
     def load_orders(self):
         """加载订单列表"""
-        try:
-            # 清空现有数据
-            for item in self.orders_tree.get_children():
-                self.orders_tree.delete(item)
-            
-            # 获取订单数据
-            orders = self.order_service.get_all_orders()
-            
-            # 插入数据到树形控件
-            for order in orders:
-                # 获取客户信息
-                customer = self.order_service.customer_dao.get_customer_by_id(order.customer_id)
-                customer_name = customer.customer_name if customer else '未知客户'
-                license_plate = customer.license_plate if customer else ''
-                
-                values = (
-                    order.order_number,
-                    customer_name,
-                    license_plate,
-                    order.repair_date.strftime('%Y-%m-%d') if order.repair_date else '',
-                    order.fault_description or '',
-                    f"{order.total_amount:.2f}",
-                    order.status
-                )
-                
-                # 根据状态设置不同颜色
-                tags = ()
-                if order.status == '已完成':
-                    tags = ('completed',)
-                elif order.status == '已取消':
-                    tags = ('cancelled',)
-                elif order.status == '维修中':
-                    tags = ('in_progress',)
-                
-                self.orders_tree.insert('', tk.END, values=values, tags=tags)
+        # 获取订单数据（已带出客户姓名和车牌号）
+        self.executor.submit(self.order_service.get_order_list, limit=100,
+                             on_success=self.fill_orders_tree,
+                             error_message="加载订单列表失败", key='orders')
+    
+    def fill_orders_tree(self, orders):
+        """将订单行插入树形控件"""
+        # 清空现有数据
+        for item in self.orders_tree.get_children():
+            self.orders_tree.delete(item)
+        
+        # 插入数据到树形控件
+        for order in orders:
+            values = (
+                order.order_number,
+                order.customer_name or '未知客户',
+                order.license_plate or '',
+                order.repair_date_text,
+                order.fault_description or '',
+                f"{order.total_amount:.2f}",
+                order.status
+            )
             
-            # 设置标签样式
-            self.orders_tree.tag_configure('completed', background='#ccffcc')
-            self.orders_tree.tag_configure('cancelled', background='#ffcccc')
-            self.orders_tree.tag_configure('in_progress', background='#ffffcc')
+            # 根据状态设置不同颜色
+            tags = ()
+            if order.status == '已完成':
+                tags = ('completed',)
+            elif order.status == '已取消':
+                tags = ('cancelled',)
+            elif order.status == '维修中':
+                tags = ('in_progress',)
             
-        except Exception as e:
-            messagebox.showerror("错误", f"加载订单列表失败: {e}")
+            self.orders_tree.insert('', tk.END, values=values, tags=tags)
+        
+        # 设置标签样式
+        self.orders_tree.tag_configure('completed', background='#ccffcc')
+        self.orders_tree.tag_configure('cancelled', background='#ffcccc')
+        self.orders_tree.tag_configure('in_progress', background='#ffffcc')
     
     def search_orders(self):
         """搜索订单"""
-        try:
-            order_number = self.search_order_var.get().strip()
-            customer_keyword = self.search_customer_var.get().strip()
-            status = self.search_status_var.get().strip()
-            
-            # 清空现有数据
-            for item in self.orders_tree.get_children():
-                self.orders_tree.delete(item)
-            
-            # 获取所有订单并过滤
-            orders = self.order_service.get_all_orders()
-            
-            for order in orders:
-                # 获取客户信息
-                customer = self.order_service.customer_dao.get_customer_by_id(order.customer_id)
-                customer_name = customer.customer_name if customer else '未知客户'
-                license_plate = customer.license_plate if customer else ''
-                
-                # 应用过滤条件
-                if order_number and order_number not in order.order_number:
-                    continue
-                if customer_keyword and customer_keyword not in customer_name and customer_keyword not in license_plate:
-                    continue
-                if status and status != order.status:
-                    continue
-                
-                values = (
-                    order.order_number,
-                    customer_name,
-                    license_plate,
-                    order.repair_date.strftime('%Y-%m-%d') if order.repair_date else '',
-                    order.fault_description or '',
-                    f"{order.total_amount:.2f}",
-                    order.status
-                )
-                
-                tags = ()
-                if order.status == '已完成':
-                    tags = ('completed',)
-                elif order.status == '已取消':
-                    tags = ('cancelled',)
-                elif order.status == '维修中':
-                    tags = ('in_progress',)
-                
-                self.orders_tree.insert('', tk.END, values=values, tags=tags)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"搜索订单失败: {e}")
+        # 过滤条件直接交给数据库处理
+        self.executor.submit(self.order_service.get_order_list,
+                             order_number=self.search_order_var.get().strip(),
+                             customer_keyword=self.search_customer_var.get().strip(),
+                             status=self.search_status_var.get().strip(),
+                             limit=100,
+                             on_success=self.fill_orders_tree,
+                             error_message="搜索订单失败", key='orders')
     
     def reset_search(self):
         """重置搜索"""
@@ -649,9 +614,7 @@ class OrdersWindow:
         item = self.orders_tree.item(selection[0])
         order_number = item['values'][0]
         
-        try:
-            # 获取订单详情
-            order_detail = self.order_service.get_order_details(order_number)
+        def show(order_detail):
             if not order_detail:
                 messagebox.showerror("错误", "订单不存在")
                 return
@@ -665,9 +628,11 @@ class OrdersWindow:
             
             # 显示订单详情
             self.show_order_detail(detail_window, order_detail)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"获取订单详情失败: {e}")
+        
+        # 获取订单详情
+        self.executor.submit(self.order_service.get_order_details, order_number,
+                             on_success=show, error_message="获取订单详情失败",
+                             key='order_detail')
     
     def show_order_detail(self, parent, order_detail):
         """显示订单详情"""
@@ -763,12 +728,12 @@ class OrdersWindow:
             return
         
         if messagebox.askyesno("确认", f"确定要完成订单 {order_number} 吗？"):
-            try:
-                self.order_service.complete_order(order_number)
+            def done(_):
                 messagebox.showinfo("成功", "订单已完成")
                 self.load_orders()
-            except Exception as e:
-                messagebox.showerror("错误", f"完成订单失败: {e}")
+            
+            self.executor.submit_write(self.order_service.complete_order, order_number,
+                                       on_success=done, error_message="完成订单失败")
     
     def cancel_order(self):
         """取消订单"""
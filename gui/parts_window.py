@@ -8,6 +8,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from services.inventory_service import InventoryService
 from models.parts import Part
+from gui.task_executor import TaskExecutor
+from config.settings import PART_SEARCH_DEBOUNCE_MS
 
 class PartsWindow:
     """配件管理窗口"""
@@ -16,6 +18,8 @@ class PartsWindow:
         self.parent = parent
         self.inventory_service = InventoryService()
         self.window = tk.Toplevel(parent) if parent else tk.Tk()
+        self.executor = TaskExecutor(self.window)
+        self.search_after_id = None  # 待执行的延迟搜索
         self.setup_window()
         self.setup_widgets()
         self.load_parts()
@@ -59,6 +63,11 @@ class PartsWindow:
         ttk.Button(search_frame, text="搜索", command=self.search_parts).grid(row=0, column=4, padx=(0, 5))
         ttk.Button(search_frame, text="重置", command=self.reset_search).grid(row=0, column=5)
         
+        # 边输入边搜索
+        self.search_var.trace_add('write', self.on_search_changed)
+        self.category_combo.bind('<<ComboboxSelected>>', self.on_search_changed)
+        search_entry.bind('<Return>', lambda e: self.search_parts())
+        
         # 左侧：配件列表
         list_frame = ttk.LabelFrame(main_frame, text="配件列表", padding="5")
         list_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(0, 10))
@@ -173,84 +182,70 @@ class PartsWindow:
     
     def load_categories(self):
         """加载配件类别"""
-        try:
-            categories = self.inventory_service.get_part_categories()
+        def show(categories):
             categories.insert(0, "")  # 添加空选项
             self.category_combo['values'] = categories
             self.detail_category_combo['values'] = categories
-        except Exception as e:
-            messagebox.showerror("错误", f"加载类别失败: {e}")
+        
+        self.executor.submit(self.inventory_service.get_part_categories, on_success=show,
+                             error_message="加载类别失败", key='categories')
     
     def load_parts(self):
         """加载配件列表"""
-        try:
-            # 清空现有数据
-            for item in self.parts_tree.get_children():
-                self.parts_tree.delete(item)
-            
-            # 获取配件数据
-            parts = self.inventory_service.get_all_parts()
-            
-            # 插入数据到树形控件
-            for part in parts:
-                values = (
-                    part.part_id,
-                    part.part_name,
-                    part.part_code or '',
-                    part.category or '',
-                    part.stock_quantity,
-                    part.unit,
-                    f"{part.purchase_price:.2f}",
-                    f"{part.selling_price:.2f}"
-                )
-                
-                # 库存不足的行用红色标记
-                tags = ('low_stock',) if part.stock_quantity <= part.min_stock else ()
-                self.parts_tree.insert('', tk.END, values=values, tags=tags)
-            
-            # 设置标签样式
-            self.parts_tree.tag_configure('low_stock', background='#ffcccc')
+        self.executor.submit(self.inventory_service.get_all_parts, on_success=self.fill_parts_tree,
+                             error_message="加载配件列表失败", key='parts')
+    
+    def fill_parts_tree(self, parts):
+        """将配件插入树形控件"""
+        # 清空现有数据
+        for item in self.parts_tree.get_children():
+            self.parts_tree.delete(item)
+        
+        # 插入数据到树形控件
+        for part in parts:
+            values = (
+                part.part_id,
+                part.part_name,
+                part.part_code or '',
+                part.category or '',
+                part.stock_quantity,
+                part.unit,
+                f"{part.purchase_price:.2f}",
+                f"{part.selling_price:.2f}"
+            )
             
-        except Exception as e:
-            messagebox.showerror("错误", f"加载配件列表失败: {e}")
+            # 库存不足的行用红色标记
+            tags = ('low_stock',) if part.stock_quantity <= part.min_stock else ()
+            self.parts_tree.insert('', tk.END, values=values, tags=tags)
+        
+        # 设置标签样式
+        self.parts_tree.tag_configure('low_stock', background='#ffcccc')
+    
+    def on_search_changed(self, *args):
+        """搜索条件变化：停止输入一段时间后再搜索"""
+        if self.search_after_id:
+            self.window.after_cancel(self.search_after_id)
+        self.search_after_id = self.window.after(PART_SEARCH_DEBOUNCE_MS, self.search_parts)
     
     def search_parts(self):
         """搜索配件"""
-        try:
-            keyword = self.search_var.get().strip()
-            category = self.category_var.get().strip()
-            
-            # 清空现有数据
-            for item in self.parts_tree.get_children():
-                self.parts_tree.delete(item)
-            
-            # 搜索配件
-            parts = self.inventory_service.search_parts(keyword, category)
-            
-            # 插入搜索结果
-            for part in parts:
-                values = (
-                    part.part_id,
-                    part.part_name,
-                    part.part_code or '',
-                    part.category or '',
-                    part.stock_quantity,
-                    part.unit,
-                    f"{part.purchase_price:.2f}",
-                    f"{part.selling_price:.2f}"
-                )
-                
-                tags = ('low_stock',) if part.stock_quantity <= part.min_stock else ()
-                self.parts_tree.insert('', tk.END, values=values, tags=tags)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"搜索配件失败: {e}")
+        if self.search_after_id:
+            self.window.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        
+        keyword = self.search_var.get().strip()
+        category = self.category_var.get().strip()
+        
+        # 新的搜索会取代尚未完成的旧搜索
+        self.executor.submit(self.inventory_service.search_parts_cached, keyword, category,
+                             on_success=self.fill_parts_tree,
+                             error_message="搜索配件失败", key='parts')
     
     def reset_search(self):
         """重置搜索"""
         self.search_var.set("")
         self.category_var.set("")
-        self.load_parts()
+        self.search_parts()
     
     def on_part_select(self, event):
         """配件选择事件"""
@@ -261,12 +256,14 @@ class PartsWindow:
             
             # 获取完整的配件信息
             part_id = values[0]
-            try:
-                part = self.inventory_service.part_dao.get_part_by_id(part_id)
+            
+            def show(part):
                 if part:
                     self.load_part_to_form(part)
-            except Exception as e:
-                messagebox.showerror("错误", f"加载配件详情失败: {e}")
+            
+            self.executor.submit(self.inventory_service.part_dao.get_part_by_id, part_id,
+                                 on_success=show, error_message="加载配件详情失败",
+                                 key='part_detail')
     
     def load_part_to_form(self, part):
         """将配件信息加载到表单"""
@@ -336,15 +333,16 @@ class PartsWindow:
         if not self.validate_form():
             return
         
-        try:
-            part_data = self.get_form_data()
-            self.inventory_service.add_part(part_data)
+        part_data = self.get_form_data()
+        
+        def done(_):
             messagebox.showinfo("成功", "配件添加成功")
             self.load_parts()
             self.load_categories()
             self.clear_form()
-        except Exception as e:
-            messagebox.showerror("错误", f"添加配件失败: {e}")
+        
+        self.executor.submit_write(self.inventory_service.add_part, part_data,
+                                   on_success=done, error_message="添加配件失败")
     
     def update_part(self):
         """修改配件"""
@@ -355,15 +353,16 @@ class PartsWindow:
         if not self.validate_form():
             return
         
-        try:
-            part_data = self.get_form_data()
-            part_data['part_id'] = self.current_part_id
-            self.inventory_service.update_part(part_data)
+        part_data = self.get_form_data()
+        part_data['part_id'] = self.current_part_id
+        
+        def done(_):
             messagebox.showinfo("成功", "配件修改成功")
             self.load_parts()
             self.load_categories()
-        except Exception as e:
-            messagebox.showerror("错误", f"修改配件失败: {e}")
+        
+        self.executor.submit_write(self.inventory_service.update_part, part_data,
+                                   on_success=done, error_message="修改配件失败")
     
     def delete_part(self):
         """删除配件"""
@@ -372,14 +371,14 @@ class PartsWindow:
             return
         
         if messagebox.askyesno("确认", "确定要删除选中的配件吗？"):
-            try:
-                self.inventory_service.delete_part(self.current_part_id)
+            def done(_):
                 messagebox.showinfo("成功", "配件删除成功")
                 self.load_parts()
                 self.load_categories()
                 self.clear_form()
-            except Exception as e:
-                messagebox.showerror("错误", f"删除配件失败: {e}")
+            
+            self.executor.submit_write(self.inventory_service.delete_part, self.current_part_id,
+                                       on_success=done, error_message="删除配件失败")
 
 # 测试代码
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import date
 from services.inventory_service import InventoryService
+from gui.task_executor import TaskExecutor
 
 class PurchaseWindow:
     """进货管理窗口类"""
@@ -29,6 +30,9 @@ class PurchaseWindow:
         # 居中显示
         self.window.transient(self.parent)
         self.window.grab_set()
+        
+        self.executor = TaskExecutor(self.window)
+        self.parts_data = {}
     
     def setup_widgets(self):
         """设置界面控件"""
@@ -186,23 +190,21 @@ class PurchaseWindow:
     
     def load_parts_combo(self):
         """加载配件下拉列表"""
-        try:
-            parts = self.inventory_service.get_all_parts()
+        def fill(parts):
             part_names = [f"{part.part_name} ({part.part_code})" for part in parts]
             self.part_combo['values'] = part_names
             self.parts_data = {f"{part.part_name} ({part.part_code})": part for part in parts}
-        except Exception as e:
-            messagebox.showerror("错误", f"加载配件列表失败: {e}")
+        
+        self.executor.submit(self.inventory_service.get_all_parts, on_success=fill,
+                             error_message="加载配件列表失败", key='parts')
     
     def load_purchase_history(self):
         """加载进货记录"""
-        try:
+        def fill(orders):
             # 清空现有记录
             for item in self.history_tree.get_children():
                 self.history_tree.delete(item)
             
-            # 加载进货记录
-            orders = self.inventory_service.get_purchase_orders()
             for order in orders:
                 self.history_tree.insert('', 'end', values=(
                     order.order_id,
@@ -211,8 +213,10 @@ class PurchaseWindow:
                     f"¥{order.total_amount:.2f}",
                     order.operator
                 ))
-        except Exception as e:
-            messagebox.showerror("错误", f"加载进货记录失败: {e}")
+        
+        # 加载进货记录
+        self.executor.submit(self.inventory_service.get_purchase_orders, on_success=fill,
+                             error_message="加载进货记录失败", key='history')
     
     def add_part_to_list(self):
         """添加配件到进货列表"""
@@ -314,28 +318,20 @@ class PurchaseWindow:
     
     def save_purchase_order(self):
         """保存进货单"""
-        try:
-            # 验证输入
-            if not self.supplier_var.get().strip():
-                messagebox.showwarning("警告", "请输入供应商名称")
-                return
-            
-            if not self.operator_var.get().strip():
-                messagebox.showwarning("警告", "请输入操作员")
-                return
-            
-            if not self.parts_list:
-                messagebox.showwarning("警告", "请添加进货配件")
-                return
-            
-            # 创建进货订单
-            order_id = self.inventory_service.create_purchase_order(
-                supplier_name=self.supplier_var.get().strip(),
-                operator=self.operator_var.get().strip(),
-                parts_list=self.parts_list,
-                remarks=self.remarks_var.get().strip()
-            )
-            
+        # 验证输入
+        if not self.supplier_var.get().strip():
+            messagebox.showwarning("警告", "请输入供应商名称")
+            return
+        
+        if not self.operator_var.get().strip():
+            messagebox.showwarning("警告", "请输入操作员")
+            return
+        
+        if not self.parts_list:
+            messagebox.showwarning("警告", "请添加进货配件")
+            return
+        
+        def done(order_id):
             messagebox.showinfo("成功", f"进货单保存成功！订单号: {order_id}")
             
             # 清空输入
@@ -347,6 +343,11 @@ class PurchaseWindow:
             
             # 刷新进货记录
             self.load_purchase_history()
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"保存进货单失败: {e}")
\ No newline at end of file
+        
+        # 创建进货订单
+        self.executor.submit_write(self.inventory_service.create_purchase_order,
+                                   supplier_name=self.supplier_var.get().strip(),
+                                   operator=self.operator_var.get().strip(),
+                                   parts_list=list(self.parts_list),
+                                   remarks=self.remarks_var.get().strip(),
+                                   on_success=done, error_message="保存进货单失败")
\ No newline at end of file
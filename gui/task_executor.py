@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务执行器
+数据库查询、备份等耗时操作在工作线程中执行，结果通过 after 交回Tk主线程处理
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+from config.settings import GUI_WORKER_THREADS, GUI_RESULT_POLL_INTERVAL
+
+_thread_pool = None
+_thread_pool_lock = threading.Lock()
+
+def get_thread_pool():
+    """获取所有窗口共用的工作线程池"""
+    global _thread_pool
+    with _thread_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=GUI_WORKER_THREADS,
+                                              thread_name_prefix='gui-worker')
+        return _thread_pool
+
+def shutdown_thread_pool():
+    """关闭工作线程池（程序退出时调用）"""
+    global _thread_pool
+    with _thread_pool_lock:
+        pool, _thread_pool = _thread_pool, None
+    if pool:
+        pool.shutdown(wait=False)
+
+class TaskExecutor:
+    """窗口级后台任务执行器
+
+    - submit() 把函数放到工作线程执行，成功/失败回调在Tk主线程中调用
+    - 指定 key 的任务会取代同一 key 下尚未完成的旧任务，旧任务的结果被丢弃
+    - post() 供工作线程把进度等界面更新交给主线程执行
+    - submit_write() 提交写操作，上一个写操作完成前的重复提交被忽略
+    - 有任务执行期间窗口显示忙碌光标
+    """
+
+    def __init__(self, widget, busy_cursor='watch'):
+        self.widget = widget
+        self.busy_cursor = busy_cursor
+        self._results = queue.Queue()
+        self._calls = queue.Queue()  # 工作线程通过 post() 提交的界面更新
+        self._generations = {}  # key -> 最新任务序号
+        self._futures = {}      # key -> 最新任务
+        self._pending = 0
+        self._writing = False  # 是否有写操作尚未完成（见 submit_write）
+        self._polling = False
+        self._closed = False
+        self._saved_cursor = None
+        self.busy_callbacks = []  # 忙碌状态变化时调用 callback(is_busy)
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+
+    @property
+    def busy(self):
+        """是否有任务正在执行"""
+        return self._pending > 0
+
+    def submit(self, func, *args, on_success=None, on_error=None,
+               error_message="操作失败", key=None, **kwargs):
+        """提交后台任务
+
+        func 在工作线程执行，不能访问任何Tk控件；on_success(result) 和
+        on_error(exception) 在主线程执行。未指定 on_error 时弹出错误提示。
+        """
+        if self._closed:
+            return None
+
+        generation = None
+        if key is not None:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            previous = self._futures.get(key)
+            if previous is not None:
+                previous.cancel()  # 尚未开始执行的旧任务直接取消
+
+        future = get_thread_pool().submit(func, *args, **kwargs)
+        if key is not None:
+            self._futures[key] = future
+
+        self._pending += 1
+        if self._pending == 1:
+            self._set_busy(True)
+
+        future.add_done_callback(
+            lambda f: self._results.put((f, key, generation, on_success, on_error, error_message)))
+        self._start_polling()
+        return future
+
+    def submit_write(self, func, *args, on_success=None, on_error=None,
+                     error_message="操作失败", **kwargs):
+        """提交写操作（保存单据、增删改记录）
+
+        同一窗口同一时间只执行一个写操作：上一个写操作的回调执行之前，
+        再次提交（如连续点击保存按钮）直接忽略并返回 None，避免单据重复保存、
+        库存重复增减。其余参数同 submit()。
+        """
+        if self._writing:
+            return None
+
+        def finish():
+            self._writing = False
+
+        def succeeded(result):
+            finish()
+            if on_success:
+                on_success(result)
+
+        def failed(error):
+            finish()
+            if on_error:
+                on_error(error)
+            else:
+                messagebox.showerror("错误", f"{error_message}: {error}", parent=self.widget)
+
+        future = self.submit(func, *args, on_success=succeeded, on_error=failed,
+                             error_message=error_message, **kwargs)
+        self._writing = future is not None
+        return future
+
+    def post(self, func, *args):
+        """在主线程中调用 func(*args)，可在工作线程中调用（如报告导出进度）
+
+        只在有任务执行期间处理，任务结束前提交的调用都会在其结果回调之前执行。
+        """
+        if not self._closed:
+            self._calls.put((func, args))
+    
+    def cancel(self, key):
+        """取消指定 key 下的任务（已在执行的任务结果会被丢弃）"""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def _start_polling(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.widget.after(GUI_RESULT_POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        """在主线程中处理已完成的任务"""
+        if self._closed:
+            return
+
+        while True:
+            try:
+                func, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception:
+                logging.exception(f"界面回调 {getattr(func, '__qualname__', func)} 执行出错")
+            if self._closed:
+                return
+
+        while True:
+            try:
+                future, key, generation, on_success, on_error, error_message = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pending -= 1
+            if key is not None:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+                if self._generations.get(key) != generation:
+                    continue  # 已被更新的任务取代
+            if future.cancelled():
+                continue
+
+            error = future.exception()
+            try:
+                if error is None:
+                    if on_success:
+                        on_success(future.result())
+                elif on_error:
+                    on_error(error)
+                else:
+                    messagebox.showerror("错误", f"{error_message}: {error}", parent=self.widget)
+            except Exception as e:
+                messagebox.showerror("错误", f"{error_message}: {e}", parent=self.widget)
+            if self._closed:
+                return
+
+        if self._pending > 0:
+            self.widget.after(GUI_RESULT_POLL_INTERVAL, self._poll)
+        else:
+            self._polling = False
+            self._set_busy(False)
+
+    def _set_busy(self, is_busy):
+        """切换忙碌光标并通知监听者"""
+        try:
+            if is_busy:
+                self._saved_cursor = self.widget.cget('cursor')
+                self.widget.config(cursor=self.busy_cursor)
+            else:
+                self.widget.config(cursor=self._saved_cursor or '')
+        except Exception:
+            pass
+        for callback in self.busy_callbacks:
+            callback(is_busy)
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.close()
+
+    def close(self):
+        """窗口关闭时取消未开始的任务，丢弃所有未处理的结果"""
+        self._closed = True
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
@@ -6,32 +6,144 @@
 版本: 1.0
 """
 
+import time
+STARTUP_TIME = time.perf_counter()
+
 import sys
 import os
+import argparse
 from pathlib import Path
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from gui.main_window import MainWindow
-from models.database import DatabaseManager
+from models.database import DatabaseManager, close_all_pools
 from config.settings import DATABASE_PATH
 
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="汽修店记账软件")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="重建日收入汇总表并核对结果后退出")
+    parser.add_argument('--export-reports', metavar='YYYY-MM', nargs='?', const='',
+                        help="生成指定月份（默认本月）的月末报表包后退出")
+    parser.add_argument('--check-indexes', action='store_true',
+                        help="重放常用查询的执行计划，列出整表扫描后退出")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="输出启动各阶段耗时（模块导入、数据库初始化、主窗口首次绘制）")
+    return parser.parse_args()
+
+def rebuild_rollups():
+    """重建汇总表并与原始数据核对"""
+    from services.report_service import ReportService
+    
+    report_service = ReportService()
+    days = report_service.rebuild_daily_revenue()
+    mismatches = report_service.check_daily_revenue()
+    print(f"日收入汇总表已重建，共 {days} 天")
+    for repair_date, rollup, raw in mismatches:
+        print(f"  不一致: {repair_date} 汇总表={rollup} 原始数据={raw}")
+    return not mismatches
+
+def export_reports(month_text):
+    """生成月末报表包并输出各报表耗时"""
+    from services.report_service import ReportService
+    
+    year = month = None
+    if month_text:
+        year, month = (int(part) for part in month_text.split('-'))
+    
+    started = time.perf_counter()
+    zip_path, timings = ReportService().export_month_end_bundle(year, month)
+    print(f"月末报表已导出到: {zip_path}（总耗时 {time.perf_counter() - started:.2f} 秒）")
+    for timing in timings:
+        print(f"  {timing.name}: {timing.rows} 行，查询 {timing.query_seconds:.3f} 秒，"
+              f"写入 {timing.write_seconds:.3f} 秒")
+
+def check_indexes():
+    """索引检查：输出存在整表扫描的查询及其执行计划"""
+    from utils.database_utils import DatabaseUtils
+    
+    plans = DatabaseUtils.check_query_plans()
+    flagged = [plan for plan in plans if plan.full_scans]
+    print(f"共检查 {len(plans)} 条查询，{len(flagged)} 条存在整表扫描")
+    for plan in flagged:
+        print(f"\n[{plan.name}] {plan.sql}")
+        for detail in plan.plan:
+            print(f"  {'* ' if detail in plan.full_scans else '  '}{detail}")
+    return not flagged
+
+class StartupProfile:
+    """启动耗时统计（--profile-startup）"""
+    
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.stages = []
+        self._last = STARTUP_TIME
+    
+    def mark(self, stage):
+        """记录从上一阶段结束到现在的耗时"""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+    
+    def report(self):
+        """输出各阶段耗时"""
+        if not self.enabled:
+            return
+        print("启动耗时:")
+        for stage, seconds in self.stages:
+            print(f"  {stage}: {seconds * 1000:.1f} 毫秒")
+        print(f"  合计: {(self._last - STARTUP_TIME) * 1000:.1f} 毫秒")
+
 def main():
     """主程序入口"""
+    args = parse_args()
+    profile = StartupProfile(args.profile_startup)
+    profile.mark("导入模块")
     try:
-        # 初始化数据库
-        db_manager = DatabaseManager(DATABASE_PATH)
-        db_manager.init_database()
+        # 初始化数据库（结构版本已是最新时不执行DDL）
+        db_manager = DatabaseManager.get_shared(DATABASE_PATH)
+        migrations = db_manager.init_database()
+        db_manager.check_pragma_profile()
+        profile.mark(f"数据库初始化（执行迁移 {migrations} 步）")
+        
+        if args.rebuild_rollups:
+            if not rebuild_rollups():
+                sys.exit(1)
+            return
+        
+        if args.check_indexes:
+            if not check_indexes():
+                sys.exit(1)
+            return
+        
+        if args.export_reports is not None:
+            export_reports(args.export_reports)
+            return
         
-        # 启动GUI应用
+        # 启动GUI应用（命令行功能不需要加载界面模块）
+        from gui.main_window import MainWindow
+        profile.mark("导入界面模块")
         app = MainWindow()
+        profile.mark("创建主窗口")
+        if profile.enabled:
+            # 处理完待绘制事件，主窗口即完成首次绘制
+            app.root.update()
+            profile.mark("首次绘制")
+            profile.report()
         app.run()
         
     except Exception as e:
         print(f"程序启动失败: {e}")
         sys.exit(1)
+    finally:
+        # 停止后台工作线程（只有启动过界面才会加载），释放连接池中的数据库连接
+        task_executor = sys.modules.get('gui.task_executor')
+        if task_executor is not None:
+            task_executor.shutdown_thread_pool()
+        close_all_pools()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型基类
+"""
+
+import inspect
+import types
+
+class RowModel:
+    """使用 __slots__ 的模型基类
+
+    子类在 __slots__ 中列出全部属性，对象不再带有 __dict__；
+    from_row / from_rows 直接从查询结果行（sqlite3.Row）构造对象，
+    列名到构造参数、属性的对应关系每种列组合只计算一次。
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def _row_mapping(cls, keys):
+        """返回 (构造参数列, 其他属性列)，各为 ((列序号, 名称), ...)"""
+        cache = cls.__dict__.get('_row_mappings')
+        if cache is None:
+            cache = {}
+            cls._row_mappings = cache
+
+        mapping = cache.get(keys)
+        if mapping is None:
+            params = inspect.signature(cls.__init__).parameters
+            init_columns = []
+            attr_columns = []
+            for index, key in enumerate(keys):
+                if key != 'self' and key in params:
+                    init_columns.append((index, key))
+                elif isinstance(getattr(cls, key, None), (types.MemberDescriptorType, property)):
+                    attr_columns.append((index, key))
+            mapping = (tuple(init_columns), tuple(attr_columns))
+            cache[keys] = mapping
+        return mapping
+
+    @classmethod
+    def from_rows(cls, rows):
+        """由查询结果行批量创建对象，忽略模型中没有的列"""
+        objects = []
+        mapping = None
+        for row in rows:
+            if mapping is None:
+                init_columns, attr_columns = mapping = cls._row_mapping(tuple(row.keys()))
+            obj = cls(**{key: row[index] for index, key in init_columns})
+            for index, key in attr_columns:
+                setattr(obj, key, row[index])
+            obj._after_load()
+            objects.append(obj)
+        return objects
+
+    @classmethod
+    def from_row(cls, row):
+        """由单个查询结果行创建对象，row 为空时返回 None"""
+        if row is None:
+            return None
+        return cls.from_rows((row,))[0]
+
+    def _after_load(self):
+        """从数据库行加载后的处理（子类按需覆盖）"""
@@ -4,13 +4,19 @@
 客户模型
 """
 
+import logging
 from datetime import datetime
-from .database import DatabaseManager
+from .base import RowModel
+from .database import DatabaseManager, fulltext_phrase, like_contains
 from config.settings import DATABASE_PATH
 
-class Customer:
+class Customer(RowModel):
     """客户模型类"""
     
+    __slots__ = ('customer_id', 'customer_name', 'phone', 'address', 'vehicle_info',
+                 'license_plate', 'car_model', 'car_color', 'engine_number', 'vin', 'notes',
+                 'create_time', 'created_at')
+    
     def __init__(self, customer_id=None, customer_name="", phone="", 
                  address="", vehicle_info="", license_plate="", car_model="",
                  car_color="", engine_number="", vin="", notes=""):
@@ -45,38 +51,50 @@ class Customer:
         for key, value in data.items():
             if hasattr(customer, key):
                 setattr(customer, key, value)
-        
-        # 处理日期字段
-        if 'create_time' in data and data['create_time']:
-            try:
-                if isinstance(data['create_time'], str):
-                    customer.created_at = datetime.strptime(data['create_time'], '%Y-%m-%d %H:%M:%S')
-                else:
-                    customer.created_at = data['create_time']
-            except (ValueError, TypeError):
-                customer.created_at = None
-        
+        customer._after_load()
         return customer
+    
+    def _after_load(self):
+        """处理日期字段（数据库读出的 create_time 已是 datetime）"""
+        if isinstance(self.create_time, str) and self.create_time:
+            try:
+                self.created_at = datetime.fromisoformat(self.create_time)
+            except ValueError:
+                self.created_at = None
+        else:
+            self.created_at = self.create_time
 
 class CustomerDAO:
     """客户数据访问对象"""
     
     def __init__(self):
-        self.db_manager = DatabaseManager(DATABASE_PATH)
+        self.db_manager = DatabaseManager.get_shared(DATABASE_PATH)
     
-    def add_customer(self, customer):
-        """添加客户"""
-        query = '''
-            INSERT INTO customers (customer_name, phone, license_plate, car_model, 
-                                 car_color, engine_number, vin, address, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        '''
-        params = (
+    INSERT_QUERY = '''
+        INSERT INTO customers (customer_name, phone, license_plate, car_model, 
+                             car_color, engine_number, vin, address, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _insert_params(customer):
+        """客户插入参数"""
+        return (
             customer.customer_name, customer.phone, customer.license_plate,
             customer.car_model, customer.car_color, customer.engine_number,
             customer.vin, customer.address, customer.notes
         )
-        return self.db_manager.execute_insert(query, params)
+    
+    def add_customer(self, customer):
+        """添加客户"""
+        return self.db_manager.execute_insert(self.INSERT_QUERY, self._insert_params(customer))
+    
+    def bulk_add_customers(self, customers, batch_size=None):
+        """批量添加客户，所有批次在同一事务中写入，返回 BulkResult"""
+        rows = (self._insert_params(customer) for customer in customers)
+        result = self.db_manager.execute_many(self.INSERT_QUERY, rows, batch_size)
+        logging.info(f"批量添加客户: {result}")
+        return result
     
     def update_customer(self, customer):
         """更新客户信息"""
@@ -102,37 +120,56 @@ class CustomerDAO:
         query = "SELECT * FROM customers WHERE customer_id=?"
         result = self.db_manager.execute_query(query, (customer_id,))
         if result:
-            return Customer.from_dict(dict(result[0]))
+            return Customer.from_row(result[0])
         return None
     
     def get_all_customers(self):
         """获取所有客户"""
         query = "SELECT * FROM customers ORDER BY customer_name"
         results = self.db_manager.execute_query(query)
-        return [Customer.from_dict(dict(row)) for row in results]
+        return Customer.from_rows(results)
+    
+    def iter_customers(self):
+        """从游标分批读取所有客户（用于导出），逐个产出 Customer 对象"""
+        query = "SELECT * FROM customers ORDER BY customer_name"
+        for rows in self.db_manager.iter_query(query):
+            yield from Customer.from_rows(rows)
+    
+    def count_customers(self):
+        """获取客户总数"""
+        return self.db_manager.execute_query("SELECT COUNT(*) FROM customers")[0][0]
     
     def search_customers(self, keyword=""):
         """搜索客户"""
         if not keyword:
             return self.get_all_customers()
         
-        query = '''
-            SELECT * FROM customers 
-            WHERE customer_name LIKE ? OR phone LIKE ? OR license_plate LIKE ? 
-               OR car_model LIKE ? OR notes LIKE ?
-            ORDER BY customer_name
-        '''
-        keyword_param = f"%{keyword}%"
-        params = [keyword_param, keyword_param, keyword_param, keyword_param, keyword_param]
+        if self.db_manager.can_fulltext_search('customers_fts', keyword):
+            query = '''
+                SELECT * FROM customers 
+                WHERE customer_id IN (SELECT rowid FROM customers_fts WHERE customers_fts MATCH ?)
+                ORDER BY customer_name
+            '''
+            params = [fulltext_phrase(keyword)]
+        else:
+            query = '''
+                SELECT * FROM customers 
+                WHERE customer_name LIKE ? ESCAPE '\\' OR phone LIKE ? ESCAPE '\\'
+                   OR license_plate LIKE ? ESCAPE '\\' OR car_model LIKE ? ESCAPE '\\'
+                   OR notes LIKE ? ESCAPE '\\'
+                ORDER BY customer_name
+            '''
+            keyword_param = like_contains(keyword)
+            params = [keyword_param, keyword_param, keyword_param, keyword_param, keyword_param]
         results = self.db_manager.execute_query(query, params)
-        return [Customer.from_dict(dict(row)) for row in results]
+        return Customer.from_rows(results)
     
     def get_customer_by_name(self, customer_name):
         """根据姓名获取客户"""
         query = "SELECT * FROM customers WHERE customer_name=?"
         result = self.db_manager.execute_query(query, (customer_name,))
         if result:
-            return Customer.from_dict(dict(result[0]))
+            return Customer.from_row(result[0])
         return None
     
     def get_customer_by_phone(self, phone):
@@ -140,5 +177,5 @@ class CustomerDAO:
         query = "SELECT * FROM customers WHERE phone=?"
         result = self.db_manager.execute_query(query, (phone,))
         if result:
-            return Customer.from_dict(dict(result[0]))
+            return Customer.from_row(result[0])
         return None
\ No newline at end of file
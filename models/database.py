@@ -6,147 +6,624 @@
 
 import sqlite3
 import logging
+import string
+import threading
+import time
+import atexit
+from collections import namedtuple
 from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date
+from config.settings import (DB_TIMEOUT, DB_POOL_SIZE, DB_POOL_HEALTH_CHECK_INTERVAL,
+                             DB_PRAGMAS, BULK_BATCH_SIZE, FULLTEXT_SEARCH_ENABLED,
+                             FULLTEXT_MIN_KEYWORD_LENGTH, EXPORT_FETCH_SIZE,
+                             BACKUP_PAGES_PER_STEP, BACKUP_RETRY_SLEEP)
+
+# 全文检索索引：FTS表名 -> (源表, 主键列, 索引列)
+FULLTEXT_INDEXES = {
+    'parts_fts': ('parts', 'part_id', ('part_name', 'part_code', 'brand')),
+    'customers_fts': ('customers', 'customer_id',
+                      ('customer_name', 'phone', 'license_plate', 'car_model', 'notes')),
+}
+
+# 日期类型与SQLite文本之间的转换：写入时存为ISO格式文本，
+# 读取时按列的声明类型（DATE / TIMESTAMP）直接转换为 date / datetime
+def _convert_date(value):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+def _convert_timestamp(value):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+
+# 由触发器维护行数的业务表（数据库信息的快速模式直接读取 table_row_counts）
+COUNTED_TABLES = ('parts', 'customers', 'purchase_orders', 'purchase_details',
+                  'repair_orders', 'repair_parts_usage')
+
+def fulltext_phrase(keyword):
+    """把用户输入转为FTS5短语查询，避免其中的引号、运算符被当作查询语法"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+def like_contains(keyword):
+    """把用户输入转为 LIKE 包含匹配的模式，% _ 按字面匹配（配合 ESCAPE '\\' 使用）"""
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def ascii_lower(text):
+    """只把 ASCII 字母转为小写，与 SQLite LIKE 的不区分大小写规则一致"""
+    return text.translate(_ASCII_LOWER)
+
+def iter_batches(iterable, batch_size):
+    """将可迭代对象按 batch_size 切分为列表"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+class BulkResult(namedtuple('BulkResult', ['rows', 'seconds'])):
+    """批量写入结果：写入行数和耗时"""
+    
+    __slots__ = ()
+    
+    @property
+    def rows_per_second(self):
+        """每秒写入行数"""
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+    
+    def __str__(self):
+        return f"{self.rows} 行，耗时 {self.seconds:.3f} 秒（{self.rows_per_second:.0f} 行/秒）"
+
+class _Lease:
+    """一个线程对连接的占用：嵌套取用时 depth 加一，归还到 0 时连接回到池中"""
+    
+    __slots__ = ('conn', 'depth')
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.depth = 1
+
+class ConnectionPool:
+    """SQLite连接池
+    
+    同一线程在嵌套使用时复用同一个连接，线程退出 with 块后连接归还池中，
+    供其他线程取用。连接总数不超过 max_size，超出时等待其他线程归还。
+    """
+    
+    def __init__(self, db_path, max_size=DB_POOL_SIZE, timeout=DB_TIMEOUT,
+                 health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL, pragmas=None):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.pragmas = DB_PRAGMAS if pragmas is None else pragmas
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []  # [(conn, 归还时间)]
+        self._cond = threading.Condition(threading.Lock())
+        self._local = threading.local()
+        self._leases = {}  # conn -> _Lease，归还时按连接查找，与调用线程无关
+        self._open_count = 0
+        self._closed = False
+        self._draining = False  # drained() 期间暂停取用连接
+        self._stats = {
+            'connects': 0,        # 实际新建的连接数
+            'reused': 0,          # 复用已有连接的次数（即避免的连接次数）
+            'health_failures': 0, # 健康检查失败而被替换的连接数
+            'waits': 0            # 连接池满时等待的次数
+        }
+    
+    def _create_connection(self):
+        """新建数据库连接"""
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout,
+                               check_same_thread=False,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
+        self._apply_pragmas(conn)
+        return conn
+    
+    def _apply_pragmas(self, conn):
+        """应用PRAGMA配置，单项失败只记录警告，不影响连接使用"""
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {name}={value}").fetchall()
+            except sqlite3.Error as e:
+                logging.warning(f"设置 PRAGMA {name}={value} 失败: {e}")
+    
+    def _is_healthy(self, conn):
+        """检查连接是否可用"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _current_lease(self):
+        """当前线程仍在占用的连接（没有则返回 None）"""
+        lease = getattr(self._local, 'lease', None)
+        return lease if lease is not None and lease.conn is not None else None
+    
+    def acquire(self):
+        """取出当前线程使用的连接"""
+        with self._cond:
+            lease = self._current_lease()
+            if lease is not None:
+                lease.depth += 1
+                self._stats['reused'] += 1
+                return lease.conn
+        
+        conn = self._checkout()
+        lease = _Lease(conn)
+        with self._cond:
+            self._leases[conn] = lease
+        self._local.lease = lease
+        return conn
+    
+    def _checkout(self):
+        """从空闲列表取连接，没有则新建或等待"""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("连接池已关闭")
+                if self._draining:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise sqlite3.OperationalError("等待数据库连接超时（数据库正在恢复）")
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+                    continue
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    if (time.monotonic() - released_at < self.health_check_interval
+                            or self._is_healthy(conn)):
+                        self._stats['reused'] += 1
+                        return conn
+                    self._stats['health_failures'] += 1
+                    self._open_count -= 1
+                    self._close_quietly(conn)
+                    continue
+                if self._open_count < self.max_size:
+                    self._open_count += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"等待数据库连接超时（连接池上限 {self.max_size}）")
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+        
+        # 在锁外建立连接，避免阻塞其他线程归还连接
+        try:
+            conn = self._create_connection()
+        except Exception:
+            with self._cond:
+                self._open_count -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['connects'] += 1
+        return conn
+    
+    def release(self, conn):
+        """归还连接（嵌套使用时仅在最外层真正归还）
+        
+        按连接找到占用记录，可以在取用连接以外的线程中调用（如未读完的
+        查询生成器被其他线程回收时）。
+        """
+        with self._cond:
+            lease = self._leases[conn]
+            lease.depth -= 1
+            if lease.depth > 0:
+                return
+            lease.conn = None
+            del self._leases[conn]
+        
+        # 未提交的事务与原先关闭连接时的行为保持一致：回滚
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._open_count -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._notify_released()
+        if closed:
+            self._optimize_quietly(conn)
+            self._close_quietly(conn)
+    
+    def _discard(self, conn):
+        """丢弃损坏的连接"""
+        self._close_quietly(conn)
+        with self._cond:
+            self._open_count -= 1
+            self._notify_released()
+    
+    def _notify_released(self):
+        """有连接归还时唤醒等待者（清空连接池期间需唤醒全部，以免漏掉 drained()）"""
+        if self._draining:
+            self._cond.notify_all()
+        else:
+            self._cond.notify()
+    
+    @staticmethod
+    def _optimize_quietly(conn):
+        """关闭连接前执行 PRAGMA optimize：按本连接的查询记录补充或更新统计信息"""
+        try:
+            conn.execute('PRAGMA optimize').fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"PRAGMA optimize 失败: {e}")
+    
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    def close_all(self):
+        """关闭连接池中的所有空闲连接，正在使用的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._optimize_quietly(conn)
+            self._close_quietly(conn)
+    
+    @contextmanager
+    def drained(self, timeout=None):
+        """暂停取用连接，等待所有连接归还后全部关闭
+        
+        with 块内数据库文件上没有本连接池打开的连接，可以整体替换（如从备份恢复）；
+        其他线程此时申请连接会等待，退出 with 块后恢复正常。调用线程自身不能占用连接。
+        """
+        if self._current_lease() is not None:
+            raise sqlite3.ProgrammingError("当前线程仍占用数据库连接，无法清空连接池")
+        
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            if self._draining:
+                raise sqlite3.OperationalError("连接池正在清空")
+            self._draining = True
+            while self._open_count > len(self._idle):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._draining = False
+                    self._cond.notify_all()
+                    raise sqlite3.OperationalError(
+                        f"等待连接归还超时（仍有 {self._open_count - len(self._idle)} 个连接在使用）")
+                self._cond.wait(remaining)
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+        
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._draining = False
+                self._cond.notify_all()
+    
+    def get_stats(self):
+        """获取连接池统计信息"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['open'] = self._open_count
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open_count - len(self._idle)
+            stats['max_size'] = self.max_size
+        stats['connects_avoided'] = stats['reused']
+        return stats
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path):
+    """获取指定数据库文件的进程级连接池"""
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+        return pool
+
+def close_all_pools():
+    """关闭所有连接池（程序退出时调用）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        stats = pool.get_stats()
+        logging.info(f"关闭连接池 {pool.db_path}: 新建连接 {stats['connects']} 次，"
+                     f"复用连接 {stats['connects_avoided']} 次")
+        pool.close_all()
+
+atexit.register(close_all_pools)
 
 class DatabaseManager:
     """数据库管理器"""
     
+    _shared = {}
+    _shared_lock = threading.Lock()
+    
     def __init__(self, db_path):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
-        
+        self._fulltext_tables = None
+        self._data_versions = {}  # id(conn) -> (conn, 上次读到的 PRAGMA data_version)
+        self._change_count = 0
+        self._change_lock = threading.Lock()
+    
+    @classmethod
+    def get_shared(cls, db_path):
+        """获取指定数据库的共享管理器实例（各DAO共用）"""
+        key = str(Path(db_path).resolve())
+        with cls._shared_lock:
+            manager = cls._shared.get(key)
+            if manager is None:
+                manager = cls(db_path)
+                cls._shared[key] = manager
+            return manager
+    
+    @property
+    def pool(self):
+        """当前数据库对应的连接池"""
+        return get_pool(self.db_path)
+    
     @contextmanager
     def get_connection(self):
         """获取数据库连接"""
-        conn = None
+        pool = self.pool
+        conn = pool.acquire()
         try:
-            conn = sqlite3.connect(str(self.db_path), timeout=30)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
             yield conn
         except Exception as e:
-            if conn:
+            try:
                 conn.rollback()
-            logging.error(f"数据库操作错误: {e}")
+            except sqlite3.Error:
+                pass
+            # 库存不足等业务校验错误由调用方提示，只记录数据库本身的错误
+            if isinstance(e, sqlite3.Error):
+                logging.error(f"数据库操作错误: {e}")
             raise
         finally:
-            if conn:
-                conn.close()
+            pool.release(conn)
     
-    def init_database(self):
-        """初始化数据库表"""
+    @contextmanager
+    def transaction(self, immediate=False):
+        """在单个事务中执行多条语句，正常退出时提交，异常时回滚
+        
+        immediate=True 时在开始时即获取写锁（BEGIN IMMEDIATE），
+        避免先读后写的事务在升级写锁时与其他写入者冲突。
+        """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 创建配件表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS parts (
-                    part_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    part_name TEXT NOT NULL,
-                    part_code TEXT UNIQUE,
-                    category TEXT,
-                    brand TEXT,
-                    specification TEXT,
-                    unit TEXT DEFAULT '个',
-                    purchase_price REAL DEFAULT 0,
-                    selling_price REAL DEFAULT 0,
-                    stock_quantity INTEGER DEFAULT 0,
-                    min_stock INTEGER DEFAULT 10,
-                    supplier TEXT,
-                    create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建客户表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS customers (
-                    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer_name TEXT NOT NULL,
-                    phone TEXT,
-                    address TEXT,
-                    vehicle_info TEXT,
-                    create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建进货单表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS purchase_orders (
-                    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    supplier_name TEXT NOT NULL,
-                    purchase_date DATE NOT NULL,
-                    total_amount REAL DEFAULT 0,
-                    status TEXT DEFAULT '已完成',
-                    operator TEXT,
-                    remarks TEXT,
-                    create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建进货明细表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS purchase_details (
-                    detail_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL,
-                    part_id INTEGER NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    unit_price REAL NOT NULL,
-                    subtotal REAL NOT NULL,
-                    FOREIGN KEY (order_id) REFERENCES purchase_orders (order_id),
-                    FOREIGN KEY (part_id) REFERENCES parts (part_id)
-                )
-            ''')
-            
-            # 创建维修订单表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS repair_orders (
-                    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    customer_id INTEGER NOT NULL,
-                    vehicle_type TEXT,
-                    vehicle_number TEXT,
-                    repair_date DATE NOT NULL,
-                    fault_description TEXT,
-                    repair_content TEXT,
-                    labor_cost REAL DEFAULT 0,
-                    parts_cost REAL DEFAULT 0,
-                    total_amount REAL DEFAULT 0,
-                    status TEXT DEFAULT '进行中',
-                    technician TEXT,
-                    remarks TEXT,
-                    create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    complete_time TIMESTAMP,
-                    FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
-                )
-            ''')
-            
-            # 创建维修配件消耗表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS repair_parts_usage (
-                    usage_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    order_id INTEGER NOT NULL,
-                    part_id INTEGER,
-                    part_name TEXT NOT NULL,
-                    part_source TEXT DEFAULT '库存配件',
-                    quantity_used INTEGER NOT NULL,
-                    unit_price REAL NOT NULL,
-                    subtotal REAL NOT NULL,
-                    remarks TEXT,
-                    FOREIGN KEY (order_id) REFERENCES repair_orders (order_id),
-                    FOREIGN KEY (part_id) REFERENCES parts (part_id)
-                )
-            ''')
-            
-            # 创建索引
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_customer_name ON customers(customer_name)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_repair_date ON repair_orders(repair_date)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_customer_repair ON repair_orders(customer_id, repair_date)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_parts_usage ON repair_parts_usage(part_id, order_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_part_code ON parts(part_code)')
-            
+            if conn.in_transaction:
+                # 嵌套调用：并入外层事务，由外层负责提交
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
             conn.commit()
+    
+    def execute_many(self, query, rows, batch_size=None, conn=None):
+        """分批 executemany 写入，全部批次在同一事务中提交
+        
+        rows 可以是任意可迭代对象（如生成器），按批读取，不会整体载入内存。
+        传入 conn 时在调用方的事务中执行，由调用方提交。返回 BulkResult。
+        """
+        if conn is None:
+            start = time.perf_counter()
+            with self.transaction(immediate=True) as conn:
+                result = self.execute_many(query, rows, batch_size, conn)
+            return BulkResult(result.rows, time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        count = 0
+        for batch in iter_batches(rows, batch_size or BULK_BATCH_SIZE):
+            conn.executemany(query, batch)
+            count += len(batch)
+        return BulkResult(count, time.perf_counter() - start)
+    
+    @staticmethod
+    def _backup_progress(progress_callback):
+        """把 sqlite3 的 progress(status, remaining, total) 转换为 callback(已复制页数, 总页数)"""
+        if progress_callback is None:
+            return None
+        return lambda status, remaining, total: progress_callback(total - remaining, total)
+    
+    def backup_to(self, target_path, pages=None, progress_callback=None):
+        """使用SQLite在线备份接口把当前数据库复制到 target_path
+        
+        每步复制 pages 页，步与步之间其他线程可以正常使用数据库；备份内容是开始
+        备份时的一致快照。progress_callback(已复制页数, 总页数) 每步调用一次。
+        """
+        target = sqlite3.connect(str(target_path))
+        try:
+            with self.get_connection() as conn:
+                # 在整个备份期间保持同一个读事务（WAL快照），其他连接的写入不会
+                # 使备份从头重来，也不会被备份阻塞
+                conn.execute("BEGIN")
+                try:
+                    conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                    conn.backup(target, pages=pages or BACKUP_PAGES_PER_STEP,
+                                progress=self._backup_progress(progress_callback),
+                                sleep=BACKUP_RETRY_SLEEP)
+                finally:
+                    conn.rollback()
+        finally:
+            target.close()
+    
+    def restore_from(self, source_path, pages=None, progress_callback=None):
+        """使用SQLite在线备份接口把 source_path 的内容恢复到当前数据库
+        
+        先清空连接池（等待所有连接归还并关闭），再以单独的连接整体覆盖数据库页，
+        恢复期间其他线程申请连接会等待。调用线程不能持有连接。
+        """
+        # as_uri() 对路径中的 # ? % 等字符做百分号编码，避免被当作URI的片段、参数
+        source = sqlite3.connect(Path(source_path).resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            with self.pool.drained():
+                target = sqlite3.connect(str(self.db_path), timeout=DB_TIMEOUT)
+                try:
+                    source.backup(target, pages=pages or BACKUP_PAGES_PER_STEP,
+                                  progress=self._backup_progress(progress_callback),
+                                  sleep=BACKUP_RETRY_SLEEP)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+        self._fulltext_tables = None
+    
+    def get_pool_stats(self):
+        """获取连接池统计信息"""
+        return self.pool.get_stats()
+    
+    def get_active_pragmas(self):
+        """获取当前连接实际生效的PRAGMA值"""
+        active = {}
+        with self.get_connection() as conn:
+            for name in self.pool.pragmas:
+                row = conn.execute(f"PRAGMA {name}").fetchone()
+                active[name] = row[0] if row else None
+        return active
+    
+    def check_pragma_profile(self):
+        """启动检查：报告生效的日志模式等配置，返回与配置不一致的项"""
+        active = self.get_active_pragmas()
+        mismatches = {}
+        for name, expected in self.pool.pragmas.items():
+            actual = active.get(name)
+            if not self._pragma_matches(name, expected, actual):
+                mismatches[name] = (expected, actual)
+        
+        logging.info(f"数据库日志模式: {active.get('journal_mode')}，"
+                     f"同步级别: {active.get('synchronous')}")
+        for name, (expected, actual) in mismatches.items():
+            logging.warning(f"PRAGMA {name} 未按配置生效: 期望 {expected}，实际 {actual}")
+        return active, mismatches
+    
+    @staticmethod
+    def _pragma_matches(name, expected, actual):
+        """比较PRAGMA配置值与查询结果（synchronous、temp_store 查询结果为数字）"""
+        if str(actual).lower() == str(expected).lower():
+            return True
+        levels = {
+            'synchronous': {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3},
+            'temp_store': {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2},
+        }
+        return levels.get(name, {}).get(str(expected).upper()) == actual
+    
+    def init_database(self, progress_callback=None):
+        """初始化数据库：执行尚未应用的结构迁移（见 models/migrations.py），返回执行的步数
+        
+        结构版本（PRAGMA user_version）已是最新时只读取一次版本号，不执行任何DDL。
+        progress_callback(migration, done, total) 在大表数据回填时报告进度。
+        """
+        from .migrations import SCHEMA_VERSION, get_schema_version, run_migrations
+        
+        with self.get_connection() as conn:
+            if get_schema_version(conn) == SCHEMA_VERSION:
+                return 0
+            count = run_migrations(self, conn, progress_callback)
+            # 全文索引是否可用在首次搜索时重新检查
+            self._fulltext_tables = None
             logging.info("数据库初始化完成")
+            return count
+    
+    def optimize(self):
+        """执行 PRAGMA optimize，更新过期的统计信息（程序长时间运行时定期调用）"""
+        started = time.perf_counter()
+        with self.get_connection() as conn:
+            conn.execute('PRAGMA optimize').fetchall()
+        logging.info(f"PRAGMA optimize 完成（{time.perf_counter() - started:.2f} 秒）")
+    
+    def rebuild_daily_revenue(self, conn=None):
+        """从 repair_orders 重新生成 daily_revenue 汇总表，返回汇总的天数"""
+        if conn is None:
+            with self.transaction(immediate=True) as conn:
+                return self.rebuild_daily_revenue(conn)
+        
+        conn.execute("DELETE FROM daily_revenue")
+        cursor = conn.execute('''
+            INSERT INTO daily_revenue (repair_date, order_count, total_amount, labor_cost, parts_cost)
+            SELECT repair_date, COUNT(*), TOTAL(total_amount), TOTAL(labor_cost), TOTAL(parts_cost)
+            FROM repair_orders
+            WHERE status = '已完成'
+            GROUP BY repair_date
+        ''')
+        logging.info(f"已重建日收入汇总表，共 {cursor.rowcount} 天")
+        return cursor.rowcount
+    
+    def rebuild_table_counts(self, conn=None):
+        """重新统计各业务表的行数（COUNT(*) 全表扫描）"""
+        if conn is None:
+            with self.transaction(immediate=True) as conn:
+                return self.rebuild_table_counts(conn)
+        
+        conn.execute("DELETE FROM table_row_counts")
+        for table in COUNTED_TABLES:
+            conn.execute(f"INSERT INTO table_row_counts (table_name, row_count) "
+                         f"SELECT '{table}', COUNT(*) FROM {table}")
+        logging.info("已重建表行数统计")
+    
+    def get_table_counts(self):
+        """读取触发器维护的各业务表行数"""
+        results = self.execute_query("SELECT table_name, row_count FROM table_row_counts")
+        return {row['table_name']: row['row_count'] for row in results}
+    
+    def change_counter(self):
+        """数据库文件的修改计数，两次返回值不同说明期间可能有其他连接（包括其他进程）提交了写入
+        
+        PRAGMA data_version 只在其他连接提交写入后变化，且各连接的值互不相关，
+        因此按连接记录上次读到的值：任一连接的值变化或第一次读到的连接都使计数加一。
+        本连接自身的写入不会反映在其中，进程内的写入由调用方自行记录（如 PartDAO.data_version）。
+        """
+        with self.get_connection() as conn:
+            value = conn.execute('PRAGMA data_version').fetchone()[0]
+        with self._change_lock:
+            seen = self._data_versions.get(id(conn))
+            if seen is None or seen[0] is not conn or seen[1] != value:
+                if len(self._data_versions) >= DB_POOL_SIZE * 2:
+                    self._data_versions.clear()  # 丢弃已关闭连接的记录
+                self._data_versions[id(conn)] = (conn, value)
+                self._change_count += 1
+            return self._change_count
+    
+    def can_fulltext_search(self, fts_table, keyword):
+        """判断关键字能否使用指定的全文索引查询"""
+        if not FULLTEXT_SEARCH_ENABLED or len(keyword) < FULLTEXT_MIN_KEYWORD_LENGTH:
+            return False
+        if self._fulltext_tables is None:
+            rows = self.execute_query("SELECT name FROM sqlite_master WHERE type='table'")
+            self._fulltext_tables = {row[0] for row in rows} & set(FULLTEXT_INDEXES)
+        return fts_table in self._fulltext_tables
     
     def execute_query(self, query, params=None):
         """执行查询语句"""
@@ -158,24 +635,47 @@ class DatabaseManager:
                 cursor.execute(query)
             return cursor.fetchall()
     
+    def iter_query(self, query, params=None, fetch_size=None):
+        """逐批读取查询结果，每次产出一批行（列表）
+        
+        使用 cursor.fetchmany 分批取数，内存占用只与批大小有关，适合导出等大结果集。
+        迭代期间一直占用连接，调用方应迭代完毕或用 contextlib.closing 及时关闭生成器。
+        """
+        fetch_size = fetch_size or EXPORT_FETCH_SIZE
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params or ())
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cursor.close()
+    
     def execute_update(self, query, params=None):
-        """执行更新语句"""
+        """执行更新语句（在 transaction() 中调用时由外层事务提交）"""
         with self.get_connection() as conn:
+            in_transaction = conn.in_transaction
             cursor = conn.cursor()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
-            conn.commit()
+            if not in_transaction:
+                conn.commit()
             return cursor.rowcount
     
     def execute_insert(self, query, params=None):
-        """执行插入语句并返回新记录ID"""
+        """执行插入语句并返回新记录ID（在 transaction() 中调用时由外层事务提交）"""
         with self.get_connection() as conn:
+            in_transaction = conn.in_transaction
             cursor = conn.cursor()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
-            conn.commit()
+            if not in_transaction:
+                conn.commit()
             return cursor.lastrowid
\ No newline at end of file
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库结构迁移
+
+数据库结构的版本号保存在 PRAGMA user_version 中，MIGRATIONS 按版本号顺序
+列出每一步迁移。启动时只执行版本号大于 user_version 的迁移，每完成一步
+就把 user_version 更新为该步的版本号。
+
+每一步迁移都必须可以重复执行（CREATE ... IF NOT EXISTS、先检查列是否存在等）：
+迁移中途中断（断电、进程被结束）后，下次启动会重新执行这一步。
+大表的数据回填使用 backfill() 按 rowid 分段提交，已完成的位置记录在
+migration_progress 表中，重新执行时从上次提交的位置继续。
+"""
+
+import logging
+import sqlite3
+import time
+from collections import namedtuple
+from .database import FULLTEXT_INDEXES, COUNTED_TABLES
+from config.settings import MIGRATION_BATCH_SIZE
+
+# 一步迁移：版本号、说明、执行函数 apply(db_manager, conn, progress_callback)
+Migration = namedtuple('Migration', ['version', 'description', 'apply'])
+
+# 需要规范为 YYYY-MM-DD 格式的日期列
+DATE_COLUMNS = (('repair_orders', 'repair_date'), ('purchase_orders', 'purchase_date'))
+
+# 客户表后来补充的车辆信息列
+CUSTOMER_VEHICLE_COLUMNS = ('license_plate', 'car_model', 'car_color', 'engine_number', 'vin', 'notes')
+
+def get_schema_version(conn):
+    """读取数据库当前的结构版本号"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def backfill(conn, name, table, assignments, where, progress_callback=None,
+             batch_size=MIGRATION_BATCH_SIZE):
+    """分段回填数据：UPDATE table SET assignments WHERE where，返回改写的行数
+
+    name 为本次回填的唯一名称，用于在 migration_progress 中记录进度。
+
+    按 rowid 每 batch_size 行一段，每段的改写与进度记录在同一个事务中提交，
+    写锁每次只持有一段的时间，其他终端的写入不会被长时间阻塞；
+    中断后重新执行时从最后提交的一段之后继续。
+    progress_callback(已处理到的rowid, 最大rowid) 在每段提交后调用。
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS migration_progress (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    row = conn.execute("SELECT last_rowid FROM migration_progress WHERE name = ?", (name,)).fetchone()
+    position = row[0] if row else 0
+    max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+
+    changed = 0
+    while position < max_rowid:
+        end = min(position + batch_size, max_rowid)
+        cursor = conn.execute(f'''
+            UPDATE {table} SET {assignments}
+            WHERE rowid > ? AND rowid <= ? AND ({where})
+        ''', (position, end))
+        changed += cursor.rowcount
+        conn.execute('''
+            INSERT INTO migration_progress (name, last_rowid) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET last_rowid = excluded.last_rowid
+        ''', (name, end))
+        conn.commit()
+        position = end
+        if progress_callback:
+            progress_callback(position, max_rowid)
+
+    conn.execute("DELETE FROM migration_progress WHERE name = ?", (name,))
+    conn.commit()
+    return changed
+
+def _create_base_tables(db_manager, conn, progress_callback):
+    """创建基础业务表及索引"""
+    # 创建配件表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS parts (
+            part_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            part_name TEXT NOT NULL,
+            part_code TEXT UNIQUE,
+            category TEXT,
+            brand TEXT,
+            specification TEXT,
+            unit TEXT DEFAULT '个',
+            purchase_price REAL DEFAULT 0,
+            selling_price REAL DEFAULT 0,
+            stock_quantity INTEGER DEFAULT 0,
+            min_stock INTEGER DEFAULT 10,
+            supplier TEXT,
+            create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 创建客户表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            phone TEXT,
+            address TEXT,
+            vehicle_info TEXT,
+            create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 创建进货单表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS purchase_orders (
+            order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            supplier_name TEXT NOT NULL,
+            purchase_date DATE NOT NULL,
+            total_amount REAL DEFAULT 0,
+            status TEXT DEFAULT '已完成',
+            operator TEXT,
+            remarks TEXT,
+            create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 创建进货明细表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS purchase_details (
+            detail_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            part_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            subtotal REAL NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES purchase_orders (order_id),
+            FOREIGN KEY (part_id) REFERENCES parts (part_id)
+        )
+    ''')
+
+    # 创建维修订单表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS repair_orders (
+            order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL,
+            vehicle_type TEXT,
+            vehicle_number TEXT,
+            repair_date DATE NOT NULL,
+            fault_description TEXT,
+            repair_content TEXT,
+            labor_cost REAL DEFAULT 0,
+            parts_cost REAL DEFAULT 0,
+            total_amount REAL DEFAULT 0,
+            status TEXT DEFAULT '进行中',
+            technician TEXT,
+            remarks TEXT,
+            create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            complete_time TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
+        )
+    ''')
+
+    # 创建维修配件消耗表
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS repair_parts_usage (
+            usage_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            part_id INTEGER,
+            part_name TEXT NOT NULL,
+            part_source TEXT DEFAULT '库存配件',
+            quantity_used INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            subtotal REAL NOT NULL,
+            remarks TEXT,
+            FOREIGN KEY (order_id) REFERENCES repair_orders (order_id),
+            FOREIGN KEY (part_id) REFERENCES parts (part_id)
+        )
+    ''')
+
+    # 创建索引
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_customer_name ON customers(customer_name)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_repair_date ON repair_orders(repair_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_customer_repair ON repair_orders(customer_id, repair_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_parts_usage ON repair_parts_usage(part_id, order_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_part_code ON parts(part_code)')
+
+def _add_customer_vehicle_columns(db_manager, conn, progress_callback):
+    """客户表补充车牌号、车型等列（ADD COLUMN 只改表定义，不重写已有数据）"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(customers)")}
+    for column in CUSTOMER_VEHICLE_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE customers ADD COLUMN {column} TEXT")
+
+def _create_fulltext_indexes(db_manager, conn, progress_callback):
+    """创建FTS5全文索引及同步触发器（trigram分词，支持中文和部分车牌号）
+
+    SQLite未编译FTS5或不支持trigram时跳过，搜索自动使用LIKE。
+    """
+    for fts_table, (table, key, columns) in FULLTEXT_INDEXES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        try:
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {column_list}, content='{table}', content_rowid='{key}',
+                    tokenize='trigram'
+                )
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.{key}, {new_values});
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                    VALUES ('delete', old.{key}, {old_values});
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} BEGIN
+                    INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                    VALUES ('delete', old.{key}, {old_values});
+                    INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.{key}, {new_values});
+                END
+            ''')
+            # 为已有数据建立索引
+            conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            logging.warning(f"全文索引 {fts_table} 不可用，搜索将使用LIKE: {e}")
+
+def _normalize_dates(db_manager, conn, progress_callback):
+    """把旧数据中带时间或格式不一致的日期列统一改写为 YYYY-MM-DD"""
+    total = 0
+    for table, column in DATE_COLUMNS:
+        total += backfill(conn, f'normalize_dates.{table}', table, f"{column} = date({column})",
+                          f"date({column}) IS NOT NULL AND {column} IS NOT date({column})",
+                          progress_callback)
+    if total:
+        logging.info(f"已规范 {total} 条记录的日期格式")
+
+def _create_daily_revenue(db_manager, conn, progress_callback):
+    """创建按日汇总的已完成订单收入表，由触发器随 repair_orders 的写入增量维护"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_revenue (
+            repair_date DATE PRIMARY KEY,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0,
+            labor_cost REAL NOT NULL DEFAULT 0,
+            parts_cost REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    # 计入一个已完成订单（new）/ 扣除一个已完成订单（old）
+    add_new = '''
+        INSERT INTO daily_revenue (repair_date, order_count, total_amount, labor_cost, parts_cost)
+        VALUES (new.repair_date, 1, IFNULL(new.total_amount, 0), IFNULL(new.labor_cost, 0),
+                IFNULL(new.parts_cost, 0))
+        ON CONFLICT(repair_date) DO UPDATE SET
+            order_count = order_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            labor_cost = labor_cost + excluded.labor_cost,
+            parts_cost = parts_cost + excluded.parts_cost;
+    '''
+    remove_old = '''
+        UPDATE daily_revenue SET
+            order_count = order_count - 1,
+            total_amount = total_amount - IFNULL(old.total_amount, 0),
+            labor_cost = labor_cost - IFNULL(old.labor_cost, 0),
+            parts_cost = parts_cost - IFNULL(old.parts_cost, 0)
+        WHERE repair_date = old.repair_date;
+        DELETE FROM daily_revenue WHERE repair_date = old.repair_date AND order_count <= 0;
+    '''
+    watched = 'status, repair_date, total_amount, labor_cost, parts_cost'
+    triggers = {
+        'daily_revenue_ai': f"AFTER INSERT ON repair_orders WHEN new.status = '已完成' BEGIN {add_new} END",
+        'daily_revenue_ad': f"AFTER DELETE ON repair_orders WHEN old.status = '已完成' BEGIN {remove_old} END",
+        # 更新时先扣除旧值再计入新值，状态、日期、金额的变化都能正确反映
+        'daily_revenue_au_old': f"AFTER UPDATE OF {watched} ON repair_orders "
+                                f"WHEN old.status = '已完成' BEGIN {remove_old} END",
+        'daily_revenue_au_new': f"AFTER UPDATE OF {watched} ON repair_orders "
+                                f"WHEN new.status = '已完成' BEGIN {add_new} END",
+    }
+    for name, body in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    db_manager.rebuild_daily_revenue(conn)
+
+def _create_table_counts(db_manager, conn, progress_callback):
+    """创建业务表行数统计表，由触发器在插入/删除时增减，查询行数不必扫描整表"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_row_counts (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for table in COUNTED_TABLES:
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_ai AFTER INSERT ON {table} BEGIN
+                UPDATE table_row_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_ad AFTER DELETE ON {table} BEGIN
+                UPDATE table_row_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+            END
+        ''')
+    db_manager.rebuild_table_counts(conn)
+
+def _create_filter_indexes(db_manager, conn, progress_callback):
+    """补充常用筛选条件的索引"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_parts_category ON parts(category, part_name)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_customer_phone ON customers(phone)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_repair_status ON repair_orders(status, repair_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_usage_order ON repair_parts_usage(order_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_purchase_date ON purchase_orders(purchase_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_purchase_details_order ON purchase_details(order_id)')
+    # 部分索引：只包含库存不足的配件，库存预警列表不必扫描整个配件表
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_parts_low_stock ON parts(stock_quantity)
+        WHERE stock_quantity <= min_stock
+    ''')
+
+def _analyze(db_manager, conn, progress_callback):
+    """数据库从未收集过统计信息时执行一次 ANALYZE
+
+    之后由连接关闭前和定期执行的 PRAGMA optimize 在数据量明显变化时更新。
+    抽样行数受 analysis_limit 限制，大库上也只需很短时间。
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        return
+    conn.execute('ANALYZE')
+
+def _limit_fulltext_update_triggers(db_manager, conn, progress_callback):
+    """全文索引的更新触发器只在被索引的列变化时执行
+
+    第3步创建的 _au 触发器没有列清单，修改库存、价格等任何列都会删除并重建索引行。
+    """
+    for fts_table, (table, key, columns) in FULLTEXT_INDEXES.items():
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                            (fts_table,)).fetchone():
+            continue  # 全文索引不可用，搜索使用LIKE
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        conn.execute(f'DROP TRIGGER IF EXISTS {fts_table}_au')
+        conn.execute(f'''
+            CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                VALUES ('delete', old.{key}, {old_values});
+                INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.{key}, {new_values});
+            END
+        ''')
+
+# 版本号从1开始连续递增；已发布的迁移不再修改，结构变化一律追加新的一步
+MIGRATIONS = (
+    Migration(1, "创建基础业务表", _create_base_tables),
+    Migration(2, "客户表补充车辆信息列", _add_customer_vehicle_columns),
+    Migration(3, "创建全文索引", _create_fulltext_indexes),
+    Migration(4, "规范日期格式", _normalize_dates),
+    Migration(5, "创建日收入汇总表", _create_daily_revenue),
+    Migration(6, "创建表行数统计", _create_table_counts),
+    Migration(7, "补充常用查询索引", _create_filter_indexes),
+    Migration(8, "收集查询统计信息", _analyze),
+    Migration(9, "全文索引只在索引列变化时更新", _limit_fulltext_update_triggers),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+def run_migrations(db_manager, conn, progress_callback=None):
+    """执行所有尚未应用的迁移，返回执行的步数
+
+    progress_callback(migration, done, total) 在数据回填的每段提交后调用。
+    """
+    current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        logging.warning(f"数据库结构版本 {current} 高于程序支持的版本 {SCHEMA_VERSION}，"
+                        f"请升级程序")
+        return 0
+
+    pending = [migration for migration in MIGRATIONS if migration.version > current]
+    for migration in pending:
+        started = time.perf_counter()
+        logging.info(f"执行数据库迁移 {migration.version}: {migration.description}")
+        report = None
+        if progress_callback:
+            report = lambda done, total, migration=migration: progress_callback(migration, done, total)
+        migration.apply(db_manager, conn, report)
+        conn.commit()
+        conn.execute(f'PRAGMA user_version = {migration.version}')
+        logging.info(f"数据库迁移 {migration.version} 完成（{time.perf_counter() - started:.2f} 秒）")
+    return len(pending)
@@ -4,13 +4,23 @@
 订单模型
 """
 
+import logging
+import time
+from collections import namedtuple, defaultdict
 from datetime import datetime, date
-from .database import DatabaseManager
-from config.settings import DATABASE_PATH
+from .base import RowModel
+from .database import DatabaseManager, BulkResult, iter_batches
+from .parts import PartDAO
+from config.settings import DATABASE_PATH, BULK_BATCH_SIZE
 
-class RepairOrder:
+class RepairOrder(RowModel):
     """维修订单模型类"""
     
+    __slots__ = ('order_id', 'customer_id', 'vehicle_type', 'vehicle_number', 'repair_date',
+                 'fault_description', 'repair_content', 'labor_cost', 'parts_cost',
+                 'total_amount', 'status', 'technician', 'remarks', 'create_time',
+                 'complete_time', '_order_number')
+    
     def __init__(self, order_id=None, customer_id=None, vehicle_type="", 
                  vehicle_number="", repair_date=None, fault_description="", 
                  repair_content="", labor_cost=0.0, parts_cost=0.0, 
@@ -30,12 +40,23 @@ class RepairOrder:
         self.remarks = remarks
         self.create_time = None
         self.complete_time = None
-        # 生成订单号（如果是新订单则生成新号码，如果是从数据库加载则使用ID生成）
-        self.order_number = f"RO{order_id:06d}" if order_id else self._generate_order_number()
+        self._order_number = None
+    
+    @property
+    def order_number(self):
+        """订单号（已保存的订单由ID生成，新订单在首次使用时按时间生成）"""
+        if self._order_number is None:
+            if self.order_id:
+                return f"RO{self.order_id:06d}"
+            self._order_number = self._generate_order_number()
+        return self._order_number
+    
+    @order_number.setter
+    def order_number(self, value):
+        self._order_number = value
     
     def _generate_order_number(self):
         """生成订单号"""
-        from datetime import datetime
         now = datetime.now()
         return f"RO{now.strftime('%Y%m%d%H%M%S')}"
     
@@ -65,28 +86,80 @@ class RepairOrder:
         for key, value in data.items():
             if hasattr(order, key):
                 setattr(order, key, value)
-        
-        # 处理日期字段
-        if 'repair_date' in data and data['repair_date']:
-            try:
-                if isinstance(data['repair_date'], str):
-                    # 尝试解析不同的日期格式
-                    try:
-                        order.repair_date = datetime.strptime(data['repair_date'], '%Y-%m-%d').date()
-                    except ValueError:
-                        order.repair_date = datetime.strptime(data['repair_date'], '%Y-%m-%d %H:%M:%S').date()
-                elif hasattr(data['repair_date'], 'date'):
-                    order.repair_date = data['repair_date'].date()
-                else:
-                    order.repair_date = data['repair_date']
-            except (ValueError, TypeError, AttributeError):
-                order.repair_date = date.today()
-        
+        order._after_load()
         return order
+    
+    def _after_load(self):
+        """处理日期字段（数据库读出的已是 date，这里只处理字典传入的文本和 datetime）"""
+        repair_date = self.repair_date
+        if isinstance(repair_date, datetime):
+            self.repair_date = repair_date.date()
+        elif isinstance(repair_date, str) and repair_date:
+            try:
+                self.repair_date = date.fromisoformat(repair_date[:10])
+            except ValueError:
+                self.repair_date = date.today()
+
+class OrderListRow(namedtuple('OrderListRow', [
+        'order_id', 'customer_id', 'customer_name', 'license_plate',
+        'vehicle_type', 'vehicle_number', 'repair_date', 'fault_description',
+        'repair_content', 'labor_cost', 'parts_cost', 'total_amount',
+        'status', 'technician'])):
+    """订单列表行（订单字段 + 客户姓名、车牌号），用于列表显示"""
+    
+    __slots__ = ()
+    
+    # 与 get_order_list 查询的列顺序一致
+    SELECT_COLUMNS = '''
+        ro.order_id, ro.customer_id, c.customer_name, c.license_plate,
+        ro.vehicle_type, ro.vehicle_number, ro.repair_date, ro.fault_description,
+        ro.repair_content, ro.labor_cost, ro.parts_cost, ro.total_amount,
+        ro.status, ro.technician
+    '''
+    
+    @property
+    def order_number(self):
+        """订单号"""
+        return f"RO{self.order_id:06d}"
+    
+    @property
+    def sort_key(self):
+        """键集分页使用的排序键"""
+        return (self.repair_date, self.order_id)
+    
+    @property
+    def repair_date_text(self):
+        """维修日期（YYYY-MM-DD）"""
+        return str(self.repair_date)[:10] if self.repair_date else ''
 
-class PurchaseOrder:
+class OrderStatistics(namedtuple('OrderStatistics', [
+        'total_orders', 'completed_orders', 'pending_orders',
+        'total_revenue', 'total_labor_cost', 'total_parts_cost'])):
+    """订单统计结果（金额只统计已完成订单）"""
+    
+    __slots__ = ()
+    
+    @classmethod
+    def from_summary(cls, summary):
+        """由 RepairOrderDAO.get_order_summary 的按状态汇总结果生成"""
+        total_orders = sum(row['order_count'] for row in summary.values())
+        completed = summary.get('已完成', {})
+        completed_orders = completed.get('order_count', 0)
+        return cls(
+            total_orders=total_orders,
+            completed_orders=completed_orders,
+            pending_orders=total_orders - completed_orders,
+            total_revenue=completed.get('total_amount', 0),
+            total_labor_cost=completed.get('labor_cost', 0),
+            total_parts_cost=completed.get('parts_cost', 0)
+        )
+
+class PurchaseOrder(RowModel):
     """进货订单模型类"""
     
+    __slots__ = ('order_id', 'supplier_name', 'purchase_date', 'total_amount', 'status',
+                 'operator', 'remarks', 'create_time')
+    
     def __init__(self, order_id=None, supplier_name="", purchase_date=None, 
                  total_amount=0.0, status="已完成", operator="", remarks=""):
         self.order_id = order_id
@@ -150,58 +223,126 @@ class RepairOrderDAO:
     """维修订单数据访问对象"""
     
     def __init__(self):
-        self.db_manager = DatabaseManager(DATABASE_PATH)
+        self.db_manager = DatabaseManager.get_shared(DATABASE_PATH)
+        self.part_dao = PartDAO()
+    
+    INSERT_QUERY = '''
+        INSERT INTO repair_orders (customer_id, vehicle_type, vehicle_number, 
+                                 repair_date, fault_description, repair_content, 
+                                 labor_cost, parts_cost, total_amount, status, 
+                                 technician, remarks)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    USAGE_INSERT_QUERY = '''
+        INSERT INTO repair_parts_usage (order_id, part_id, part_name, part_source, 
+                                       quantity_used, unit_price, subtotal, remarks)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _insert_params(order):
+        """维修订单插入参数"""
+        return (
+            order.customer_id, order.vehicle_type, order.vehicle_number,
+            order.repair_date, order.fault_description, order.repair_content,
+            order.labor_cost, order.parts_cost, order.total_amount,
+            order.status, order.technician, order.remarks
+        )
+    
+    @staticmethod
+    def _usage_params(order_id, usage):
+        """配件使用记录插入参数"""
+        return (
+            order_id, usage.part_id, usage.part_name, usage.part_source,
+            usage.quantity_used, usage.unit_price, usage.subtotal, usage.remarks
+        )
+    
+    @staticmethod
+    def _stock_deductions(parts_usage, stock_changes):
+        """累加库存配件的消耗量（同一配件多行合并），客户自带配件不影响库存"""
+        for usage in parts_usage or ():
+            if usage.part_source == '库存配件' and usage.part_id:
+                stock_changes[usage.part_id] -= usage.quantity_used
+        return stock_changes
+    
+    def _check_stock(self, conn, parts_usage):
+        """在写事务中用一次查询校验库存配件是否存在、库存是否充足
+        
+        同一配件的多行按合计数量校验；配件名称以数据库中的为准。
+        """
+        deductions = self._stock_deductions(parts_usage, defaultdict(int))
+        if not deductions:
+            return deductions
+        
+        parts = self.part_dao.get_parts_by_ids(deductions, conn)
+        for usage in parts_usage:
+            if usage.part_source != '库存配件' or not usage.part_id:
+                continue
+            part = parts.get(usage.part_id)
+            if not part:
+                raise ValueError(f"配件ID {usage.part_id} 不存在")
+            if part.stock_quantity < -deductions[usage.part_id]:
+                raise ValueError(f"配件 {part.part_name} 库存不足")
+            usage.part_name = part.part_name
+        return deductions
     
     def add_repair_order(self, order, parts_usage=None):
-        """添加维修订单（包含配件使用记录）"""
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            try:
-                # 插入维修订单
-                query = '''
-                    INSERT INTO repair_orders (customer_id, vehicle_type, vehicle_number, 
-                                             repair_date, fault_description, repair_content, 
-                                             labor_cost, parts_cost, total_amount, status, 
-                                             technician, remarks)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                '''
-                params = (
-                    order.customer_id, order.vehicle_type, order.vehicle_number,
-                    order.repair_date, order.fault_description, order.repair_content,
-                    order.labor_cost, order.parts_cost, order.total_amount,
-                    order.status, order.technician, order.remarks
-                )
-                cursor.execute(query, params)
-                order_id = cursor.lastrowid
+        """添加维修订单（包含配件使用记录）
+        
+        库存校验、订单写入和库存扣减在同一个 BEGIN IMMEDIATE 事务中完成，
+        多个终端同时开单时不会出现校验通过后库存被别人用掉的情况。
+        """
+        with self.db_manager.transaction(immediate=True) as conn:
+            stock_changes = self._check_stock(conn, parts_usage or [])
+            
+            # 插入维修订单
+            order_id = conn.execute(self.INSERT_QUERY, self._insert_params(order)).lastrowid
+            
+            # 插入配件使用记录并按配件合并后一次性扣减库存
+            if parts_usage:
+                conn.executemany(self.USAGE_INSERT_QUERY,
+                                 [self._usage_params(order_id, usage) for usage in parts_usage])
+                PartDAO.apply_stock_changes(conn, stock_changes)
+        
+        if stock_changes:
+            PartDAO.mark_changed()
+        return order_id
+    
+    def bulk_add_repair_orders(self, orders, batch_size=None):
+        """批量添加维修订单，所有批次在同一事务中写入，返回 BulkResult
+        
+        orders 为 (order, parts_usage) 二元组的可迭代对象，parts_usage 可为 None。
+        写入后各 order 对象的 order_id 会被设置为新记录ID。库存配件与 add_repair_order
+        一样校验，任何一单的配件不存在或库存不足时整个导入回滚。
+        """
+        start = time.perf_counter()
+        count = 0
+        with self.db_manager.transaction(immediate=True) as conn:
+            for batch in iter_batches(orders, batch_size or BULK_BATCH_SIZE):
+                # 本批所有配件行按配件合计后一次校验，之前批次的扣减已写入，读到的是扣减后的库存
+                stock_changes = self._check_stock(
+                    conn, [usage for _, parts_usage in batch for usage in parts_usage or ()])
+                
+                conn.executemany(self.INSERT_QUERY, [self._insert_params(order) for order, _ in batch])
+                # 持有写锁时同一批插入的自增ID是连续的，由最后一行ID倒推每个订单的ID
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
                 
-                # 插入配件使用记录并更新库存
-                if parts_usage:
-                    for usage in parts_usage:
-                        # 插入使用记录
-                        usage_query = '''
-                            INSERT INTO repair_parts_usage (order_id, part_id, part_name, part_source, 
-                                                           quantity_used, unit_price, subtotal, remarks)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        '''
-                        cursor.execute(usage_query, (
-                            order_id, usage.part_id, usage.part_name, usage.part_source,
-                            usage.quantity_used, usage.unit_price, usage.subtotal, usage.remarks
-                        ))
-                        
-                        # 只有库存配件才需要更新库存
-                        if usage.part_source == '库存配件' and usage.part_id:
-                            stock_query = '''
-                                UPDATE parts SET stock_quantity = stock_quantity - ?, 
-                                               update_time = CURRENT_TIMESTAMP
-                                WHERE part_id = ?
-                            '''
-                            cursor.execute(stock_query, (usage.quantity_used, usage.part_id))
+                usage_rows = []
+                for order_id, (order, parts_usage) in enumerate(batch, last_id - len(batch) + 1):
+                    order.order_id = order_id
+                    order.order_number = f"RO{order_id:06d}"
+                    usage_rows.extend(self._usage_params(order_id, usage) for usage in parts_usage or ())
                 
-                conn.commit()
-                return order_id
-            except Exception as e:
-                conn.rollback()
-                raise e
+                if usage_rows:
+                    conn.executemany(self.USAGE_INSERT_QUERY, usage_rows)
+                PartDAO.apply_stock_changes(conn, stock_changes)
+                count += len(batch)
+        
+        PartDAO.mark_changed()
+        result = BulkResult(count, time.perf_counter() - start)
+        logging.info(f"批量添加维修订单: {result}")
+        return result
     
     def update_repair_order(self, order):
         """更新维修订单"""
@@ -225,7 +366,7 @@ class RepairOrderDAO:
         query = "SELECT * FROM repair_orders WHERE order_id=?"
         result = self.db_manager.execute_query(query, (order_id,))
         if result:
-            return RepairOrder.from_dict(dict(result[0]))
+            return RepairOrder.from_row(result[0])
         return None
     
     def get_repair_order_by_number(self, order_number):
@@ -241,7 +382,7 @@ class RepairOrderDAO:
         """获取所有维修订单"""
         query = "SELECT * FROM repair_orders ORDER BY repair_date DESC, order_id DESC LIMIT ?"
         results = self.db_manager.execute_query(query, (limit,))
-        return [RepairOrder.from_dict(dict(row)) for row in results]
+        return RepairOrder.from_rows(results)
     
     def search_repair_orders(self, customer_name="", start_date=None, end_date=None, status=""):
         """搜索维修订单"""
@@ -271,7 +412,130 @@ class RepairOrderDAO:
         
         query += " ORDER BY ro.repair_date DESC, ro.order_id DESC"
         results = self.db_manager.execute_query(query, params)
-        return [RepairOrder.from_dict(dict(row)) for row in results]
+        return RepairOrder.from_rows(results)
+    
+    def _order_list_filters(self, customer_name="", start_date=None, end_date=None, status="",
+                            customer_keyword="", order_number="", vehicle_number="",
+                            technician="", customer_id=None):
+        """构造订单列表的过滤条件，返回 (WHERE子句, 参数列表)"""
+        where = "WHERE 1=1"
+        params = []
+        
+        if customer_id is not None:
+            where += " AND ro.customer_id = ?"
+            params.append(customer_id)
+        
+        if customer_name:
+            where += " AND c.customer_name LIKE ?"
+            params.append(f"%{customer_name}%")
+        
+        if customer_keyword:
+            where += " AND (c.customer_name LIKE ? OR c.license_plate LIKE ?)"
+            params.extend([f"%{customer_keyword}%", f"%{customer_keyword}%"])
+        
+        if order_number:
+            where += " AND printf('RO%06d', ro.order_id) LIKE ?"
+            params.append(f"%{order_number}%")
+        
+        if vehicle_number:
+            where += " AND ro.vehicle_number LIKE ?"
+            params.append(f"%{vehicle_number}%")
+        
+        if technician:
+            where += " AND ro.technician LIKE ?"
+            params.append(f"%{technician}%")
+        
+        if start_date:
+            where += " AND ro.repair_date >= ?"
+            params.append(start_date)
+        
+        if end_date:
+            where += " AND ro.repair_date <= ?"
+            params.append(end_date)
+        
+        if status:
+            where += " AND ro.status = ?"
+            params.append(status)
+        
+        return where, params
+    
+    def get_order_list(self, limit=None, after=None, before=None, **filters):
+        """获取订单列表（一次查询带出客户姓名和车牌号）
+        
+        列表按 (repair_date, order_id) 倒序排列。after/before 为某一行的
+        sort_key，用于键集分页：after 取该行之后的一页，before 取该行之前的一页。
+        过滤参数见 _order_list_filters。
+        """
+        where, params = self._order_list_filters(**filters)
+        direction = "DESC"
+        if after is not None:
+            where += " AND (ro.repair_date, ro.order_id) < (?, ?)"
+            params.extend(after)
+        elif before is not None:
+            where += " AND (ro.repair_date, ro.order_id) > (?, ?)"
+            params.extend(before)
+            direction = "ASC"
+        
+        query = f'''
+            SELECT {OrderListRow.SELECT_COLUMNS}
+            FROM repair_orders ro 
+            LEFT JOIN customers c ON ro.customer_id = c.customer_id 
+            {where}
+            ORDER BY ro.repair_date {direction}, ro.order_id {direction}
+        '''
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        results = self.db_manager.execute_query(query, params)
+        rows = [OrderListRow._make(row) for row in results]
+        if direction == "ASC":
+            rows.reverse()
+        return rows
+    
+    def iter_order_list(self, **filters):
+        """按 get_order_list 的顺序和过滤条件逐批读取全部订单（用于导出）
+        
+        结果从游标分批取出，逐行产出 OrderListRow，内存占用与订单总数无关。
+        """
+        where, params = self._order_list_filters(**filters)
+        query = f'''
+            SELECT {OrderListRow.SELECT_COLUMNS}
+            FROM repair_orders ro 
+            LEFT JOIN customers c ON ro.customer_id = c.customer_id 
+            {where}
+            ORDER BY ro.repair_date DESC, ro.order_id DESC
+        '''
+        for rows in self.db_manager.iter_query(query, params):
+            yield from map(OrderListRow._make, rows)
+    
+    def count_orders(self, **filters):
+        """统计符合过滤条件的订单数（过滤参数同 get_order_list）"""
+        where, params = self._order_list_filters(**filters)
+        query = f'''
+            SELECT COUNT(*)
+            FROM repair_orders ro 
+            LEFT JOIN customers c ON ro.customer_id = c.customer_id 
+            {where}
+        '''
+        return self.db_manager.execute_query(query, params)[0][0]
+    
+    def get_order_summary(self, **filters):
+        """按状态汇总订单数量和金额（过滤参数同 get_order_list）"""
+        where, params = self._order_list_filters(**filters)
+        query = f'''
+            SELECT ro.status,
+                   COUNT(*) as order_count,
+                   COALESCE(SUM(ro.total_amount), 0) as total_amount,
+                   COALESCE(SUM(ro.labor_cost), 0) as labor_cost,
+                   COALESCE(SUM(ro.parts_cost), 0) as parts_cost
+            FROM repair_orders ro 
+            LEFT JOIN customers c ON ro.customer_id = c.customer_id 
+            {where}
+            GROUP BY ro.status
+        '''
+        results = self.db_manager.execute_query(query, params)
+        return {row['status']: dict(row) for row in results}
     
     def get_repair_parts_usage(self, order_id):
         """获取维修订单的配件使用记录"""
@@ -288,58 +552,48 @@ class PurchaseOrderDAO:
     """进货订单数据访问对象"""
     
     def __init__(self):
-        self.db_manager = DatabaseManager(DATABASE_PATH)
+        self.db_manager = DatabaseManager.get_shared(DATABASE_PATH)
     
     def add_purchase_order(self, order, purchase_details=None):
         """添加进货订单（包含进货明细）"""
-        with self.db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            try:
-                # 插入进货订单
-                query = '''
-                    INSERT INTO purchase_orders (supplier_name, purchase_date, total_amount, 
-                                                status, operator, remarks)
-                    VALUES (?, ?, ?, ?, ?, ?)
+        with self.db_manager.transaction() as conn:
+            # 插入进货订单
+            query = '''
+                INSERT INTO purchase_orders (supplier_name, purchase_date, total_amount, 
+                                            status, operator, remarks)
+                VALUES (?, ?, ?, ?, ?, ?)
+            '''
+            params = (
+                order.supplier_name, order.purchase_date, order.total_amount,
+                order.status, order.operator, order.remarks
+            )
+            order_id = conn.execute(query, params).lastrowid
+            
+            # 插入进货明细并按配件合并后一次性增加库存
+            if purchase_details:
+                detail_query = '''
+                    INSERT INTO purchase_details (order_id, part_id, quantity, unit_price, subtotal)
+                    VALUES (?, ?, ?, ?, ?)
                 '''
-                params = (
-                    order.supplier_name, order.purchase_date, order.total_amount,
-                    order.status, order.operator, order.remarks
-                )
-                cursor.execute(query, params)
-                order_id = cursor.lastrowid
+                conn.executemany(detail_query, [
+                    (order_id, detail.part_id, detail.quantity, detail.unit_price, detail.subtotal)
+                    for detail in purchase_details
+                ])
                 
-                # 插入进货明细并更新库存
-                if purchase_details:
-                    for detail in purchase_details:
-                        # 插入明细记录
-                        detail_query = '''
-                            INSERT INTO purchase_details (order_id, part_id, quantity, unit_price, subtotal)
-                            VALUES (?, ?, ?, ?, ?)
-                        '''
-                        cursor.execute(detail_query, (
-                            order_id, detail.part_id, detail.quantity, 
-                            detail.unit_price, detail.subtotal
-                        ))
-                        
-                        # 更新库存
-                        stock_query = '''
-                            UPDATE parts SET stock_quantity = stock_quantity + ?, 
-                                           update_time = CURRENT_TIMESTAMP
-                            WHERE part_id = ?
-                        '''
-                        cursor.execute(stock_query, (detail.quantity, detail.part_id))
-                
-                conn.commit()
-                return order_id
-            except Exception as e:
-                conn.rollback()
-                raise e
+                stock_changes = defaultdict(int)
+                for detail in purchase_details:
+                    stock_changes[detail.part_id] += detail.quantity
+                PartDAO.apply_stock_changes(conn, stock_changes)
+        
+        if purchase_details:
+            PartDAO.mark_changed()
+        return order_id
     
     def get_all_purchase_orders(self, limit=100):
         """获取所有进货订单"""
         query = "SELECT * FROM purchase_orders ORDER BY purchase_date DESC, order_id DESC LIMIT ?"
         results = self.db_manager.execute_query(query, (limit,))
-        return [PurchaseOrder.from_dict(dict(row)) for row in results]
+        return PurchaseOrder.from_rows(results)
     
     def get_purchase_details(self, order_id):
         """获取进货订单明细"""
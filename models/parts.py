@@ -4,13 +4,20 @@
 配件模型
 """
 
+import logging
+import threading
 from datetime import datetime
-from .database import DatabaseManager
-from config.settings import DATABASE_PATH
+from .base import RowModel
+from .database import DatabaseManager, iter_batches, fulltext_phrase, like_contains, ascii_lower
+from config.settings import DATABASE_PATH, SQLITE_MAX_VARIABLES
 
-class Part:
+class Part(RowModel):
     """配件模型类"""
     
+    __slots__ = ('part_id', 'part_name', 'part_code', 'category', 'brand', 'specification',
+                 'unit', 'purchase_price', 'selling_price', 'stock_quantity', 'min_stock',
+                 'supplier', 'create_time', 'update_time')
+    
     def __init__(self, part_id=None, part_name="", part_code="", category="", 
                  brand="", specification="", unit="个", purchase_price=0.0, 
                  selling_price=0.0, stock_quantity=0, min_stock=10, supplier=""):
@@ -58,23 +65,52 @@ class Part:
 class PartDAO:
     """配件数据访问对象"""
     
+    # 配件数据版本号：本进程内配件表每次写入提交后加一，供搜索缓存判断是否失效
+    data_version = 0
+    _version_lock = threading.Lock()
+    
     def __init__(self):
-        self.db_manager = DatabaseManager(DATABASE_PATH)
+        self.db_manager = DatabaseManager.get_shared(DATABASE_PATH)
     
-    def add_part(self, part):
-        """添加配件"""
-        query = '''
-            INSERT INTO parts (part_name, part_code, category, brand, specification, 
-                             unit, purchase_price, selling_price, stock_quantity, 
-                             min_stock, supplier, update_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-        params = (
+    @classmethod
+    def mark_changed(cls):
+        """配件表写入提交后调用"""
+        with cls._version_lock:
+            cls.data_version += 1
+    
+    def get_data_version(self):
+        """配件数据版本：本进程内的写入次数和数据库文件被其他连接（如其他终端）修改的次数"""
+        return (PartDAO.data_version, self.db_manager.change_counter())
+    
+    INSERT_QUERY = '''
+        INSERT INTO parts (part_name, part_code, category, brand, specification, 
+                         unit, purchase_price, selling_price, stock_quantity, 
+                         min_stock, supplier, update_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    '''
+    
+    @staticmethod
+    def _insert_params(part):
+        """配件插入参数"""
+        return (
             part.part_name, part.part_code, part.category, part.brand,
             part.specification, part.unit, part.purchase_price, part.selling_price,
             part.stock_quantity, part.min_stock, part.supplier
         )
-        return self.db_manager.execute_insert(query, params)
+    
+    def add_part(self, part):
+        """添加配件"""
+        part_id = self.db_manager.execute_insert(self.INSERT_QUERY, self._insert_params(part))
+        self.mark_changed()
+        return part_id
+    
+    def bulk_add_parts(self, parts, batch_size=None):
+        """批量添加配件，所有批次在同一事务中写入，返回 BulkResult"""
+        rows = (self._insert_params(part) for part in parts)
+        result = self.db_manager.execute_many(self.INSERT_QUERY, rows, batch_size)
+        self.mark_changed()
+        logging.info(f"批量添加配件: {result}")
+        return result
     
     def update_part(self, part):
         """更新配件信息"""
@@ -90,19 +126,23 @@ class PartDAO:
             part.specification, part.unit, part.purchase_price, part.selling_price,
             part.stock_quantity, part.min_stock, part.supplier, part.part_id
         )
-        return self.db_manager.execute_update(query, params)
+        rowcount = self.db_manager.execute_update(query, params)
+        self.mark_changed()
+        return rowcount
     
     def delete_part(self, part_id):
         """删除配件"""
         query = "DELETE FROM parts WHERE part_id=?"
-        return self.db_manager.execute_update(query, (part_id,))
+        rowcount = self.db_manager.execute_update(query, (part_id,))
+        self.mark_changed()
+        return rowcount
     
     def get_part_by_id(self, part_id):
         """根据ID获取配件"""
         query = "SELECT * FROM parts WHERE part_id=?"
         result = self.db_manager.execute_query(query, (part_id,))
         if result:
-            return Part.from_dict(dict(result[0]))
+            return Part.from_row(result[0])
         return None
     
     def get_part_by_code(self, part_code):
@@ -110,23 +150,64 @@ class PartDAO:
         query = "SELECT * FROM parts WHERE part_code=?"
         result = self.db_manager.execute_query(query, (part_code,))
         if result:
-            return Part.from_dict(dict(result[0]))
+            return Part.from_row(result[0])
         return None
     
+    def get_existing_codes(self, part_codes):
+        """返回 part_codes 中已存在于数据库的配件编号集合"""
+        existing = set()
+        for batch in iter_batches(set(part_codes), SQLITE_MAX_VARIABLES):
+            placeholders = ','.join('?' * len(batch))
+            query = f"SELECT part_code FROM parts WHERE part_code IN ({placeholders})"
+            existing.update(row[0] for row in self.db_manager.execute_query(query, batch))
+        return existing
+    
+    def get_parts_by_ids(self, part_ids, conn=None):
+        """按ID批量获取配件，返回 {part_id: Part}
+        
+        传入 conn 时使用调用方的连接（可在写事务中读取最新库存）。
+        """
+        if conn is None:
+            with self.db_manager.get_connection() as conn:
+                return self.get_parts_by_ids(part_ids, conn)
+        
+        parts = {}
+        for batch in iter_batches(set(part_ids), SQLITE_MAX_VARIABLES):
+            placeholders = ','.join('?' * len(batch))
+            query = f"SELECT * FROM parts WHERE part_id IN ({placeholders})"
+            for row in conn.execute(query, batch):
+                part = Part.from_row(row)
+                parts[part.part_id] = part
+        return parts
+    
     def get_all_parts(self):
         """获取所有配件"""
         query = "SELECT * FROM parts ORDER BY part_name"
         results = self.db_manager.execute_query(query)
-        return [Part.from_dict(dict(row)) for row in results]
+        return Part.from_rows(results)
+    
+    def iter_parts(self):
+        """从游标分批读取所有配件（用于导出），逐个产出 Part 对象"""
+        query = "SELECT * FROM parts ORDER BY part_name"
+        for rows in self.db_manager.iter_query(query):
+            yield from Part.from_rows(rows)
+    
+    def count_parts(self):
+        """获取配件总数"""
+        return self.db_manager.execute_query("SELECT COUNT(*) FROM parts")[0][0]
     
     def search_parts(self, keyword="", category=""):
         """搜索配件"""
         query = "SELECT * FROM parts WHERE 1=1"
         params = []
         
-        if keyword:
-            query += " AND (part_name LIKE ? OR part_code LIKE ? OR brand LIKE ?)"
-            keyword_param = f"%{keyword}%"
+        if keyword and self.db_manager.can_fulltext_search('parts_fts', keyword):
+            query += " AND part_id IN (SELECT rowid FROM parts_fts WHERE parts_fts MATCH ?)"
+            params.append(fulltext_phrase(keyword))
+        elif keyword:
+            query += (" AND (part_name LIKE ? ESCAPE '\\' OR part_code LIKE ? ESCAPE '\\'"
+                      " OR brand LIKE ? ESCAPE '\\')")
+            keyword_param = like_contains(keyword)
             params.extend([keyword_param, keyword_param, keyword_param])
         
         if category:
@@ -135,13 +216,44 @@ class PartDAO:
         
         query += " ORDER BY part_name"
         results = self.db_manager.execute_query(query, params)
-        return [Part.from_dict(dict(row)) for row in results]
+        return Part.from_rows(results)
+    
+    def keyword_folder(self, keyword):
+        """返回 search_parts 对该关键字使用的大小写折叠函数
+        
+        LIKE 只对 ASCII 字母不区分大小写；trigram 全文索引按 Unicode 规则不区分大小写。
+        """
+        if keyword and self.db_manager.can_fulltext_search('parts_fts', keyword):
+            return str.lower
+        return ascii_lower
+    
+    def matches_keyword(self, part, keyword):
+        """判断配件是否符合 search_parts 的关键字条件：名称、编号、品牌按字面包含关键字"""
+        fold = self.keyword_folder(keyword)
+        keyword = fold(keyword)
+        return any(keyword in fold(value or '')
+                   for value in (part.part_name, part.part_code, part.brand))
     
-    def get_low_stock_parts(self):
-        """获取库存不足的配件"""
+    def get_low_stock_parts(self, limit=None):
+        """获取库存不足的配件（按库存从少到多，limit 限制返回数量）"""
+        # 条件与 idx_parts_low_stock 部分索引的条件一致，查询只读取索引中的配件
         query = "SELECT * FROM parts WHERE stock_quantity <= min_stock ORDER BY stock_quantity"
-        results = self.db_manager.execute_query(query)
-        return [Part.from_dict(dict(row)) for row in results]
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        results = self.db_manager.execute_query(query, params)
+        return Part.from_rows(results)
+    
+    def get_inventory_summary(self):
+        """一次查询汇总配件种数、库存总值和库存不足的配件数"""
+        query = '''
+            SELECT COUNT(*) as total_parts,
+                   TOTAL(stock_quantity * purchase_price) as total_value,
+                   COALESCE(SUM(stock_quantity <= min_stock), 0) as low_stock_count
+            FROM parts
+        '''
+        return dict(self.db_manager.execute_query(query)[0])
     
     def update_stock(self, part_id, quantity_change):
         """更新库存数量"""
@@ -150,7 +262,30 @@ class PartDAO:
                            update_time = CURRENT_TIMESTAMP
             WHERE part_id = ?
         '''
-        return self.db_manager.execute_update(query, (quantity_change, part_id))
+        rowcount = self.db_manager.execute_update(query, (quantity_change, part_id))
+        self.mark_changed()
+        return rowcount
+    
+    @staticmethod
+    def apply_stock_changes(conn, stock_changes):
+        """在调用方的事务中按 {part_id: 数量变化} 一次性更新多个配件的库存
+        
+        使用一条 UPDATE ... CASE part_id 语句，参数过多时按参数上限分批。
+        调用方在事务提交后需调用 PartDAO.mark_changed()。
+        """
+        items = [(part_id, change) for part_id, change in stock_changes.items() if change]
+        # 每个配件占用三个参数（CASE 中两个，IN 中一个）
+        for batch in iter_batches(items, SQLITE_MAX_VARIABLES // 3):
+            cases = ' '.join('WHEN ? THEN ?' for _ in batch)
+            placeholders = ','.join('?' * len(batch))
+            query = f'''
+                UPDATE parts SET stock_quantity = stock_quantity + CASE part_id {cases} END,
+                               update_time = CURRENT_TIMESTAMP
+                WHERE part_id IN ({placeholders})
+            '''
+            params = [value for item in batch for value in item]
+            params.extend(part_id for part_id, _ in batch)
+            conn.execute(query, params)
     
     def get_categories(self):
         """获取所有配件类别"""
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自动备份服务
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from utils.database_utils import DatabaseUtils
+from config.settings import (BACKUP_AUTO_INTERVAL, BACKUP_IDLE_SECONDS, BACKUP_STEP_DELAY,
+                             BACKUP_AUTO_RETRY_INTERVAL, BACKUP_SCHEDULER_CHECK_INTERVAL)
+
+class BackupCancelled(Exception):
+    """自动备份因程序退出而中止"""
+
+class BackupScheduler:
+    """自动备份调度器
+
+    - 在独立的后台线程中运行，距最近一次备份（含手动备份）超过 interval 秒后，
+      等到用户空闲 idle_seconds 秒再开始备份
+    - 备份使用在线备份接口分步复制；备份期间用户有操作时，每步之间暂停
+      step_delay 秒，把磁盘和CPU让给前台的开单、查询
+    - 状态文字保存在 status 中，由界面线程定时读取显示（本类不访问任何Tk控件）
+    """
+
+    def __init__(self, interval=BACKUP_AUTO_INTERVAL, idle_seconds=BACKUP_IDLE_SECONDS,
+                 step_delay=BACKUP_STEP_DELAY, check_interval=BACKUP_SCHEDULER_CHECK_INTERVAL,
+                 retry_interval=BACKUP_AUTO_RETRY_INTERVAL):
+        self.interval = interval
+        self.idle_seconds = idle_seconds
+        self.step_delay = step_delay
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self.status = ""
+        self._last_activity = time.monotonic()
+        self._retry_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def notify_activity(self):
+        """记录一次用户操作（界面线程在键盘、鼠标事件中调用）"""
+        self._last_activity = time.monotonic()
+
+    @property
+    def user_idle(self):
+        """用户是否已空闲 idle_seconds 秒"""
+        return time.monotonic() - self._last_activity >= self.idle_seconds
+
+    def next_backup_time(self):
+        """下一次自动备份的时间（以备份清单中最近一次备份为准）"""
+        backups = DatabaseUtils.get_backup_list()
+        due = datetime.now()
+        if backups:
+            due = max(due, backups[0]['create_time'] + timedelta(seconds=self.interval))
+        if self._retry_at is not None:
+            due = max(due, self._retry_at)
+        return due
+
+    def start(self):
+        """启动调度线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='backup-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止调度线程；正在进行的备份在下一步复制前中止"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        due = None
+        while not self._stop.wait(self.check_interval if due else 0):
+            try:
+                if due is None or datetime.now() >= due:
+                    # 期间可能有手动备份，到期时重新读取清单确认
+                    due = self.next_backup_time()
+                    if self._retry_at is None:
+                        self.status = f"下次自动备份: {due.strftime('%m-%d %H:%M')}"
+                if datetime.now() >= due:
+                    if self.user_idle:
+                        self.run_backup()
+                        due = None
+                    elif self._retry_at is None:
+                        self.status = "等待空闲后自动备份"
+            except Exception as e:
+                logging.error(f"自动备份调度出错: {e}")
+                due = datetime.now() + timedelta(seconds=self.retry_interval)
+
+    def _on_progress(self, copied, total):
+        """备份每复制一步调用一次（在调度线程中）"""
+        if self._stop.is_set():
+            raise BackupCancelled("程序退出，自动备份已中止")
+        if total:
+            self.status = f"自动备份中... {copied * 100 // total}%"
+        if not self.user_idle:
+            time.sleep(self.step_delay)
+
+    def run_backup(self):
+        """立即执行一次自动备份（在调度线程中调用），返回备份文件路径，失败时返回 None"""
+        self.status = "自动备份中..."
+        started = time.perf_counter()
+        try:
+            backup_path = DatabaseUtils.backup_database(progress_callback=self._on_progress)
+        except Exception as e:
+            if self._stop.is_set():
+                self.status = ""
+                return None
+            logging.error(f"自动备份失败: {e}")
+            self.status = f"自动备份失败: {e}"
+            self._retry_at = datetime.now() + timedelta(seconds=self.retry_interval)
+            return None
+
+        self._retry_at = None
+        logging.info(f"自动备份完成: {backup_path}（{time.perf_counter() - started:.1f} 秒）")
+        self.status = f"上次自动备份: {datetime.now().strftime('%m-%d %H:%M')}"
+        return backup_path
@@ -4,9 +4,81 @@
 库存服务
 """
 
+import threading
+from contextlib import closing
 from models.parts import PartDAO, Part
 from models.orders import PurchaseOrderDAO, PurchaseOrder, PurchaseDetail
+from collections import Counter, OrderedDict
 from datetime import date
+from config.settings import PART_SEARCH_CACHE_SIZE, LOW_STOCK_PREVIEW_LIMIT
+from utils.export_utils import ExportUtils
+
+class PartSearchCache:
+    """配件搜索结果缓存
+    
+    - 最近的 (关键字, 类别) -> 结果列表按LRU保留 max_size 条
+    - 新关键字包含已缓存的关键字时（如继续输入），在已缓存结果中过滤，不再查询数据库
+    - 配件表有写入（PartDAO.get_data_version() 变化，含其他进程的写入）后缓存整体失效
+    """
+    
+    def __init__(self, part_dao, max_size=PART_SEARCH_CACHE_SIZE):
+        self.part_dao = part_dao
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+    
+    def _can_narrow(self, cached_keyword, keyword, fold):
+        """已缓存关键字的结果是否一定包含新关键字的全部结果
+        
+        空关键字的结果是该类别的全部配件；否则两者须使用同一匹配规则（同为 LIKE 或同为全文索引），
+        且折叠大小写后新关键字包含已缓存的关键字。
+        """
+        if not cached_keyword:
+            return True
+        return (self.part_dao.keyword_folder(cached_keyword) is fold
+                and fold(cached_keyword) in fold(keyword))
+    
+    def search(self, keyword="", category=""):
+        """搜索配件，优先使用缓存"""
+        fold = self.part_dao.keyword_folder(keyword)
+        # 先取版本号再查询，查询期间发生的写入会使本次结果在下次使用前失效
+        version = self.part_dao.get_data_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            
+            key = (keyword, category)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return list(self._entries[key])
+            
+            # 找出可以收窄的缓存结果（取最长的已缓存关键字）
+            base = None
+            for (cached_keyword, cached_category), parts in self._entries.items():
+                if (cached_category == category
+                        and (base is None or len(cached_keyword) > len(base[0]))
+                        and self._can_narrow(cached_keyword, keyword, fold)):
+                    base = (cached_keyword, parts)
+        
+        if base is not None:
+            results = [part for part in base[1] if self.part_dao.matches_keyword(part, keyword)]
+        else:
+            results = self.part_dao.search_parts(keyword, category)
+        
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = results
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return list(results)
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
 
 class InventoryService:
     """库存管理服务"""
@@ -14,6 +86,7 @@ class InventoryService:
     def __init__(self):
         self.part_dao = PartDAO()
         self.purchase_dao = PurchaseOrderDAO()
+        self.search_cache = PartSearchCache(self.part_dao)
     
     def add_part(self, part_data):
         """添加配件"""
@@ -26,6 +99,19 @@ class InventoryService:
         part = Part.from_dict(part_data)
         return self.part_dao.add_part(part)
     
+    def bulk_add_parts(self, parts_data_list, batch_size=None):
+        """批量添加配件（如导入供应商目录），返回 BulkResult"""
+        parts = [Part.from_dict(part_data) for part_data in parts_data_list]
+        
+        # 验证配件编号唯一性：导入数据内部重复的编号和数据库中已有的编号
+        codes = [part.part_code for part in parts if part.part_code]
+        duplicated = {code for code, count in Counter(codes).items() if count > 1}
+        duplicated |= self.part_dao.get_existing_codes(codes)
+        if duplicated:
+            raise ValueError(f"配件编号 {', '.join(sorted(duplicated))} 已存在")
+        
+        return self.part_dao.bulk_add_parts(parts, batch_size)
+    
     def update_part(self, part_data):
         """更新配件信息"""
         part = Part.from_dict(part_data)
@@ -41,10 +127,20 @@ class InventoryService:
         """获取所有配件"""
         return self.part_dao.get_all_parts()
     
+    def export_parts(self, format='csv', filename=None, progress_callback=None):
+        """从数据库游标流式导出全部配件，返回文件路径"""
+        total = self.part_dao.count_parts()
+        with closing(self.part_dao.iter_parts()) as parts:
+            return ExportUtils.export_parts_list(parts, format, filename, progress_callback, total)
+    
     def search_parts(self, keyword="", category=""):
         """搜索配件"""
         return self.part_dao.search_parts(keyword, category)
     
+    def search_parts_cached(self, keyword="", category=""):
+        """搜索配件（使用最近搜索结果缓存，适合边输入边搜索）"""
+        return self.search_cache.search(keyword, category)
+    
     def get_low_stock_parts(self):
         """获取库存不足的配件"""
         return self.part_dao.get_low_stock_parts()
@@ -89,18 +185,16 @@ class InventoryService:
         """获取进货订单明细"""
         return self.purchase_dao.get_purchase_details(order_id)
     
-    def get_inventory_statistics(self):
-        """获取库存统计信息"""
-        all_parts = self.get_all_parts()
-        low_stock_parts = self.get_low_stock_parts()
-        
-        total_parts = len(all_parts)
-        total_value = sum(part.stock_quantity * part.purchase_price for part in all_parts)
-        low_stock_count = len(low_stock_parts)
+    def get_inventory_statistics(self, low_stock_limit=LOW_STOCK_PREVIEW_LIMIT):
+        """获取库存统计信息
         
+        low_stock_parts 只包含库存最少的 low_stock_limit 种配件，
+        库存不足的总数见 low_stock_count。
+        """
+        summary = self.part_dao.get_inventory_summary()
         return {
-            'total_parts': total_parts,
-            'total_value': total_value,
-            'low_stock_count': low_stock_count,
-            'low_stock_parts': low_stock_parts
+            'total_parts': summary['total_parts'],
+            'total_value': summary['total_value'],
+            'low_stock_count': summary['low_stock_count'],
+            'low_stock_parts': self.part_dao.get_low_stock_parts(limit=low_stock_limit)
         }
\ No newline at end of file
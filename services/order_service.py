@@ -4,10 +4,12 @@
 订单服务
 """
 
-from models.orders import RepairOrderDAO, RepairOrder, RepairPartsUsage
+from models.orders import RepairOrderDAO, RepairOrder, RepairPartsUsage, OrderStatistics
 from models.customers import CustomerDAO, Customer
 from models.parts import PartDAO
+from contextlib import closing
 from datetime import date, datetime
+from utils.export_utils import ExportUtils
 
 class OrderService:
     """订单管理服务"""
@@ -22,6 +24,11 @@ class OrderService:
         customer = Customer.from_dict(customer_data)
         return self.customer_dao.add_customer(customer)
     
+    def bulk_add_customers(self, customers_data, batch_size=None):
+        """批量添加客户，返回 BulkResult"""
+        customers = (Customer.from_dict(customer_data) for customer_data in customers_data)
+        return self.customer_dao.bulk_add_customers(customers, batch_size)
+    
     def update_customer(self, customer_data):
         """更新客户信息"""
         customer = Customer.from_dict(customer_data)
@@ -31,6 +38,12 @@ class OrderService:
         """获取所有客户"""
         return self.customer_dao.get_all_customers()
     
+    def export_customers(self, format='csv', filename=None, progress_callback=None):
+        """从数据库游标流式导出全部客户，返回文件路径"""
+        total = self.customer_dao.count_customers()
+        with closing(self.customer_dao.iter_customers()) as customers:
+            return ExportUtils.export_customers(customers, format, filename, progress_callback, total)
+    
     def search_customers(self, keyword=""):
         """搜索客户"""
         return self.customer_dao.search_customers(keyword)
@@ -60,17 +73,8 @@ class OrderService:
                 part_name = usage_data.get('part_name', '')
                 part_id = usage_data.get('part_id')
                 
-                # 如果是库存配件，验证配件是否存在和库存是否充足
-                if part_source == '库存配件' and part_id:
-                    part = self.part_dao.get_part_by_id(part_id)
-                    if not part:
-                        raise ValueError(f"配件ID {part_id} 不存在")
-                    
-                    if part.stock_quantity < usage_data['quantity_used']:
-                        raise ValueError(f"配件 {part.part_name} 库存不足")
-                    
-                    part_name = part.part_name
-                elif part_source == '客户自带' and not part_name:
+                # 库存配件的存在性和库存数量在写入订单的事务中统一校验
+                if part_source == '客户自带' and not part_name:
                     raise ValueError("客户自带配件必须填写配件名称")
                 
                 subtotal = usage_data['quantity_used'] * usage_data['unit_price']
@@ -158,6 +162,14 @@ class OrderService:
         """搜索维修订单"""
         return self.repair_dao.search_repair_orders(customer_name, start_date, end_date, status)
     
+    def get_order_list(self, limit=None, after=None, before=None, **filters):
+        """获取订单列表（含客户姓名、车牌号），参数见 RepairOrderDAO.get_order_list"""
+        return self.repair_dao.get_order_list(limit=limit, after=after, before=before, **filters)
+    
+    def get_order_summary(self, **filters):
+        """按状态汇总订单数量和金额"""
+        return self.repair_dao.get_order_summary(**filters)
+    
     def get_repair_order_details(self, order_id):
         """获取维修订单详细信息（包含配件使用记录）"""
         order = self.repair_dao.get_repair_order_by_id(order_id)
@@ -188,33 +200,15 @@ class OrderService:
     
     def get_customer_repair_history(self, customer_id):
         """获取客户维修历史"""
-        return self.repair_dao.search_repair_orders(
-            customer_name="", 
-            start_date=None, 
-            end_date=None, 
-            status=""
-        )
+        return self.repair_dao.get_order_list(customer_id=customer_id)
+    
+    def export_orders(self, format='csv', filename=None, progress_callback=None, **filters):
+        """从数据库游标流式导出符合条件的订单（过滤参数同 get_order_list），返回文件路径"""
+        total = self.repair_dao.count_orders(**filters)
+        with closing(self.repair_dao.iter_order_list(**filters)) as orders:
+            return ExportUtils.export_repair_orders(orders, format, filename, progress_callback, total)
     
     def get_order_statistics(self, start_date=None, end_date=None):
-        """获取订单统计信息"""
-        orders = self.repair_dao.search_repair_orders(
-            customer_name="",
-            start_date=start_date,
-            end_date=end_date,
-            status=""
-        )
-        
-        total_orders = len(orders)
-        completed_orders = len([o for o in orders if o.status == "已完成"])
-        total_revenue = sum(o.total_amount for o in orders if o.status == "已完成")
-        total_labor_cost = sum(o.labor_cost for o in orders if o.status == "已完成")
-        total_parts_cost = sum(o.parts_cost for o in orders if o.status == "已完成")
-        
-        return {
-            'total_orders': total_orders,
-            'completed_orders': completed_orders,
-            'pending_orders': total_orders - completed_orders,
-            'total_revenue': total_revenue,
-            'total_labor_cost': total_labor_cost,
-            'total_parts_cost': total_parts_cost
-        }
\ No newline at end of file
+        """获取订单统计信息（在数据库中按状态汇总，返回 OrderStatistics）"""
+        summary = self.repair_dao.get_order_summary(start_date=start_date, end_date=end_date)
+        return OrderStatistics.from_summary(summary)
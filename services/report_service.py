@@ -5,42 +5,61 @@
 """
 
 from models.database import DatabaseManager
-from config.settings import DATABASE_PATH
+from config.settings import DATABASE_PATH, REPORT_DIR, REPORT_EXPORT_WORKERS
+from utils.export_utils import ExportUtils
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
+from pathlib import Path
 import json
+import tempfile
+import time
+import zipfile
+
+# 月末报表包中单个报表的耗时统计
+ReportTiming = namedtuple('ReportTiming', ['name', 'filename', 'rows', 'query_seconds', 'write_seconds'])
 
 class ReportService:
     """报表服务"""
     
     def __init__(self):
-        self.db_manager = DatabaseManager(DATABASE_PATH)
+        self.db_manager = DatabaseManager.get_shared(DATABASE_PATH)
     
     def get_daily_revenue_report(self, target_date=None):
         """获取日收入报表"""
         if not target_date:
             target_date = date.today()
         
+        # 已完成订单的收入从按日汇总表读取
         query = '''
             SELECT 
-                COUNT(*) as order_count,
-                SUM(total_amount) as total_revenue,
-                SUM(labor_cost) as total_labor,
-                SUM(parts_cost) as total_parts
-            FROM repair_orders 
-            WHERE repair_date = ? AND status = '已完成'
+                order_count,
+                total_amount as total_revenue,
+                labor_cost as total_labor,
+                parts_cost as total_parts
+            FROM daily_revenue 
+            WHERE repair_date = ?
         '''
         
         result = self.db_manager.execute_query(query, (target_date,))
-        if result:
-            row = dict(result[0])
-            return {
-                'date': target_date,
-                'order_count': row['order_count'] or 0,
-                'total_revenue': row['total_revenue'] or 0,
-                'total_labor': row['total_labor'] or 0,
-                'total_parts': row['total_parts'] or 0
-            }
-        return None
+        row = dict(result[0]) if result else {}
+        return {
+            'date': target_date,
+            'order_count': row.get('order_count', 0),
+            'total_revenue': row.get('total_revenue', 0),
+            'total_labor': row.get('total_labor', 0),
+            'total_parts': row.get('total_parts', 0)
+        }
+    
+    @staticmethod
+    def month_range(year, month):
+        """返回某月的 (第一天, 最后一天)"""
+        start_date = date(year, month, 1)
+        if month == 12:
+            end_date = date(year + 1, 1, 1) - timedelta(days=1)
+        else:
+            end_date = date(year, month + 1, 1) - timedelta(days=1)
+        return start_date, end_date
     
     def get_monthly_revenue_report(self, year=None, month=None):
         """获取月收入报表"""
@@ -49,22 +68,17 @@ class ReportService:
         if not month:
             month = date.today().month
         
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = date(year, month + 1, 1) - timedelta(days=1)
+        start_date, end_date = self.month_range(year, month)
         
         query = '''
             SELECT 
                 repair_date,
-                COUNT(*) as order_count,
-                SUM(total_amount) as daily_revenue,
-                SUM(labor_cost) as daily_labor,
-                SUM(parts_cost) as daily_parts
-            FROM repair_orders 
-            WHERE repair_date BETWEEN ? AND ? AND status = '已完成'
-            GROUP BY repair_date
+                order_count,
+                total_amount as daily_revenue,
+                labor_cost as daily_labor,
+                parts_cost as daily_parts
+            FROM daily_revenue 
+            WHERE repair_date BETWEEN ? AND ?
             ORDER BY repair_date
         '''
         
@@ -204,8 +218,8 @@ class ReportService:
                 SUM(total_amount) as total_revenue,
                 SUM(labor_cost) as total_labor,
                 SUM(parts_cost) as total_parts_revenue
-            FROM repair_orders
-            WHERE repair_date BETWEEN ? AND ? AND status = '已完成'
+            FROM daily_revenue
+            WHERE repair_date BETWEEN ? AND ?
         '''
         
         repair_result = self.db_manager.execute_query(repair_query, (start_date, end_date))
@@ -245,6 +259,86 @@ class ReportService:
             'profit_margin': round(profit_margin, 2)
         }
     
+    def rebuild_daily_revenue(self):
+        """重建日收入汇总表"""
+        return self.db_manager.rebuild_daily_revenue()
+    
+    def check_daily_revenue(self, tolerance=0.005):
+        """核对日收入汇总表与 repair_orders 原始汇总是否一致
+        
+        返回不一致的日期列表 [(日期, 汇总表数据, 原始汇总数据)]，一致时为空列表。
+        """
+        query = '''
+            SELECT repair_date, COUNT(*) as order_count, TOTAL(total_amount) as total_amount,
+                   TOTAL(labor_cost) as labor_cost, TOTAL(parts_cost) as parts_cost
+            FROM repair_orders
+            WHERE status = '已完成'
+            GROUP BY repair_date
+        '''
+        expected = {row['repair_date']: dict(row) for row in self.db_manager.execute_query(query)}
+        actual = {row['repair_date']: dict(row)
+                  for row in self.db_manager.execute_query("SELECT * FROM daily_revenue")}
+        
+        mismatches = []
+        for repair_date in sorted(set(expected) | set(actual), key=str):
+            rollup = actual.get(repair_date)
+            raw = expected.get(repair_date)
+            if rollup is None or raw is None or rollup['order_count'] != raw['order_count'] or any(
+                    abs(rollup[column] - raw[column]) > tolerance
+                    for column in ('total_amount', 'labor_cost', 'parts_cost')):
+                mismatches.append((repair_date, rollup, raw))
+        return mismatches
+    
+    def _export_bundle_report(self, directory, name, filename, report_func, args):
+        """生成单个报表并写入 directory，返回 ReportTiming（在工作线程中执行）"""
+        started = time.perf_counter()
+        data = report_func(*args)
+        queried = time.perf_counter()
+        
+        filepath = str(Path(directory) / filename)
+        if filename.endswith('.json'):
+            ExportUtils.export_to_json(data, filepath)
+        else:
+            ExportUtils.export_to_csv(data, filepath)
+        rows = len(data['daily_data']) if isinstance(data, dict) else len(data)
+        return ReportTiming(name, filename, rows, queried - started, time.perf_counter() - queried)
+    
+    def export_month_end_bundle(self, year=None, month=None, max_workers=REPORT_EXPORT_WORKERS):
+        """并发生成月末报表并打包为一个zip文件，返回 (zip文件路径, [ReportTiming, ...])
+        
+        各报表在线程池中同时查询，每个工作线程从连接池取得各自的连接（WAL模式下
+        读连接互不阻塞），写出文件后统一压缩到 REPORT_DIR。
+        """
+        today = date.today()
+        year = year or today.year
+        month = month or today.month
+        start_date, end_date = self.month_range(year, month)
+        
+        reports = [
+            ('月收入报表', '月收入报表.json', self.get_monthly_revenue_report, (year, month)),
+            ('配件使用报表', '配件使用报表.csv', self.get_parts_usage_report, (start_date, end_date)),
+            ('客户分析报表', '客户分析报表.csv', self.get_customer_analysis_report, (start_date, end_date)),
+            ('库存报表', '库存报表.csv', self.get_inventory_report, ()),
+            ('供应商分析报表', '供应商分析报表.csv', self.get_supplier_analysis_report, (start_date, end_date)),
+        ]
+        
+        REPORT_DIR.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        zip_path = REPORT_DIR / f'月末报表_{year}{month:02d}_{timestamp}.zip'
+        
+        with tempfile.TemporaryDirectory() as directory:
+            with ThreadPoolExecutor(max_workers=max_workers,
+                                    thread_name_prefix='report-export') as executor:
+                futures = [executor.submit(self._export_bundle_report, directory, *report)
+                           for report in reports]
+                timings = [future.result() for future in futures]
+            
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as bundle:
+                for timing in timings:
+                    bundle.write(Path(directory) / timing.filename, timing.filename)
+        
+        return str(zip_path), timings
+    
     def export_report_to_json(self, report_data, filename):
         """导出报表为JSON文件"""
         try:
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准公共配置：数据量缩放和结果汇总
+"""
+
+import pytest
+
+RESULTS = []  # [(基准名称, 说明)]
+
+@pytest.fixture
+def scaled(request):
+    """按 --bench-scale 缩放数据量，至少为 1"""
+    scale = request.config.getoption('--bench-scale')
+    return lambda count: max(1, int(count * scale))
+
+@pytest.fixture
+def bench_report(request):
+    """记录一条基准结果，全部基准结束后在终端汇总输出"""
+    return lambda text: RESULTS.append((request.node.name, text))
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section("性能基准")
+    for name, text in RESULTS:
+        terminalreporter.write_line(f"{name}: {text}")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准的数据生成与计时工具
+
+数据通过各 DAO 的 bulk_add_* 写入，随机数种子固定，每次生成的数据相同。
+"""
+
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from models.customers import Customer, CustomerDAO
+from models.orders import RepairOrder, RepairOrderDAO
+from models.parts import Part, PartDAO
+
+CATEGORIES = ['机油', '滤清器', '刹车片', '轮胎', '火花塞', '蓄电池', '雨刮器', '减震器']
+BRANDS = ['博世', '马勒', '曼牌', '米其林', '壳牌', '美孚', 'NGK', '瓦尔塔']
+SURNAMES = '张王李赵刘陈杨黄周吴徐孙马朱胡郭何高林罗'
+PROVINCES = '京津沪渝冀豫云辽黑湘皖鲁新苏浙赣鄂桂甘晋'
+CAR_MODELS = ['卡罗拉', '轩逸', '朗逸', '雅阁', '思域', '宝来', '速腾', '凯美瑞']
+STATUSES = ['已完成', '已完成', '已完成', '进行中', '维修中', '已取消']
+
+def seed_parts(count, seed=1):
+    """生成 count 个配件（编号 P0000001 起），返回 BulkResult"""
+    rng = random.Random(seed)
+    
+    def parts():
+        for i in range(count):
+            category = CATEGORIES[i % len(CATEGORIES)]
+            brand = rng.choice(BRANDS)
+            price = round(rng.uniform(10, 800), 2)
+            yield Part(part_name=f"{brand}{category}{i:06d}", part_code=f"P{i + 1:07d}",
+                       category=category, brand=brand, specification=f"规格{rng.randint(1, 50)}",
+                       purchase_price=price, selling_price=round(price * 1.3, 2),
+                       stock_quantity=rng.randint(0, 200), supplier=f"{brand}经销商")
+    
+    return PartDAO().bulk_add_parts(parts())
+
+def seed_customers(count, seed=2):
+    """生成 count 个客户（车牌号互不相同），返回 BulkResult"""
+    rng = random.Random(seed)
+    
+    def customers():
+        for i in range(count):
+            plate = f"{PROVINCES[i % len(PROVINCES)]}{chr(65 + i // len(PROVINCES) % 26)}{i:06d}"
+            yield Customer(customer_name=f"{rng.choice(SURNAMES)}客户{i:06d}",
+                           phone=f"13{rng.randint(0, 999999999):09d}", license_plate=plate,
+                           car_model=rng.choice(CAR_MODELS), notes=f"第{i}位客户")
+    
+    return CustomerDAO().bulk_add_customers(customers())
+
+def seed_orders(count, customer_count, seed=3, days=730):
+    """为 1..customer_count 号客户生成 count 张维修订单（分布在最近 days 天内），返回 BulkResult"""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=days)
+    
+    def orders():
+        for i in range(count):
+            labor_cost = round(rng.uniform(50, 500), 2)
+            parts_cost = round(rng.uniform(0, 1500), 2)
+            order = RepairOrder(customer_id=rng.randint(1, customer_count),
+                                vehicle_type=rng.choice(CAR_MODELS),
+                                vehicle_number=f"VIN{i:010d}",
+                                repair_date=start + timedelta(days=rng.randrange(days)),
+                                fault_description=f"故障描述{i}", repair_content=f"维修内容{i}",
+                                labor_cost=labor_cost, parts_cost=parts_cost,
+                                total_amount=labor_cost + parts_cost, status=rng.choice(STATUSES),
+                                technician=f"技师{rng.randint(1, 12)}")
+            yield order, None
+    
+    return RepairOrderDAO().bulk_add_repair_orders(orders())
+
+def best_of(func, *args, repeat=5, **kwargs):
+    """执行 repeat 次，返回 (最短耗时秒数, 最后一次的结果)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def peak_memory(func, *args, **kwargs):
+    """执行一次，返回 (tracemalloc 记录的 Python 堆峰值字节数, 结果)"""
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+def ms(seconds):
+    return f"{seconds * 1000:.2f} ms"
+
+def mb(size):
+    return f"{size / 1024 / 1024:.2f} MB"
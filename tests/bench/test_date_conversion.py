@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日期转换基准：100万行 DATE / TIMESTAMP 列
+
+对比 sqlite3 按声明类型注册的转换器（读出即为 date / datetime）
+与原先读出文本后在 Python 中逐行 strptime 的做法。
+"""
+
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+import pytest
+from .support import best_of, ms
+
+pytestmark = pytest.mark.bench
+
+def parse_date(value):
+    """原先 from_dict 中的日期解析：先按日期、再按日期时间格式尝试"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').date()
+
+def parse_timestamp(value):
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+def legacy_load(db_path):
+    """不启用 detect_types 读取文本，再逐行解析"""
+    with closing(sqlite3.connect(db_path)) as conn:
+        rows = conn.execute("SELECT day, created FROM bench_dates").fetchall()
+    return [(parse_date(day), parse_timestamp(created)) for day, created in rows]
+
+def test_date_conversion(db, scaled, bench_report):
+    row_count = scaled(1_000_000)
+    start = datetime(2020, 1, 1, 8, 30)
+    db.execute_update("CREATE TABLE bench_dates (day DATE, created TIMESTAMP)")
+    db.execute_many("INSERT INTO bench_dates (day, created) VALUES (?, ?)",
+                    ((start.date() + timedelta(days=i % 1500), start + timedelta(minutes=i))
+                     for i in range(row_count)))
+    
+    converted, rows = best_of(db.execute_query, "SELECT day, created FROM bench_dates", repeat=3)
+    assert len(rows) == row_count
+    assert type(rows[-1]['day']) is date and type(rows[-1]['created']) is datetime
+    first = tuple(rows[0])
+    del rows
+    
+    legacy, legacy_rows = best_of(legacy_load, db.db_path, repeat=3)
+    assert legacy_rows[0] == first
+    del legacy_rows
+    
+    bench_report(f"{row_count} 行：转换器 {ms(converted)}，逐行 strptime {ms(legacy)}")
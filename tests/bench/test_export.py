@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式导出基准：1万与100万张维修订单导出为 CSV / JSON
+
+导出从数据库游标分批读取、逐行写入，内存峰值不应随订单数增长。
+"""
+
+import time
+import pytest
+from config.settings import EXPORT_FETCH_SIZE
+from services.order_service import OrderService
+from .support import seed_customers, seed_orders, peak_memory, ms, mb
+
+pytestmark = pytest.mark.bench
+
+FORMATS = ('csv', 'json')
+
+def export(service, format, order_count):
+    """导出一次，返回 (耗时秒数, 内存峰值字节数)"""
+    progress = []
+    started = time.perf_counter()
+    path = service.export_orders(format, f'bench_orders.{format}',
+                                 progress_callback=lambda written, total: progress.append(written))
+    seconds = time.perf_counter() - started
+    assert path and progress[-1] == order_count
+    
+    peak, _ = peak_memory(service.export_orders, format, f'bench_orders.{format}')
+    return seconds, peak
+
+def test_streaming_export(db, scaled, bench_report):
+    # 少量订单也要跨越多个 fetchmany 批次，峰值才可比
+    small_count = max(scaled(10_000), EXPORT_FETCH_SIZE * 5)
+    large_count = max(scaled(1_000_000), small_count * 10)
+    customer_count = max(1, small_count // 5)
+    seed_customers(customer_count)
+    service = OrderService()
+    
+    seed_orders(small_count, customer_count)
+    small = {format: export(service, format, small_count) for format in FORMATS}
+    seed_orders(large_count - small_count, customer_count, seed=4)
+    large = {format: export(service, format, large_count) for format in FORMATS}
+    
+    for format in FORMATS:
+        small_seconds, small_peak = small[format]
+        large_seconds, large_peak = large[format]
+        # 订单数增加数十倍，内存峰值只允许有批大小级别的波动
+        assert large_peak < small_peak * 1.5 + 1024 * 1024, format
+        bench_report(f"{format.upper()} 导出 {small_count} 张订单 {ms(small_seconds)}、峰值 {mb(small_peak)}，"
+                     f"{large_count} 张订单 {ms(large_seconds)}、峰值 {mb(large_peak)}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型加载基准：10万张维修订单
+
+对比 __slots__ 模型直接由查询结果行构造（RepairOrder.from_rows）
+与原先带 __dict__、经 dict(row) 和 hasattr/setattr 逐列赋值的模型。
+"""
+
+from datetime import date, datetime
+import pytest
+from models.orders import RepairOrder, RepairOrderDAO
+from .support import seed_customers, seed_orders, best_of, peak_memory, ms, mb
+
+pytestmark = pytest.mark.bench
+
+class LegacyRepairOrder:
+    """原先的维修订单模型（保留构造、from_dict 的做法作为对照）"""
+    
+    def __init__(self, order_id=None, customer_id=None, vehicle_type="",
+                 vehicle_number="", repair_date=None, fault_description="",
+                 repair_content="", labor_cost=0.0, parts_cost=0.0,
+                 total_amount=0.0, status="进行中", technician="", remarks=""):
+        self.order_id = order_id
+        self.customer_id = customer_id
+        self.vehicle_type = vehicle_type
+        self.vehicle_number = vehicle_number
+        self.repair_date = repair_date or date.today()
+        self.fault_description = fault_description
+        self.repair_content = repair_content
+        self.labor_cost = labor_cost
+        self.parts_cost = parts_cost
+        self.total_amount = total_amount
+        self.status = status
+        self.technician = technician
+        self.remarks = remarks
+        self.create_time = None
+        self.complete_time = None
+        self.order_number = f"RO{order_id:06d}" if order_id else self._generate_order_number()
+    
+    def _generate_order_number(self):
+        return f"RO{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    
+    @classmethod
+    def from_dict(cls, data):
+        order = cls()
+        for key, value in data.items():
+            if hasattr(order, key):
+                setattr(order, key, value)
+        
+        if 'repair_date' in data and data['repair_date']:
+            try:
+                if isinstance(data['repair_date'], str):
+                    try:
+                        order.repair_date = datetime.strptime(data['repair_date'], '%Y-%m-%d').date()
+                    except ValueError:
+                        order.repair_date = datetime.strptime(data['repair_date'], '%Y-%m-%d %H:%M:%S').date()
+                elif hasattr(data['repair_date'], 'date'):
+                    order.repair_date = data['repair_date'].date()
+                else:
+                    order.repair_date = data['repair_date']
+            except (ValueError, TypeError, AttributeError):
+                order.repair_date = date.today()
+        return order
+
+def legacy_load(rows):
+    return [LegacyRepairOrder.from_dict(dict(row)) for row in rows]
+
+def test_load_repair_orders(db, scaled, bench_report):
+    order_count = scaled(100_000)
+    customer_count = max(1, order_count // 5)
+    seed_customers(customer_count)
+    seed_orders(order_count, customer_count)
+    rows = RepairOrderDAO().db_manager.execute_query("SELECT * FROM repair_orders ORDER BY order_id")
+    assert len(rows) == order_count
+    
+    load, orders = best_of(RepairOrder.from_rows, rows, repeat=3)
+    legacy, legacy_orders = best_of(legacy_load, rows, repeat=3)
+    # 原模型从数据库加载时订单号取自当前时间，这里只比较编号和日期
+    assert [(order.order_id, order.repair_date) for order in orders] == \
+        [(order.order_id, order.repair_date) for order in legacy_orders]
+    del orders, legacy_orders
+    
+    memory, _ = peak_memory(RepairOrder.from_rows, rows)
+    legacy_memory, _ = peak_memory(legacy_load, rows)
+    
+    bench_report(f"{order_count} 张订单：__slots__ 模型 {ms(load)}、{mb(memory)}，"
+                 f"原模型 {ms(legacy)}、{mb(legacy_memory)}")
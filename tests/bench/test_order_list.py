@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单列表刷新基准：100、1万、10万张订单
+
+对比一次 JOIN 查询（get_order_list）与原先逐行查询客户的做法。
+"""
+
+import pytest
+from config.settings import ORDER_PAGE_SIZE
+from models.customers import CustomerDAO
+from models.orders import RepairOrderDAO
+from services.order_service import OrderService
+from .support import seed_customers, seed_orders, best_of, ms
+
+pytestmark = pytest.mark.bench
+
+def legacy_refresh(limit=100):
+    """原先的刷新方式：先取订单，再为每一行单独查询客户"""
+    customer_dao = CustomerDAO()
+    orders = RepairOrderDAO().get_all_repair_orders(limit)
+    return [(order, customer_dao.get_customer_by_id(order.customer_id)) for order in orders]
+
+@pytest.mark.parametrize('order_count', [100, 10_000, 100_000], ids=['100', '10k', '100k'])
+def test_order_list_refresh(db, scaled, bench_report, order_count):
+    order_count = scaled(order_count)
+    customer_count = max(1, order_count // 5)
+    seed_customers(customer_count)
+    seed_orders(order_count, customer_count)
+    service = OrderService()
+    
+    refresh, rows = best_of(service.get_order_list, limit=100)
+    assert len(rows) == min(100, order_count)
+    legacy, legacy_rows = best_of(legacy_refresh)
+    assert [row.order_id for row in rows] == [order.order_id for order, _ in legacy_rows]
+    
+    first_page, page = best_of(service.get_order_list, limit=ORDER_PAGE_SIZE)
+    next_page, _ = best_of(service.get_order_list, limit=ORDER_PAGE_SIZE, after=page[-1].sort_key)
+    search, _ = best_of(service.get_order_list, limit=ORDER_PAGE_SIZE, customer_keyword="客户0000")
+    
+    bench_report(f"{order_count} 张订单：刷新 100 行 {ms(refresh)}（逐行查客户 {ms(legacy)}），"
+                 f"首页 {ms(first_page)}，下一页 {ms(next_page)}，按客户搜索 {ms(search)}")
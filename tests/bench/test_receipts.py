@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单据写入基准：10、100、1000 行的进货单和维修单
+
+对比批量写入明细、合并更新库存与原先逐行 INSERT/UPDATE 的做法。
+"""
+
+import pytest
+from config import settings
+from models.database import DatabaseManager
+from models.orders import (RepairOrder, RepairOrderDAO, RepairPartsUsage, PurchaseOrder,
+                           PurchaseOrderDAO, PurchaseDetail)
+from .support import seed_parts, seed_customers, best_of, ms
+
+pytestmark = pytest.mark.bench
+
+PART_COUNT = 1000
+REPEAT = 5
+
+def purchase_details(line_count):
+    """进货明细，配件循环使用，行数超过配件数时同一配件出现多次"""
+    return [PurchaseDetail(part_id=i % PART_COUNT + 1, quantity=2, unit_price=30.0, subtotal=60.0)
+            for i in range(line_count)]
+
+def legacy_purchase(order, details):
+    """原先的写法：每行明细一条 INSERT、一条库存 UPDATE"""
+    manager = DatabaseManager.get_shared(settings.DATABASE_PATH)
+    with manager.transaction() as conn:
+        order_id = conn.execute(
+            "INSERT INTO purchase_orders (supplier_name, purchase_date, total_amount, status, operator, remarks) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (order.supplier_name, order.purchase_date, order.total_amount, order.status,
+             order.operator, order.remarks)).lastrowid
+        for detail in details:
+            conn.execute("INSERT INTO purchase_details (order_id, part_id, quantity, unit_price, subtotal) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (order_id, detail.part_id, detail.quantity, detail.unit_price, detail.subtotal))
+            conn.execute("UPDATE parts SET stock_quantity = stock_quantity + ?, "
+                         "update_time = CURRENT_TIMESTAMP WHERE part_id = ?",
+                         (detail.quantity, detail.part_id))
+    return order_id
+
+@pytest.mark.parametrize('line_count', [10, 100, 1000])
+def test_receipt_writes(db, scaled, bench_report, line_count):
+    line_count = scaled(line_count)
+    seed_parts(PART_COUNT)
+    seed_customers(1)
+    db.execute_update("UPDATE parts SET stock_quantity = 1000000")
+    purchase_dao = PurchaseOrderDAO()
+    repair_dao = RepairOrderDAO()
+    
+    details = purchase_details(line_count)
+    order = PurchaseOrder(supplier_name="基准供应商", total_amount=60.0 * line_count)
+    purchase, _ = best_of(purchase_dao.add_purchase_order, order, details, repeat=REPEAT)
+    legacy, _ = best_of(legacy_purchase, order, details, repeat=REPEAT)
+    
+    def repair_order():
+        usage = [RepairPartsUsage(part_id=i % PART_COUNT + 1, quantity_used=1, unit_price=50.0,
+                                  subtotal=50.0) for i in range(line_count)]
+        return repair_dao.add_repair_order(RepairOrder(customer_id=1), usage)
+    repair, _ = best_of(repair_order, repeat=REPEAT)
+    
+    stock = db.execute_query("SELECT SUM(stock_quantity) FROM parts")[0][0]
+    # 两种进货写法各执行 REPEAT 次（每行 +2），维修单执行 REPEAT 次（每行 -1）
+    assert stock == 1000000 * PART_COUNT + REPEAT * (2 * 2 * line_count - line_count)
+    bench_report(f"{line_count} 行：进货单 {ms(purchase)}（逐行写入 {ms(legacy)}），维修单 {ms(repair)}")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索基准：5万个配件、20万个客户
+
+对比 FTS5 trigram 全文索引与 LIKE 全表扫描，两种方式返回的记录必须相同。
+"""
+
+import pytest
+import models.database
+from models.customers import CustomerDAO
+from models.parts import PartDAO
+from .support import seed_parts, seed_customers, best_of, ms
+
+pytestmark = pytest.mark.bench
+
+PART_KEYWORDS = ['刹车片0012', '博世机油', 'P00123']
+CUSTOMER_KEYWORDS = ['012345', '客户00999', '卡罗拉']
+
+def compare(monkeypatch, search, key, keywords):
+    """返回 [(关键字, 全文索引耗时, LIKE耗时, 行数)]，key 为记录ID的属性名"""
+    results = []
+    for keyword in keywords:
+        fulltext, rows = best_of(search, keyword, repeat=3)
+        with monkeypatch.context() as patch:
+            patch.setattr(models.database, 'FULLTEXT_SEARCH_ENABLED', False)
+            like, like_rows = best_of(search, keyword, repeat=3)
+        assert {getattr(row, key) for row in rows} == {getattr(row, key) for row in like_rows}
+        results.append((keyword, fulltext, like, len(rows)))
+    return results
+
+def test_search(db, scaled, bench_report, monkeypatch):
+    if not db.can_fulltext_search('parts_fts', 'abc'):
+        pytest.skip("SQLite 未编译 FTS5 trigram")
+    part_count = scaled(50_000)
+    customer_count = scaled(200_000)
+    seed_parts(part_count)
+    seed_customers(customer_count)
+    
+    for label, search, key, keywords in (
+            (f"{part_count} 个配件", PartDAO().search_parts, 'part_id', PART_KEYWORDS),
+            (f"{customer_count} 个客户", CustomerDAO().search_customers, 'customer_id',
+             CUSTOMER_KEYWORDS)):
+        for keyword, fulltext, like, rows in compare(monkeypatch, search, key, keywords):
+            bench_report(f"{label} 搜索“{keyword}”：全文索引 {ms(fulltext)}，LIKE {ms(like)}，{rows} 行")
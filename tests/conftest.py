@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+
+数据库、报表和备份目录在导入任何业务模块之前改到临时目录，
+测试不会读写 data/ 下的正式数据库。
+
+tests/bench 下的性能基准默认跳过，用 --bench 运行（--bench-scale 按比例缩放数据量）：
+    python -m pytest tests/bench --bench
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config.settings as settings
+
+TEMP_DIR = Path(tempfile.mkdtemp(prefix='auto_repair_test_'))
+settings.DATABASE_PATH = TEMP_DIR / 'test.db'
+settings.REPORT_DIR = TEMP_DIR / 'reports'
+settings.BACKUP_DIR = TEMP_DIR / 'backups'
+
+from models.database import DatabaseManager, close_all_pools
+
+@pytest.fixture
+def db():
+    """每个测试使用一个新建的空数据库"""
+    close_all_pools()
+    for path in TEMP_DIR.iterdir():
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    db_manager = DatabaseManager.get_shared(settings.DATABASE_PATH)
+    db_manager.init_database()
+    yield db_manager
+    close_all_pools()
+
+def pytest_addoption(parser):
+    parser.addoption('--bench', action='store_true', help="运行 tests/bench 下的性能基准")
+    parser.addoption('--bench-scale', type=float, default=1.0,
+                     help="性能基准数据量的缩放比例（如 0.1 只生成十分之一的数据）")
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "bench: 性能基准，耗时较长，只在指定 --bench 时运行")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--bench'):
+        return
+    skip = pytest.mark.skip(reason="性能基准需指定 --bench 运行")
+    for item in items:
+        if 'bench' in item.keywords:
+            item.add_marker(skip)
+
+def pytest_sessionfinish(session, exitstatus):
+    close_all_pools()
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份与恢复测试
+"""
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from models.parts import Part, PartDAO
+from utils.database_utils import DatabaseUtils
+
+def part_codes():
+    return sorted(part.part_code for part in PartDAO().get_all_parts())
+
+def test_restore_from_differential_keeps_backups(db):
+    """全量 → 差异 → 从差异恢复 → 差异 → 从差异恢复，差异备份及其基准都不会被删除"""
+    dao = PartDAO()
+    dao.add_part(Part(part_name="机油", part_code="P001"))
+    DatabaseUtils.backup_database(differential=False)
+    
+    dao.add_part(Part(part_name="滤芯", part_code="P002"))
+    first_diff = DatabaseUtils.backup_database(differential=True)
+    assert '.diff' in Path(first_diff).suffixes
+    
+    DatabaseUtils.restore_database(first_diff)
+    assert part_codes() == ['P001', 'P002']
+    
+    dao.add_part(Part(part_name="轮胎", part_code="P003"))
+    second_diff = DatabaseUtils.backup_database(differential=True)
+    assert '.diff' in Path(second_diff).suffixes
+    
+    DatabaseUtils.restore_database(second_diff)
+    assert part_codes() == ['P001', 'P002', 'P003']
+    
+    names = {backup['name'] for backup in DatabaseUtils.get_backup_list()}
+    for backup_path in (first_diff, second_diff):
+        assert Path(backup_path).exists()
+        assert Path(backup_path).name in names
+    
+    # 两个差异备份仍然都能恢复
+    DatabaseUtils.restore_database(first_diff)
+    assert part_codes() == ['P001', 'P002']
+
+def test_backup_names_are_unique(db):
+    """同一秒内的多次备份使用不同的文件名"""
+    paths = {DatabaseUtils.backup_database("manual", differential=False) for _ in range(3)}
+    assert len(paths) == 3
+    assert all(Path(path).exists() for path in paths)
+
+
+def test_restore_from_path_with_uri_characters(db, tmp_path):
+    """备份文件路径中含有 # ? % 空格时也能恢复"""
+    dao = PartDAO()
+    dao.add_part(Part(part_name="机油", part_code="P001"))
+    backup_path = tmp_path / "备份 #1 ?100%.db"
+    with closing(sqlite3.connect(db.db_path)) as source, closing(sqlite3.connect(backup_path)) as target:
+        source.backup(target)
+    
+    dao.add_part(Part(part_name="滤芯", part_code="P002"))
+    db.restore_from(backup_path)
+    assert part_codes() == ['P001']
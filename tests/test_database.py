@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库连接测试
+"""
+
+import logging
+import sqlite3
+import threading
+import pytest
+from config import settings
+from models.database import DatabaseManager, get_pool
+
+def test_validation_errors_are_not_logged_as_database_errors(db, caplog):
+    """业务校验错误照常抛出，但不作为数据库错误记录；SQL 错误仍会记录"""
+    manager = DatabaseManager.get_shared(settings.DATABASE_PATH)
+    with pytest.raises(ValueError):
+        with manager.get_connection():
+            raise ValueError("库存不足")
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+    
+    with pytest.raises(sqlite3.Error):
+        manager.execute_query("SELECT * FROM no_such_table")
+    assert [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+def test_iter_query_closed_on_other_thread_returns_connection(db):
+    """未读完的查询生成器在其他线程关闭时，连接仍归还到连接池"""
+    manager = DatabaseManager.get_shared(settings.DATABASE_PATH)
+    pool = get_pool(settings.DATABASE_PATH)
+    rows = manager.iter_query("SELECT 1 UNION ALL SELECT 2", fetch_size=1)
+    assert next(rows)[0][0] == 1
+    assert pool.get_stats()['in_use'] == 1
+    
+    closer = threading.Thread(target=rows.close)
+    closer.start()
+    closer.join()
+    
+    assert pool.get_stats()['in_use'] == 0
+    assert manager.execute_query("SELECT 1")[0][0] == 1
+
+def test_writes_inside_transaction_commit_with_it(db):
+    """transaction() 中的 execute_insert/execute_update 不提前提交，异常时一起回滚"""
+    manager = DatabaseManager.get_shared(settings.DATABASE_PATH)
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            part_id = manager.execute_insert(
+                "INSERT INTO parts (part_name, part_code) VALUES (?, ?)", ("机油", "P001"))
+            manager.execute_update("UPDATE parts SET stock_quantity = 5 WHERE part_id = ?", (part_id,))
+            raise RuntimeError("中途失败")
+    assert manager.execute_query("SELECT COUNT(*) FROM parts")[0][0] == 0
+    
+    manager.execute_insert("INSERT INTO parts (part_name, part_code) VALUES (?, ?)", ("滤芯", "P002"))
+    assert manager.execute_query("SELECT COUNT(*) FROM parts")[0][0] == 1
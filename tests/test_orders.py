@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+订单列表分页与库存变动测试
+"""
+
+from datetime import date
+import pytest
+from models.customers import Customer, CustomerDAO
+from models.orders import (RepairOrder, RepairOrderDAO, RepairPartsUsage, PurchaseOrder,
+                           PurchaseOrderDAO, PurchaseDetail)
+from models.parts import Part, PartDAO
+
+def test_keyset_pages_match_full_scan(db):
+    """按 after 逐页翻到底、再按 before 往回翻，结果都与一次性查询一致"""
+    dao = RepairOrderDAO()
+    customer_id = CustomerDAO().add_customer(Customer(customer_name="李四", license_plate="沪B54321"))
+    # 同一天多张订单，分页边界会落在同一日期内
+    for i in range(23):
+        dao.add_repair_order(RepairOrder(customer_id=customer_id, repair_date=date(2024, 5, i % 4 + 1),
+                                         status='已完成' if i % 2 else '进行中'))
+    
+    for filters in ({}, {'status': '已完成'}):
+        full = dao.get_order_list(**filters)
+        assert len(full) == (23 if not filters else 11)
+        
+        pages = [dao.get_order_list(limit=5, **filters)]
+        while len(pages[-1]) == 5:
+            pages.append(dao.get_order_list(limit=5, after=pages[-1][-1].sort_key, **filters))
+        assert [row for page in pages for row in page] == full
+        
+        for page, previous in zip(pages[1:], pages):
+            if page:
+                assert dao.get_order_list(limit=5, before=page[0].sort_key, **filters) == previous
+
+def test_purchase_order_merges_stock_per_part(db):
+    """同一配件出现在多行进货明细中时，库存按合计数量增加"""
+    part_dao = PartDAO()
+    oil = part_dao.add_part(Part(part_name="机油", part_code="P001", stock_quantity=5))
+    filter_id = part_dao.add_part(Part(part_name="滤芯", part_code="P002", stock_quantity=0))
+    untouched = part_dao.add_part(Part(part_name="轮胎", part_code="P003", stock_quantity=8))
+    
+    details = [
+        PurchaseDetail(part_id=oil, quantity=3, unit_price=40.0, subtotal=120.0),
+        PurchaseDetail(part_id=filter_id, quantity=2, unit_price=25.0, subtotal=50.0),
+        PurchaseDetail(part_id=oil, quantity=4, unit_price=38.0, subtotal=152.0),
+    ]
+    order_id = PurchaseOrderDAO().add_purchase_order(
+        PurchaseOrder(supplier_name="供应商", total_amount=322.0), details)
+    
+    assert len(PurchaseOrderDAO().get_purchase_details(order_id)) == 3
+    assert part_dao.get_part_by_id(oil).stock_quantity == 12
+    assert part_dao.get_part_by_id(filter_id).stock_quantity == 2
+    assert part_dao.get_part_by_id(untouched).stock_quantity == 8
+
+@pytest.mark.parametrize('batch_size', [1, 10])
+def test_bulk_repair_orders_roll_back_on_short_stock(db, batch_size):
+    """批量导入中多张订单合计用量超过库存时，整个导入回滚（同一批内、跨批次都是如此）"""
+    part_dao = PartDAO()
+    oil = part_dao.add_part(Part(part_name="机油", part_code="P001", stock_quantity=5))
+    customer_id = CustomerDAO().add_customer(Customer(customer_name="王五"))
+    dao = RepairOrderDAO()
+    
+    def orders(quantities):
+        return [(RepairOrder(customer_id=customer_id),
+                 [RepairPartsUsage(part_id=oil, quantity_used=quantity, unit_price=50.0)])
+                for quantity in quantities]
+    
+    with pytest.raises(ValueError, match="库存不足"):
+        dao.bulk_add_repair_orders(orders([2, 2, 2]), batch_size=batch_size)
+    assert dao.count_orders() == 0
+    assert part_dao.get_part_by_id(oil).stock_quantity == 5
+    
+    dao.bulk_add_repair_orders(orders([2, 3]), batch_size=batch_size)
+    assert dao.count_orders() == 2
+    assert part_dao.get_part_by_id(oil).stock_quantity == 0
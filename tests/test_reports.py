@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日收入汇总表与订单统计测试
+"""
+
+import tracemalloc
+from datetime import date
+from models.orders import RepairOrder, RepairOrderDAO
+from services.order_service import OrderService
+from services.report_service import ReportService
+
+def add_order(dao, customer_id, day, status, labor_cost, parts_cost):
+    order = RepairOrder(customer_id=customer_id, repair_date=date(2024, 3, day),
+                        labor_cost=labor_cost, parts_cost=parts_cost,
+                        total_amount=labor_cost + parts_cost, status=status)
+    order.order_id = dao.add_repair_order(order)
+    return order
+
+def test_daily_revenue_matches_raw_aggregate(db):
+    """插入、修改金额和日期、变更状态、删除订单后，汇总表与原始汇总一致"""
+    dao = RepairOrderDAO()
+    report = ReportService()
+    customer_id = db.execute_insert("INSERT INTO customers (customer_name) VALUES (?)", ("张三",))
+    
+    orders = [add_order(dao, customer_id, day % 3 + 1, status, 100.0 + day, 20.5 * day)
+              for day, status in enumerate(['已完成', '进行中', '已完成', '已完成', '进行中', '已完成'])]
+    assert report.check_daily_revenue() == []
+    
+    orders[0].labor_cost = 300.0
+    orders[0].total_amount = orders[0].labor_cost + orders[0].parts_cost
+    orders[2].repair_date = date(2024, 3, 9)
+    orders[1].status = '已完成'
+    orders[3].status = '进行中'
+    for order in orders[:4]:
+        dao.update_repair_order(order)
+    assert report.check_daily_revenue() == []
+    
+    db.execute_update("DELETE FROM repair_orders WHERE order_id = ?", (orders[5].order_id,))
+    assert report.check_daily_revenue() == []
+    
+    rollup = {row['repair_date']: row['total_amount']
+              for row in db.execute_query("SELECT * FROM daily_revenue")}
+    db.rebuild_daily_revenue()
+    assert {row['repair_date']: row['total_amount']
+            for row in db.execute_query("SELECT * FROM daily_revenue")} == rollup
+
+
+def test_order_statistics_memory_does_not_grow_with_orders(db):
+    """订单统计在数据库中汇总，订单数相差百倍时内存峰值基本相同"""
+    dao = RepairOrderDAO()
+    service = OrderService()
+    customer_id = db.execute_insert("INSERT INTO customers (customer_name) VALUES (?)", ("张三",))
+    statuses = ['已完成', '进行中', '维修中', '已取消']
+    
+    def seed(count):
+        dao.bulk_add_repair_orders(
+            (RepairOrder(customer_id=customer_id, repair_date=date(2024, 3, i % 28 + 1),
+                         labor_cost=100.0, total_amount=100.0, status=statuses[i % 4]), None)
+            for i in range(count))
+    
+    def statistics_peak():
+        service.get_order_statistics()  # 预热：语句缓存、连接等一次性开销不计入
+        tracemalloc.start()
+        try:
+            statistics = service.get_order_statistics()
+            return tracemalloc.get_traced_memory()[1], statistics
+        finally:
+            tracemalloc.stop()
+    
+    seed(200)
+    small_peak, small = statistics_peak()
+    seed(19800)
+    large_peak, large = statistics_peak()
+    
+    assert small.total_orders == 200 and large.total_orders == 20000
+    assert large_peak < small_peak * 1.5 + 16 * 1024
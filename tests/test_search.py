@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配件搜索测试
+"""
+
+import sqlite3
+
+import pytest
+from models.parts import Part, PartDAO
+from services.inventory_service import InventoryService
+
+@pytest.fixture
+def fulltext(db):
+    if not db.can_fulltext_search('parts_fts', 'abc'):
+        pytest.skip("SQLite 未编译 FTS5 trigram")
+    return db
+
+def test_stock_change_does_not_rewrite_fulltext_index(fulltext):
+    """只改库存不触发全文索引更新，改名称后索引随之更新"""
+    dao = PartDAO()
+    part_id = dao.add_part(Part(part_name="博世机油滤清器", part_code="P001", brand="博世"))
+    
+    with fulltext.get_connection() as conn:
+        before = conn.total_changes
+        dao.update_stock(part_id, 5)
+        assert conn.total_changes - before == 1  # 只有 parts 本身一行，没有索引行的删除和插入
+    
+    part = dao.get_part_by_id(part_id)
+    part.part_name = "马勒空气滤清器"
+    dao.update_part(part)
+    assert [p.part_id for p in dao.search_parts("马勒空气")] == [part_id]
+    assert dao.search_parts("博世机油") == []
+
+
+def test_cached_search_matches_uncached(db):
+    """边输入边搜索时，缓存收窄的结果与直接查询数据库一致（% _ 按字面匹配，大小写规则相同）"""
+    dao = PartDAO()
+    for name, code, brand in [("机油滤清器", "OF_100", "Bosch"), ("机油滤清器", "OF%100", "BOSCH"),
+                              ("机油滤清器", "OFX100", "bosch"), ("空气滤清器", "AF-200", "Mann"),
+                              ("火花塞", "SP_01", "NGK"), ("刹车片", "BP%02", "Brembo")]:
+        dao.add_part(Part(part_name=name, part_code=code, brand=brand))
+    service = InventoryService()
+    
+    def ids(parts):
+        return sorted(part.part_id for part in parts)
+    
+    for typed in ["O", "OF", "OF_", "OF_1", "OF_10", "OF%", "OF%1", "%", "_", "_0", "b",
+                  "Bo", "BOS", "bosC", "滤", "机油", "机油滤", "机油滤清器"]:
+        assert ids(service.search_parts_cached(typed)) == ids(dao.search_parts(typed)), typed
+    
+    assert ids(dao.search_parts("OF_")) == ids(dao.search_parts("OF_1"))
+    assert len(dao.search_parts("%")) == 2
+
+def test_cache_sees_writes_from_other_connections(db, monkeypatch):
+    """其他终端（独立连接）修改配件后缓存失效，没有修改时继续命中缓存"""
+    dao = PartDAO()
+    part_id = dao.add_part(Part(part_name="火花塞", part_code="SP01", stock_quantity=10))
+    service = InventoryService()
+    queries = []
+    search_parts = dao.search_parts
+    monkeypatch.setattr(service.part_dao, 'search_parts',
+                        lambda *args: queries.append(args) or search_parts(*args))
+    
+    assert service.search_parts_cached("火花")[0].stock_quantity == 10
+    assert service.search_parts_cached("火花")[0].stock_quantity == 10
+    assert len(queries) == 1
+    
+    other = sqlite3.connect(db.db_path)
+    with other:
+        other.execute("UPDATE parts SET stock_quantity=3 WHERE part_id=?", (part_id,))
+    other.close()
+    
+    assert service.search_parts_cached("火花")[0].stock_quantity == 3
+    assert len(queries) == 2
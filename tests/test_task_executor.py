@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务执行器测试（用不需要显示器的假控件代替Tk窗口）
+"""
+
+import threading
+import time
+from gui.task_executor import TaskExecutor
+
+class FakeWidget:
+    """只实现 TaskExecutor 用到的控件方法，after 的回调由测试手动执行"""
+    
+    def __init__(self):
+        self.scheduled = []
+    
+    def bind(self, *args, **kwargs):
+        pass
+    
+    def after(self, delay, callback):
+        self.scheduled.append(callback)
+    
+    def cget(self, name):
+        return ''
+    
+    def config(self, **kwargs):
+        pass
+
+def run_until_idle(widget, executor, timeout=5):
+    """在当前线程（相当于主线程）处理回调，直到没有待完成的任务"""
+    deadline = time.monotonic() + timeout
+    while executor.busy and time.monotonic() < deadline:
+        callbacks, widget.scheduled = widget.scheduled, []
+        for callback in callbacks:
+            callback()
+        time.sleep(0.01)
+
+def test_submit_write_ignores_resubmit_while_pending():
+    widget = FakeWidget()
+    executor = TaskExecutor(widget)
+    release = threading.Event()
+    calls = []
+    results = []
+    
+    def save(value):
+        release.wait(5)
+        calls.append(value)
+        return value
+    
+    first = executor.submit_write(save, 1, on_success=results.append)
+    second = executor.submit_write(save, 2, on_success=results.append)
+    assert first is not None
+    assert second is None
+    
+    release.set()
+    run_until_idle(widget, executor)
+    assert calls == [1]
+    assert results == [1]
+    
+    # 上一个写操作完成后可以再次提交
+    executor.submit_write(save, 3, on_success=results.append)
+    run_until_idle(widget, executor)
+    assert calls == [1, 3]
+
+def test_submit_write_allows_retry_after_error():
+    widget = FakeWidget()
+    executor = TaskExecutor(widget)
+    errors = []
+    
+    def fail():
+        raise ValueError("库存不足")
+    
+    executor.submit_write(fail, on_error=errors.append)
+    run_until_idle(widget, executor)
+    assert len(errors) == 1
+    assert executor.submit_write(lambda: None) is not None
+    run_until_idle(widget, executor)
+
+def test_failing_posted_call_is_logged(caplog):
+    widget = FakeWidget()
+    executor = TaskExecutor(widget)
+    progress = []
+    
+    def broken(value):
+        raise RuntimeError("进度条已销毁")
+    
+    def work():
+        executor.post(broken, 1)
+        executor.post(progress.append, 2)
+    
+    executor.submit(work)
+    run_until_idle(widget, executor)
+    assert progress == [2]
+    assert any(record.exc_info and "进度条已销毁" in str(record.exc_info[1])
+               for record in caplog.records)
@@ -4,53 +4,397 @@
 数据库工具模块
 """
 
-import sqlite3
-import shutil
+import gzip
+import hashlib
+import json
 import os
-from datetime import datetime
+import shutil
+import sqlite3
+import struct
+import threading
+from collections import namedtuple
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from config.settings import DATABASE_PATH, BACKUP_DIR
+from config.settings import (DATABASE_PATH, BACKUP_DIR, BACKUP_COMPRESSION,
+                             BACKUP_FULL_INTERVAL_DAYS, BACKUP_DIFF_MAX_RATIO,
+                             BACKUP_KEEP_DAILY, BACKUP_KEEP_WEEKLY)
+from models.database import DatabaseManager
+from models.parts import PartDAO
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+MANIFEST_NAME = 'manifest.json'  # 备份清单文件名
+PAGE_DIGEST_SIZE = 16  # 每页摘要的字节数（blake2b）
+COPY_CHUNK_SIZE = 1024 * 1024  # 解压时每次复制的字节数
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# 备份、恢复、清理都会改写备份清单，同一时间只允许一个操作
+_backup_lock = threading.RLock()
+
+# 索引检查结果：查询名称、SQL、执行计划各步、其中的整表扫描
+QueryPlan = namedtuple('QueryPlan', ['name', 'sql', 'plan', 'full_scans'])
 
 class DatabaseUtils:
-    """数据库工具类"""
+    """数据库工具类
+    
+    备份文件及其说明登记在 BACKUP_DIR/manifest.json 中：
+    - 全量备份（*.db.gz / *.db.zst）：整个数据库的压缩副本，另有 *.pages 文件记录每页摘要
+    - 差异备份（*.diff.gz / *.diff.zst）：只保存与基准全量备份相比变化了的页
+    """
     
     @staticmethod
-    def backup_database(backup_name=None):
-        """备份数据库"""
-        try:
-            if not backup_name:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                backup_name = f"auto_repair_backup_{timestamp}.db"
-            
-            backup_path = BACKUP_DIR / backup_name
-            
-            # 确保备份目录存在
-            BACKUP_DIR.mkdir(exist_ok=True)
-            
-            # 复制数据库文件
-            shutil.copy2(DATABASE_PATH, backup_path)
+    def _compression():
+        """新备份使用的压缩格式（未安装zstandard时使用gzip）"""
+        if BACKUP_COMPRESSION == 'zstd' and ZSTD_AVAILABLE:
+            return 'zstd'
+        return 'gzip'
+    
+    @staticmethod
+    def _open_compressed(path, mode, compression):
+        """以流方式打开备份文件，mode 为 'rb' 或 'wb'，compression 为 None 表示未压缩"""
+        if compression == 'gzip':
+            return gzip.open(path, mode, compresslevel=6)
+        if compression == 'zstd':
+            if not ZSTD_AVAILABLE:
+                raise Exception("该备份使用zstd压缩，需要安装zstandard库: pip install zstandard")
+            raw = open(path, mode)
+            if mode == 'wb':
+                return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+            return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return open(path, mode)
+    
+    @staticmethod
+    def _read_exact(stream, size):
+        """从解压流中读取 size 字节（流结束时返回已读到的部分）"""
+        data = b''
+        while len(data) < size:
+            chunk = stream.read(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+    
+    @staticmethod
+    def _iter_pages(db_file, page_size):
+        """逐页读取数据库文件"""
+        with open(db_file, 'rb') as f:
+            while True:
+                page = f.read(page_size)
+                if not page:
+                    break
+                yield page
+    
+    @staticmethod
+    def _page_digest(page):
+        return hashlib.blake2b(page, digest_size=PAGE_DIGEST_SIZE).digest()
+    
+    @staticmethod
+    def _load_manifest():
+        """读取备份清单；清单不存在时登记备份目录中已有的未压缩 .db 备份"""
+        manifest_path = BACKUP_DIR / MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['backups']
+        
+        entries = []
+        if BACKUP_DIR.exists():
+            for file_path in BACKUP_DIR.glob('*.db'):
+                stat = file_path.stat()
+                entries.append({
+                    'name': file_path.name,
+                    'type': 'full',
+                    'compression': None,
+                    'created': datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds'),
+                    'size': stat.st_size
+                })
+        DatabaseUtils._save_manifest(entries)
+        return entries
+    
+    @staticmethod
+    def _save_manifest(entries):
+        """写入备份清单（先写临时文件再替换，避免中途出错留下损坏的清单）"""
+        BACKUP_DIR.mkdir(exist_ok=True)
+        manifest_path = BACKUP_DIR / MANIFEST_NAME
+        temp_path = manifest_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'backups': entries}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+    
+    @staticmethod
+    def _delete_files(entry):
+        """删除备份文件及其页摘要文件"""
+        for name in (entry['name'], entry.get('pages')):
+            if name and (BACKUP_DIR / name).exists():
+                os.remove(BACKUP_DIR / name)
+    
+    @staticmethod
+    def _remove_entries(entries, names):
+        """从清单中删除指定备份及依赖它们的差异备份（连同文件），返回剩余的清单"""
+        names = set(names)
+        names |= {entry['name'] for entry in entries if entry.get('base') in names}
+        for entry in entries:
+            if entry['name'] in names:
+                DatabaseUtils._delete_files(entry)
+        return [entry for entry in entries if entry['name'] not in names]
+    
+    @staticmethod
+    def _unique_stem(entries, stem):
+        """返回清单中未使用的备份文件名主干（重名时追加 _2、_3 ...）
+        
+        备份从不覆盖同名的旧备份：旧的全量备份可能仍是其他差异备份的基准。
+        """
+        used = {entry['name'].split('.')[0] for entry in entries}
+        candidate = stem
+        number = 2
+        while candidate in used:
+            candidate = f"{stem}_{number}"
+            number += 1
+        return candidate
+    
+    @staticmethod
+    def _latest_full(entries, now, page_size):
+        """可作为差异备份基准的最近一次全量备份（没有则返回 None）"""
+        earliest = now - timedelta(days=BACKUP_FULL_INTERVAL_DAYS)
+        # 同一秒内的备份以清单中后登记的为准
+        for entry in reversed(sorted(entries, key=lambda e: e['created'])):
+            if entry['type'] != 'full' or not entry.get('pages'):
+                continue
+            if (datetime.fromisoformat(entry['created']) >= earliest
+                    and entry.get('page_size') == page_size
+                    and (BACKUP_DIR / entry['name']).exists()
+                    and (BACKUP_DIR / entry['pages']).exists()):
+                return entry
+            return None  # 只和最近一次全量备份比较
+        return None
+    
+    @staticmethod
+    def _changed_pages(snapshot, page_size, base):
+        """快照中与基准全量备份不同的页号列表（页号从1开始）"""
+        with open(BACKUP_DIR / base['pages'], 'rb') as f:
+            base_digests = f.read()
+        
+        changed = []
+        for index, page in enumerate(DatabaseUtils._iter_pages(snapshot, page_size)):
+            offset = index * PAGE_DIGEST_SIZE
+            if base_digests[offset:offset + PAGE_DIGEST_SIZE] != DatabaseUtils._page_digest(page):
+                changed.append(index + 1)
+        return changed
+    
+    @staticmethod
+    def _write_full(snapshot, page_size, backup_path, pages_path, compression):
+        """压缩写入全量备份，同时记录每页摘要"""
+        with DatabaseUtils._open_compressed(backup_path, 'wb', compression) as out, \
+                open(pages_path, 'wb') as digests:
+            for page in DatabaseUtils._iter_pages(snapshot, page_size):
+                out.write(page)
+                digests.write(DatabaseUtils._page_digest(page))
+    
+    @staticmethod
+    def _write_diff(snapshot, page_size, page_count, changed, base, backup_path, compression):
+        """压缩写入差异备份：头部（长度 + JSON），然后依次为 页号(4字节) + 页内容"""
+        header = json.dumps({'base': base['name'], 'page_size': page_size,
+                             'page_count': page_count}).encode('utf-8')
+        with DatabaseUtils._open_compressed(backup_path, 'wb', compression) as out, \
+                open(snapshot, 'rb') as src:
+            out.write(struct.pack('>I', len(header)))
+            out.write(header)
+            for page_number in changed:
+                src.seek((page_number - 1) * page_size)
+                out.write(struct.pack('>I', page_number))
+                out.write(src.read(page_size))
+    
+    @staticmethod
+    def _materialize(backup_path, compression, target, entries):
+        """把备份文件还原为普通数据库文件 target
+        
+        差异备份先还原其基准全量备份，再写入变化的页。
+        """
+        name = Path(backup_path).name
+        if '.diff' not in Path(name).suffixes:
+            with DatabaseUtils._open_compressed(backup_path, 'rb', compression) as src, \
+                    open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            return
+        
+        with DatabaseUtils._open_compressed(backup_path, 'rb', compression) as diff:
+            header_size, = struct.unpack('>I', DatabaseUtils._read_exact(diff, 4))
+            header = json.loads(DatabaseUtils._read_exact(diff, header_size))
+            base = next((entry for entry in entries if entry['name'] == header['base']), None)
+            if base is None or not (BACKUP_DIR / base['name']).exists():
+                raise FileNotFoundError(f"差异备份的基准全量备份不存在: {header['base']}")
+            DatabaseUtils._materialize(BACKUP_DIR / base['name'], base['compression'],
+                                       target, entries)
             
-            return str(backup_path)
+            page_size = header['page_size']
+            with open(target, 'r+b') as db:
+                while True:
+                    record = DatabaseUtils._read_exact(diff, 4)
+                    if not record:
+                        break
+                    page_number, = struct.unpack('>I', record)
+                    db.seek((page_number - 1) * page_size)
+                    db.write(DatabaseUtils._read_exact(diff, page_size))
+                db.truncate(header['page_count'] * page_size)
+    
+    @staticmethod
+    def backup_database(backup_name=None, progress_callback=None, differential=None):
+        """备份数据库（SQLite在线备份后流式压缩，备份期间程序可正常读写）
+        
+        differential 为 None 时自动选择：最近一次全量备份在 BACKUP_FULL_INTERVAL_DAYS 天内、
+        且变化的页不超过 BACKUP_DIFF_MAX_RATIO 时做差异备份，否则做全量备份；
+        True/False 强制差异/全量（没有可用的基准时总是全量）。备份完成后按保留策略
+        清理旧备份。progress_callback(已复制页数, 总页数) 在复制数据库时分步调用。
+        返回备份文件路径。
+        """
+        try:
+            with _backup_lock:
+                # 确保备份目录存在
+                BACKUP_DIR.mkdir(exist_ok=True)
+                
+                now = datetime.now()
+                stem = Path(backup_name).stem if backup_name else \
+                    f"auto_repair_backup_{now.strftime('%Y%m%d_%H%M%S')}"
+                stem = DatabaseUtils._unique_stem(DatabaseUtils._load_manifest(), stem)
+                snapshot = BACKUP_DIR / f".{stem}.snapshot"
+                try:
+                    # 得到数据库的一致快照
+                    db_manager = DatabaseManager.get_shared(DATABASE_PATH)
+                    db_manager.backup_to(snapshot, progress_callback=progress_callback)
+                    conn = sqlite3.connect(str(snapshot))
+                    try:
+                        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+                        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+                    finally:
+                        conn.close()
+                    
+                    entries = DatabaseUtils._load_manifest()
+                    base = None
+                    if differential is not False:
+                        base = DatabaseUtils._latest_full(entries, now, page_size)
+                    changed = None
+                    if base is not None:
+                        changed = DatabaseUtils._changed_pages(snapshot, page_size, base)
+                        if differential is None and len(changed) > page_count * BACKUP_DIFF_MAX_RATIO:
+                            changed = None
+                    
+                    compression = DatabaseUtils._compression()
+                    suffix = COMPRESSION_SUFFIXES[compression]
+                    entry = {
+                        'created': now.isoformat(timespec='seconds'),
+                        'compression': compression,
+                        'page_size': page_size,
+                        'page_count': page_count
+                    }
+                    if changed is None:
+                        entry.update(name=f"{stem}.db{suffix}", type='full', pages=f"{stem}.pages")
+                    else:
+                        entry.update(name=f"{stem}.diff{suffix}", type='diff', base=base['name'],
+                                     changed_pages=len(changed))
+                    
+                    backup_path = BACKUP_DIR / entry['name']
+                    if changed is None:
+                        DatabaseUtils._write_full(snapshot, page_size, backup_path,
+                                                  BACKUP_DIR / entry['pages'], compression)
+                    else:
+                        DatabaseUtils._write_diff(snapshot, page_size, page_count, changed, base,
+                                                  backup_path, compression)
+                    entry['size'] = backup_path.stat().st_size
+                    entries.append(entry)
+                    DatabaseUtils._save_manifest(entries)
+                finally:
+                    if snapshot.exists():
+                        os.remove(snapshot)
+                
+                DatabaseUtils.apply_retention()
+                return str(backup_path)
         except Exception as e:
             raise Exception(f"数据库备份失败: {e}")
     
     @staticmethod
-    def restore_database(backup_path):
-        """恢复数据库"""
+    def apply_retention(keep_daily=BACKUP_KEEP_DAILY, keep_weekly=BACKUP_KEEP_WEEKLY):
+        """按保留策略删除旧备份，返回被删除的备份名称列表
+        
+        当天的备份全部保留；此外保留最近 keep_daily 个有备份的日期中每天最新的一份、
+        最近 keep_weekly 个有备份的自然周中每周最新的一份；保留的差异备份所依赖的
+        全量备份一并保留。
+        """
+        try:
+            with _backup_lock:
+                entries = DatabaseUtils._load_manifest()
+                today = date.today().isoformat()
+                keep = {entry['name'] for entry in entries if entry['created'] >= today}
+                days = set()
+                weeks = set()
+                for entry in sorted(entries, key=lambda e: e['created'], reverse=True):
+                    created = datetime.fromisoformat(entry['created'])
+                    day = created.date()
+                    week = created.isocalendar()[:2]
+                    if day not in days and len(days) < keep_daily:
+                        days.add(day)
+                        keep.add(entry['name'])
+                    if week not in weeks and len(weeks) < keep_weekly:
+                        weeks.add(week)
+                        keep.add(entry['name'])
+                keep |= {entry['base'] for entry in entries
+                         if entry['name'] in keep and entry['type'] == 'diff'}
+                
+                removed = [entry['name'] for entry in entries if entry['name'] not in keep]
+                if removed:
+                    DatabaseUtils._save_manifest(DatabaseUtils._remove_entries(entries, removed))
+                return removed
+        except Exception as e:
+            raise Exception(f"清理旧备份失败: {e}")
+    
+    @staticmethod
+    def restore_database(backup_path, progress_callback=None):
+        """恢复数据库
+        
+        备份文件先解压（差异备份与其基准全量备份合并）为临时数据库并做完整性检查；
+        然后备份当前数据库，清空连接池、通过在线备份接口覆盖当前数据库，恢复完成后
+        补建当前版本需要的表和索引。返回恢复前自动备份的文件路径。
+        """
         try:
             if not os.path.exists(backup_path):
                 raise FileNotFoundError(f"备份文件不存在: {backup_path}")
             
-            # 验证备份文件是否为有效的SQLite数据库
-            conn = sqlite3.connect(backup_path)
-            conn.execute('SELECT 1')
-            conn.close()
-            
-            # 备份当前数据库
-            current_backup = DatabaseUtils.backup_database("current_backup_before_restore.db")
+            with _backup_lock:
+                BACKUP_DIR.mkdir(exist_ok=True)
+                suffix = Path(backup_path).suffix
+                compression = next((name for name, value in COMPRESSION_SUFFIXES.items()
+                                    if value == suffix), None)
+                temp_db = BACKUP_DIR / f".restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+                try:
+                    DatabaseUtils._materialize(backup_path, compression, temp_db,
+                                               DatabaseUtils._load_manifest())
+                    
+                    # 验证备份文件是否为有效的SQLite数据库
+                    conn = sqlite3.connect(str(temp_db))
+                    try:
+                        result = conn.execute('PRAGMA quick_check').fetchone()
+                    finally:
+                        conn.close()
+                    if result[0] != 'ok':
+                        raise ValueError(f"备份文件已损坏: {result[0]}")
+                    
+                    # 备份当前数据库
+                    current_backup = DatabaseUtils.backup_database(
+                        f"before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                        differential=False)
+                    
+                    # 恢复数据库
+                    db_manager = DatabaseManager.get_shared(DATABASE_PATH)
+                    db_manager.restore_from(temp_db, progress_callback=progress_callback)
+                    db_manager.init_database()
+                finally:
+                    for path in (temp_db, Path(f"{temp_db}-wal"), Path(f"{temp_db}-shm")):
+                        if path.exists():
+                            os.remove(path)
             
-            # 恢复数据库
-            shutil.copy2(backup_path, DATABASE_PATH)
+            # 配件数据已整体替换，使配件搜索缓存失效
+            PartDAO.mark_changed()
             
             return current_backup
         except Exception as e:
@@ -58,20 +402,22 @@ class DatabaseUtils:
     
     @staticmethod
     def get_backup_list():
-        """获取备份文件列表"""
+        """获取备份文件列表（读取备份清单）"""
         try:
-            if not BACKUP_DIR.exists():
-                return []
+            with _backup_lock:
+                entries = DatabaseUtils._load_manifest()
             
             backup_files = []
-            for file_path in BACKUP_DIR.glob('*.db'):
-                stat = file_path.stat()
+            for entry in entries:
+                created = datetime.fromisoformat(entry['created'])
                 backup_files.append({
-                    'name': file_path.name,
-                    'path': str(file_path),
-                    'size': stat.st_size,
-                    'create_time': datetime.fromtimestamp(stat.st_ctime),
-                    'modify_time': datetime.fromtimestamp(stat.st_mtime)
+                    'name': entry['name'],
+                    'path': str(BACKUP_DIR / entry['name']),
+                    'size': entry['size'],
+                    'type': entry['type'],
+                    'base': entry.get('base'),
+                    'create_time': created,
+                    'modify_time': created
                 })
             
             # 按修改时间倒序排列
@@ -82,8 +428,14 @@ class DatabaseUtils:
     
     @staticmethod
     def delete_backup(backup_path):
-        """删除备份文件"""
+        """删除备份文件（删除全量备份时，依赖它的差异备份一并删除）"""
         try:
+            with _backup_lock:
+                name = Path(backup_path).name
+                entries = DatabaseUtils._load_manifest()
+                if any(entry['name'] == name for entry in entries):
+                    DatabaseUtils._save_manifest(DatabaseUtils._remove_entries(entries, [name]))
+                    return True
             if os.path.exists(backup_path):
                 os.remove(backup_path)
                 return True
@@ -117,37 +469,149 @@ class DatabaseUtils:
             raise Exception(f"数据库完整性检查失败: {e}")
     
     @staticmethod
-    def get_database_info():
-        """获取数据库信息"""
+    def get_database_info(exact=False, with_sizes=False):
+        """获取数据库信息
+        
+        exact=False（快速模式）时业务表行数读取触发器维护的 table_row_counts，
+        其他表使用 ANALYZE 生成的 sqlite_stat1 估计值（没有时为 None）；
+        exact=True 时对每个表执行 COUNT(*)。with_sizes=True 时通过 dbstat 虚拟表
+        统计每个表（含其索引）占用的字节数，SQLite未启用 dbstat 时为 None。
+        """
         try:
-            conn = sqlite3.connect(DATABASE_PATH)
-            cursor = conn.cursor()
-            
-            # 获取数据库大小
-            cursor.execute('PRAGMA page_count')
-            page_count = cursor.fetchone()[0]
-            cursor.execute('PRAGMA page_size')
-            page_size = cursor.fetchone()[0]
-            db_size = page_count * page_size
-            
-            # 获取表信息
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            # 获取每个表的记录数
-            table_counts = {}
-            for table in tables:
-                cursor.execute(f'SELECT COUNT(*) FROM {table}')
-                table_counts[table] = cursor.fetchone()[0]
-            
-            conn.close()
+            db_manager = DatabaseManager.get_shared(DATABASE_PATH)
+            with db_manager.get_connection() as conn:
+                cursor = conn.cursor()
+                
+                # 获取数据库大小
+                cursor.execute('PRAGMA page_count')
+                page_count = cursor.fetchone()[0]
+                cursor.execute('PRAGMA page_size')
+                page_size = cursor.fetchone()[0]
+                db_size = page_count * page_size
+                
+                # 获取表信息
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                tables = [row[0] for row in cursor.fetchall()]
+                
+                # 获取每个表的记录数
+                if exact:
+                    table_counts = {}
+                    for table in tables:
+                        cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+                        table_counts[table] = cursor.fetchone()[0]
+                else:
+                    estimates = {}
+                    if 'sqlite_stat1' in tables:
+                        # stat 列的第一个数字为表的行数
+                        cursor.execute("SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 "
+                                       "GROUP BY tbl")
+                        estimates = dict(cursor.fetchall())
+                    if 'table_row_counts' in tables:
+                        cursor.execute("SELECT table_name, row_count FROM table_row_counts")
+                        estimates.update(cursor.fetchall())
+                    table_counts = {table: estimates.get(table) for table in tables}
+                
+                # 获取每个表（含索引）占用的空间
+                table_sizes = None
+                if with_sizes:
+                    try:
+                        cursor.execute('''
+                            SELECT COALESCE(m.tbl_name, d.name), SUM(d.pgsize)
+                            FROM dbstat d LEFT JOIN sqlite_master m ON m.name = d.name
+                            WHERE d.aggregate = TRUE
+                            GROUP BY COALESCE(m.tbl_name, d.name)
+                        ''')
+                        table_sizes = dict(cursor.fetchall())
+                    except sqlite3.OperationalError:
+                        pass  # SQLite未启用 dbstat 虚拟表
             
             return {
                 'size': db_size,
                 'page_count': page_count,
                 'page_size': page_size,
                 'tables': tables,
-                'table_counts': table_counts
+                'table_counts': table_counts,
+                'counts_exact': exact,
+                'table_sizes': table_sizes
             }
         except Exception as e:
-            raise Exception(f"获取数据库信息失败: {e}")
\ No newline at end of file
+            raise Exception(f"获取数据库信息失败: {e}")
+    
+    @staticmethod
+    def optimize_database():
+        """更新查询统计信息（PRAGMA optimize）"""
+        try:
+            DatabaseManager.get_shared(DATABASE_PATH).optimize()
+            return True
+        except Exception as e:
+            raise Exception(f"数据库优化失败: {e}")
+    
+    @staticmethod
+    def _advisor_queries():
+        """索引检查时重放的常用查询：[(名称, 调用)]，只包含读操作"""
+        from models.customers import CustomerDAO
+        from models.orders import RepairOrderDAO, PurchaseOrderDAO
+        from services.report_service import ReportService
+        
+        part_dao = PartDAO()
+        customer_dao = CustomerDAO()
+        order_dao = RepairOrderDAO()
+        purchase_dao = PurchaseOrderDAO()
+        report_service = ReportService()
+        today = date.today()
+        month_start = today.replace(day=1)
+        return [
+            ('按编号查配件', lambda: part_dao.get_part_by_code('P0001')),
+            ('按类别查配件', lambda: part_dao.search_parts(category='机油')),
+            ('配件类别列表', part_dao.get_categories),
+            ('库存预警', lambda: part_dao.get_low_stock_parts(limit=10)),
+            ('按姓名查客户', lambda: customer_dao.get_customer_by_name('张三')),
+            ('按电话查客户', lambda: customer_dao.get_customer_by_phone('13800000000')),
+            ('订单列表首页', lambda: order_dao.get_order_list(limit=50)),
+            ('按状态查订单', lambda: order_dao.get_order_list(limit=50, status='进行中')),
+            ('客户历史订单', lambda: order_dao.get_order_list(limit=50, customer_id=1)),
+            ('按日期查订单', lambda: order_dao.get_order_list(
+                limit=50, start_date=month_start, end_date=today)),
+            ('订单配件明细', lambda: order_dao.get_repair_parts_usage(1)),
+            ('进货单列表', purchase_dao.get_all_purchase_orders),
+            ('进货明细', lambda: purchase_dao.get_purchase_details(1)),
+            ('月收入报表', lambda: report_service.get_monthly_revenue_report(today.year, today.month)),
+            ('配件使用报表', lambda: report_service.get_parts_usage_report(month_start, today)),
+            ('供应商报表', lambda: report_service.get_supplier_analysis_report(month_start, today)),
+            ('利润报表', lambda: report_service.get_profit_analysis_report(month_start, today)),
+        ]
+    
+    @staticmethod
+    def _is_full_scan(detail):
+        """执行计划中的一步是否为整表扫描（按索引顺序扫描、全文检索虚拟表不算）"""
+        return (detail.startswith('SCAN ') and ' USING ' not in detail
+                and 'VIRTUAL TABLE' not in detail)
+    
+    @staticmethod
+    def check_query_plans():
+        """索引检查：重放常用的 DAO 查询，用 EXPLAIN QUERY PLAN 找出整表扫描
+        
+        查询在当前线程的连接上实际执行一次，通过 trace 回调取得带参数值的SQL，
+        再对每条 SELECT 取执行计划。返回 QueryPlan 列表。
+        """
+        try:
+            db_manager = DatabaseManager.get_shared(DATABASE_PATH)
+            plans = []
+            with db_manager.get_connection() as conn:
+                for name, replay in DatabaseUtils._advisor_queries():
+                    statements = []
+                    conn.set_trace_callback(statements.append)
+                    try:
+                        replay()
+                    finally:
+                        conn.set_trace_callback(None)
+                    
+                    for sql in statements:
+                        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                            continue
+                        plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+                        full_scans = [detail for detail in plan if DatabaseUtils._is_full_scan(detail)]
+                        plans.append(QueryPlan(name, ' '.join(sql.split()), plan, full_scans))
+            return plans
+        except Exception as e:
+            raise Exception(f"索引检查失败: {e}")
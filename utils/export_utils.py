@@ -7,12 +7,18 @@
 import csv
 import json
 import os
+import unicodedata
 from datetime import datetime
+from itertools import chain, islice
+from operator import attrgetter
 from pathlib import Path
-from config.settings import REPORT_DIR
+from config.settings import (REPORT_DIR, EXPORT_FETCH_SIZE, EXPORT_PROGRESS_INTERVAL,
+                             EXCEL_WIDTH_SAMPLE_ROWS)
 try:
     import openpyxl
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
@@ -20,6 +26,14 @@ except ImportError:
 class ExportUtils:
     """导出工具类"""
     
+    PARTS_HEADERS = ['配件ID', '配件名称', '配件编号', '类别', '品牌', '规格', '单位',
+                     '进价', '售价', '库存数量', '最小库存', '供应商']
+    
+    REPAIR_ORDERS_HEADERS = ['订单号', '客户姓名', '车辆类型', '车牌号', '维修日期',
+                             '故障描述', '维修内容', '工时费', '配件费', '总金额', '状态', '技师']
+    
+    CUSTOMERS_HEADERS = ['客户ID', '客户姓名', '联系电话', '地址', '车辆信息']
+    
     @staticmethod
     def export_to_csv(data, filename, headers=None):
         """导出数据到CSV文件"""
@@ -99,7 +113,37 @@ class ExportUtils:
     
     @staticmethod
     def export_to_excel(data, filename, headers=None, sheet_name='Sheet1'):
-        """导出数据到Excel文件"""
+        """导出数据到Excel文件（行可以是字典、列表或元组）"""
+        def to_row(row_data):
+            if isinstance(row_data, dict):
+                if headers:
+                    return [row_data.get(header, '') for header in headers]
+                return list(row_data.values())
+            if isinstance(row_data, (list, tuple)):
+                return row_data
+            return [str(row_data)]
+        
+        return ExportUtils.stream_to_excel(map(to_row, data), filename, headers, sheet_name)
+    
+    @staticmethod
+    def _text_width(value):
+        """单元格内容的显示宽度（中日韩全角字符按2个字符计）"""
+        if value is None:
+            return 0
+        text = str(value)
+        if text.isascii():
+            return len(text)
+        return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+    
+    @staticmethod
+    def stream_to_excel(rows, filename, headers=None, sheet_name='Sheet1',
+                        progress_callback=None, total=None):
+        """使用 openpyxl 只写模式逐行写入Excel文件
+        
+        只写模式下行数据直接写入临时文件，不在内存中保留单元格对象。列宽须在写入
+        第一行之前确定，因此先读取前 EXCEL_WIDTH_SAMPLE_ROWS 行估算列宽，再连同
+        其余行依次写入。进度回调同 stream_to_csv。
+        """
         if not EXCEL_AVAILABLE:
             raise Exception("Excel导出功能需要安装openpyxl库: pip install openpyxl")
         
@@ -109,164 +153,184 @@ class ExportUtils:
             
             filepath = REPORT_DIR / filename
             
-            # 创建工作簿和工作表
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = sheet_name
+            rows = iter(rows)
+            sample = list(islice(rows, EXCEL_WIDTH_SAMPLE_ROWS))
+            
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet(title=sheet_name)
             
-            # 设置标题样式
-            header_font = Font(bold=True, color='FFFFFF')
-            header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-            header_alignment = Alignment(horizontal='center', vertical='center')
+            # 按表头和样本行估算列宽
+            widths = [ExportUtils._text_width(header) for header in headers or ()]
+            for row_data in sample:
+                for col_idx, value in enumerate(row_data):
+                    width = ExportUtils._text_width(value)
+                    if col_idx >= len(widths):
+                        widths.append(width)
+                    elif width > widths[col_idx]:
+                        widths[col_idx] = width
+            for col_idx, width in enumerate(widths, 1):
+                ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 2, 50)
             
             # 写入表头
             if headers:
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=1, column=col, value=header)
+                header_font = Font(bold=True, color='FFFFFF')
+                header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+                header_alignment = Alignment(horizontal='center', vertical='center')
+                header_cells = []
+                for header in headers:
+                    cell = WriteOnlyCell(ws, value=header)
                     cell.font = header_font
                     cell.fill = header_fill
                     cell.alignment = header_alignment
-                start_row = 2
-            else:
-                start_row = 1
+                    header_cells.append(cell)
+                ws.append(header_cells)
             
             # 写入数据
-            if isinstance(data, list):
-                for row_idx, row_data in enumerate(data, start_row):
-                    if isinstance(row_data, dict):
-                        if headers:
-                            for col_idx, header in enumerate(headers, 1):
-                                ws.cell(row=row_idx, column=col_idx, value=row_data.get(header, ''))
-                        else:
-                            for col_idx, value in enumerate(row_data.values(), 1):
-                                ws.cell(row=row_idx, column=col_idx, value=value)
-                    elif isinstance(row_data, (list, tuple)):
-                        for col_idx, value in enumerate(row_data, 1):
-                            ws.cell(row=row_idx, column=col_idx, value=value)
-                    else:
-                        ws.cell(row=row_idx, column=1, value=str(row_data))
-            
-            # 自动调整列宽
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            written = reported = 0
+            for row_data in chain(sample, rows):
+                ws.append(row_data)
+                written += 1
+                if progress_callback and written - reported >= EXPORT_PROGRESS_INTERVAL:
+                    progress_callback(written, total)
+                    reported = written
             
             # 保存文件
             wb.save(filepath)
+            if progress_callback:
+                progress_callback(written, total)
             return str(filepath)
         except Exception as e:
             raise Exception(f"Excel导出失败: {e}")
     
     @staticmethod
-    def export_parts_list(parts_data, format='csv'):
-        """导出配件列表"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    def stream_to_csv(rows, filename, headers, progress_callback=None, total=None):
+        """逐批写入CSV文件
         
-        if format.lower() == 'csv':
-            filename = f'配件列表_{timestamp}.csv'
-            headers = ['配件ID', '配件名称', '配件编号', '类别', '品牌', '规格', '单位', 
-                      '进价', '售价', '库存数量', '最小库存', '供应商']
+        rows 可以是任意行（元组/列表）迭代器，如 DAO 的游标迭代器；每次只取
+        EXPORT_FETCH_SIZE 行写入文件，内存占用与总行数无关。
+        progress_callback(已写入行数, total) 每写入 EXPORT_PROGRESS_INTERVAL 行及结束时调用一次。
+        """
+        try:
+            # 确保报表目录存在
+            REPORT_DIR.mkdir(exist_ok=True)
             
-            csv_data = []
-            for part in parts_data:
-                csv_data.append({
-                    '配件ID': part.part_id,
-                    '配件名称': part.part_name,
-                    '配件编号': part.part_code,
-                    '类别': part.category,
-                    '品牌': part.brand,
-                    '规格': part.specification,
-                    '单位': part.unit,
-                    '进价': part.purchase_price,
-                    '售价': part.selling_price,
-                    '库存数量': part.stock_quantity,
-                    '最小库存': part.min_stock,
-                    '供应商': part.supplier
-                })
+            filepath = REPORT_DIR / filename
             
-            return ExportUtils.export_to_csv(csv_data, filename, headers)
-        
-        elif format.lower() == 'json':
-            filename = f'配件列表_{timestamp}.json'
-            json_data = [part.to_dict() for part in parts_data]
-            return ExportUtils.export_to_json(json_data, filename)
-        
-        else:
-            raise ValueError(f"不支持的导出格式: {format}")
+            rows = iter(rows)
+            written = reported = 0
+            with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(headers)
+                while True:
+                    chunk = list(islice(rows, EXPORT_FETCH_SIZE))
+                    if not chunk:
+                        break
+                    writer.writerows(chunk)
+                    written += len(chunk)
+                    if progress_callback and written - reported >= EXPORT_PROGRESS_INTERVAL:
+                        progress_callback(written, total)
+                        reported = written
+            
+            if progress_callback:
+                progress_callback(written, total)
+            return str(filepath)
+        except Exception as e:
+            raise Exception(f"CSV导出失败: {e}")
     
     @staticmethod
-    def export_repair_orders(orders_data, format='csv'):
-        """导出维修订单"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    def stream_to_json(records, filename, progress_callback=None, total=None):
+        """逐批写入JSON数组，每条记录（字典）占一行
         
-        if format.lower() == 'csv':
-            filename = f'维修订单_{timestamp}.csv'
-            headers = ['订单号', '客户姓名', '车辆类型', '车牌号', '维修日期', 
-                      '故障描述', '维修内容', '工时费', '配件费', '总金额', '状态', '技师']
+        与 stream_to_csv 相同，records 逐批取出后立即写入文件，不在内存中拼出完整列表。
+        """
+        try:
+            # 确保报表目录存在
+            REPORT_DIR.mkdir(exist_ok=True)
             
-            csv_data = []
-            for order in orders_data:
-                csv_data.append({
-                    '订单号': order.order_id,
-                    '客户姓名': getattr(order, 'customer_name', ''),
-                    '车辆类型': order.vehicle_type,
-                    '车牌号': order.vehicle_number,
-                    '维修日期': order.repair_date,
-                    '故障描述': order.fault_description,
-                    '维修内容': order.repair_content,
-                    '工时费': order.labor_cost,
-                    '配件费': order.parts_cost,
-                    '总金额': order.total_amount,
-                    '状态': order.status,
-                    '技师': order.technician
-                })
+            filepath = REPORT_DIR / filename
             
-            return ExportUtils.export_to_csv(csv_data, filename, headers)
-        
-        elif format.lower() == 'json':
-            filename = f'维修订单_{timestamp}.json'
-            json_data = [order.to_dict() for order in orders_data]
-            return ExportUtils.export_to_json(json_data, filename)
-        
-        else:
-            raise ValueError(f"不支持的导出格式: {format}")
+            records = iter(records)
+            written = reported = 0
+            with open(filepath, 'w', encoding='utf-8') as jsonfile:
+                jsonfile.write('[')
+                while True:
+                    chunk = list(islice(records, EXPORT_FETCH_SIZE))
+                    if not chunk:
+                        break
+                    separator = ',\n' if written else '\n'
+                    jsonfile.write(separator + ',\n'.join(
+                        json.dumps(record, ensure_ascii=False, default=str) for record in chunk))
+                    written += len(chunk)
+                    if progress_callback and written - reported >= EXPORT_PROGRESS_INTERVAL:
+                        progress_callback(written, total)
+                        reported = written
+                jsonfile.write('\n]\n')
+            
+            if progress_callback:
+                progress_callback(written, total)
+            return str(filepath)
+        except Exception as e:
+            raise Exception(f"JSON导出失败: {e}")
     
     @staticmethod
-    def export_customers(customers_data, format='csv'):
-        """导出客户列表"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        if format.lower() == 'csv':
-            filename = f'客户列表_{timestamp}.csv'
-            headers = ['客户ID', '客户姓名', '联系电话', '地址', '车辆信息']
-            
-            csv_data = []
-            for customer in customers_data:
-                csv_data.append({
-                    '客户ID': customer.customer_id,
-                    '客户姓名': customer.customer_name,
-                    '联系电话': customer.phone,
-                    '地址': customer.address,
-                    '车辆信息': customer.vehicle_info
-                })
-            
-            return ExportUtils.export_to_csv(csv_data, filename, headers)
+    def _to_record(obj):
+        """模型对象转字典（OrderListRow 等具名元组使用 _asdict）"""
+        if hasattr(obj, 'to_dict'):
+            return obj.to_dict()
+        return obj._asdict()
+    
+    @staticmethod
+    def _export_rows(items, format, title, headers, to_row, filename=None,
+                     progress_callback=None, total=None):
+        """按格式（csv/json/xlsx）流式导出模型对象序列（items 可以是列表或DAO迭代器）"""
+        format = format.lower()
+        if format not in ('csv', 'json', 'xlsx'):
+            raise ValueError(f"不支持的导出格式: {format}")
         
-        elif format.lower() == 'json':
-            filename = f'客户列表_{timestamp}.json'
-            json_data = [customer.to_dict() for customer in customers_data]
-            return ExportUtils.export_to_json(json_data, filename)
+        if not filename:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'{title}_{timestamp}.{format}'
         
-        else:
-            raise ValueError(f"不支持的导出格式: {format}")
+        if format == 'csv':
+            return ExportUtils.stream_to_csv(map(to_row, items), filename, headers,
+                                             progress_callback, total)
+        if format == 'xlsx':
+            return ExportUtils.stream_to_excel(map(to_row, items), filename, headers, title,
+                                               progress_callback, total)
+        return ExportUtils.stream_to_json(map(ExportUtils._to_record, items), filename,
+                                          progress_callback, total)
+    
+    @staticmethod
+    def export_parts_list(parts_data, format='csv', filename=None,
+                          progress_callback=None, total=None):
+        """导出配件列表（parts_data 可以是 PartDAO.iter_parts() 等迭代器）"""
+        to_row = attrgetter('part_id', 'part_name', 'part_code', 'category', 'brand',
+                            'specification', 'unit', 'purchase_price', 'selling_price',
+                            'stock_quantity', 'min_stock', 'supplier')
+        return ExportUtils._export_rows(parts_data, format, '配件列表', ExportUtils.PARTS_HEADERS,
+                                        to_row, filename, progress_callback, total)
+    
+    @staticmethod
+    def export_repair_orders(orders_data, format='csv', filename=None,
+                             progress_callback=None, total=None):
+        """导出维修订单（orders_data 可以是 RepairOrderDAO.iter_order_list() 等迭代器）"""
+        def to_row(order):
+            return (order.order_id, getattr(order, 'customer_name', ''), order.vehicle_type,
+                    order.vehicle_number, order.repair_date, order.fault_description,
+                    order.repair_content, order.labor_cost, order.parts_cost,
+                    order.total_amount, order.status, order.technician)
+        return ExportUtils._export_rows(orders_data, format, '维修订单',
+                                        ExportUtils.REPAIR_ORDERS_HEADERS, to_row, filename,
+                                        progress_callback, total)
+    
+    @staticmethod
+    def export_customers(customers_data, format='csv', filename=None,
+                         progress_callback=None, total=None):
+        """导出客户列表（customers_data 可以是 CustomerDAO.iter_customers() 等迭代器）"""
+        to_row = attrgetter('customer_id', 'customer_name', 'phone', 'address', 'vehicle_info')
+        return ExportUtils._export_rows(customers_data, format, '客户列表',
+                                        ExportUtils.CUSTOMERS_HEADERS, to_row, filename,
+                                        progress_callback, total)
     
     @staticmethod
     def export_report(report_data, report_name, format='json'):